@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+批量补查页面范围（monitor_curlcffi.py --backfill START:END）
+逐页用浏览器检查一千页的帖子要几个小时，这里并行抓取、多进程解析：
+- 抓取：BACKFILL_WORKERS 个线程（不超过出口地址数），每个线程从会话池借一个 curl_cffi 会话
+  （每个出口地址一个会话，各自的 cookie 和 SESSION_RATE 令牌桶），
+  所有请求再共用一个 BACKFILL_RATE 的主机令牌桶，对站点的总请求速率不超过该值
+- 解析：BACKFILL_PARSE_PROCESSES 个进程并行解析 HTML（为 0 时在抓取线程中解析）；
+  解析进程用 forkserver（不支持时用 spawn）启动，不从已有抓取线程的进程 fork，
+  避免子进程继承其他线程持有的锁而死锁
+- 结果：目标评论写入 archive 表；--notify 时为未通知过的评论发送通知，否则只归档，
+  不标记为已通知（范围可能包含实时监控正在检查的页面，标记后其中的新评论不会再通知）
+- 进度：待扫描的页面保存在 StateStore 的 backfill 表，中断或部分页面失败后重新运行同一命令继续
+"""
+
+import time
+import logging
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Dict, Optional, Tuple
+
+from config import Config
+from comment_extractor import extract_comments
+from rate_limit import TokenBucket
+from session_pool import SessionPool
+from source_bind import is_local_address, load_pool
+
+logger = logging.getLogger(__name__)
+
+# 每处理多少页输出一次进度
+PROGRESS_EVERY = 20
+
+
+def parse_range(value: str) -> Tuple[int, int]:
+    """解析 START:END（包含两端）"""
+    start, sep, end = value.partition(':')
+    if not sep or not start.strip().isdigit() or not end.strip().isdigit():
+        raise ValueError(f"页面范围格式应为 START:END，例如 1:1000（实际为 {value!r}）")
+
+    start_page, end_page = int(start), int(end)
+    if start_page < 1 or start_page > end_page:
+        raise ValueError(f"无效的页面范围: {value}")
+    return start_page, end_page
+
+
+def parser_context():
+    """解析进程的启动方式：forkserver，不支持时（Windows）用 spawn"""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def parse_page(html: bytes, page_num: int, page_url: str) -> Optional[Dict]:
+    """解析页面（在解析进程中运行）"""
+    return extract_comments(html, page_num, page_url)
+
+
+class Backfill:
+    """页面范围补查
+
+    Args:
+        monitor: LETMonitorCurlCffi 实例（复用其请求分类、条件请求、地址统计和通知）
+        start_page: 起始页面
+        end_page: 结束页面（包含）
+        notify: 是否为未通知过的评论发送通知（默认只归档）
+    """
+
+    def __init__(self, monitor, start_page: int, end_page: int, notify: bool = False):
+        self.monitor = monitor
+        self.store = monitor.state_store
+        self.start_page = start_page
+        self.end_page = end_page
+        self.notify = notify
+
+        # 每个范围单独记录进度，与监控的跳页补查互不影响
+        self.key = f"{self.store.checkpoint_key()}#scan:{start_page}-{end_page}"
+        self.bucket = TokenBucket(Config.BACKFILL_RATE, Config.BACKFILL_BURST)
+        self.session_pool: Optional[SessionPool] = None
+        self.parsers: Optional[ProcessPoolExecutor] = None
+
+    def _create_pool(self) -> SessionPool:
+        """每个抓取线程一个会话，每个可绑定的出口地址最多一个会话（没有时不绑定地址）
+
+        抓取线程数超过地址数时减少线程数，否则同一地址上的多个会话
+        各有一个令牌桶，该地址的请求速率会成倍超过 SESSION_RATE
+        """
+        addresses = [a for a in load_pool() if is_local_address(a)] or [None]
+        workers = max(Config.BACKFILL_WORKERS, 1)
+        if workers > len(addresses):
+            logger.warning(f"⚠️  只有 {len(addresses)} 个出口地址，抓取线程从 {workers} 个减少到 {len(addresses)} 个"
+                           f"（每个地址 {Config.SESSION_RATE} 请求/秒）")
+            workers = len(addresses)
+        return SessionPool(
+            lambda address: self.monitor.create_session(ipv6_only=address is not None),
+            addresses=addresses[:workers],
+            health=self.monitor.address_health
+        )
+
+    def fetch(self, page_num: int) -> Optional[Dict]:
+        """抓取并解析页面（在抓取线程中运行）
+
+        Returns:
+            解析结果（页面不存在时带 not_found），CF 挑战或出错时返回 None
+        """
+        url = self.monitor.get_page_url(page_num)
+        with self.session_pool.session() as pooled:
+            self.bucket.acquire()
+            result = self.monitor.load_page(page_num, pooled)
+
+            if result == 'not_modified':
+                cached = self.monitor.page_cache.get_result(url)
+                if cached is not None:
+                    return cached
+                # 缓存的解析结果已被淘汰（LRU 只保留最近的页面），不带条件请求头重新请求
+                logger.info(f"♻️  页面 {page_num} 缓存的解析结果已被淘汰，重新完整请求")
+                pooled.bucket.acquire()
+                self.bucket.acquire()
+                result = self.monitor.load_page(page_num, pooled, conditional=False)
+
+        if result == 'not_found':
+            return {'comments': [], 'total': 0, 'not_found': True}
+
+        if result == 'not_modified':
+            return self.monitor.page_cache.get_result(url)
+
+        if not isinstance(result, (bytes, str)) or result == 'cf_challenge':
+            return None
+
+        if self.parsers:
+            parsed = self.parsers.submit(parse_page, result, page_num, url).result()
+        else:
+            parsed = parse_page(result, page_num, url)
+
+        if parsed is None:
+            return {'comments': [], 'total': 0, 'not_found': True}
+        return parsed
+
+    def save(self, page_num: int, result: Optional[Dict]) -> bool:
+        """保存页面结果并移出待扫描范围（主线程），返回页面是否完成"""
+        if result is None:
+            return False
+
+        if result.get('not_found'):
+            logger.warning(f"⚠️  页面 {page_num} 不存在，跳过")
+        else:
+            for comment in result['comments']:
+                self.store.archive_comment(comment, key=self.store.checkpoint_key())
+                if self.notify and comment['comment_id'] not in self.monitor.seen_comments:
+                    self.monitor.notify_new_comments([comment])
+
+        self.store.complete_backfill(page_num, self.key)
+        return True
+
+    def run(self) -> int:
+        """扫描范围内所有未完成的页面，返回失败（留待下次继续）的页数"""
+        pending = self.store.count_backfill(self.key)
+        if pending:
+            logger.info(f"💾 继续上次的补查：页面 {self.start_page}-{self.end_page} 还剩 {pending} 页")
+        else:
+            self.store.add_backfill(self.start_page, self.end_page, key=self.key)
+            pending = self.end_page - self.start_page + 1
+
+        pages = self.store.pending_backfill(pending, self.key)
+        self.session_pool = self._create_pool()
+        logger.info(f"🗂️  补查 {len(pages)} 页：{len(self.session_pool)} 个抓取线程，"
+                    f"{Config.BACKFILL_PARSE_PROCESSES} 个解析进程，总速率 {Config.BACKFILL_RATE} 请求/秒")
+
+        if Config.BACKFILL_PARSE_PROCESSES > 0:
+            self.parsers = ProcessPoolExecutor(
+                max_workers=Config.BACKFILL_PARSE_PROCESSES,
+                mp_context=parser_context()
+            )
+
+        archived_before = self.store.count_archived()
+        done = failed = 0
+        start_time = time.time()
+        fetchers = ThreadPoolExecutor(max_workers=len(self.session_pool), thread_name_prefix='backfill')
+
+        try:
+            futures: Dict[Future, int] = {fetchers.submit(self.fetch, page): page for page in pages}
+            for future in as_completed(futures):
+                page_num = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"❌ 补查页面 {page_num} 出错: {e}")
+                    result = None
+
+                if self.save(page_num, result):
+                    done += 1
+                else:
+                    failed += 1
+
+                if (done + failed) % PROGRESS_EVERY == 0:
+                    elapsed = time.time() - start_time
+                    logger.info(f"📈 补查进度 {done + failed}/{len(pages)}（失败 {failed}），"
+                                f"{(done + failed) / elapsed:.2f} 页/秒")
+        finally:
+            fetchers.shutdown(wait=True, cancel_futures=True)
+            if self.parsers:
+                self.parsers.shutdown(cancel_futures=True)
+            self.session_pool.close()
+
+        elapsed = time.time() - start_time
+        archived = self.store.count_archived() - archived_before
+        logger.info(f"✅ 补查完成：{done} 页，用时 {elapsed:.0f} 秒，新归档 {archived} 条评论")
+        logger.info(f"📊 会话池：{self.session_pool.summary()}")
+        if failed:
+            logger.warning(f"⚠️  {failed} 页抓取失败，重新运行同一命令继续补查")
+        return failed
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Cloudflare 分类准确率和性能
+用 fixtures/cf/ 中的样本（manifest.json 记录状态码、响应头和期望分类）
+对比 cf_classifier 和原来的子串匹配（HTML 中出现 'cloudflare' 等关键字即判为挑战），
+输出每个样本的分类结果、误判数和单次分类耗时
+
+用法：
+    python3 benchmarks/bench_cf_classifier.py [--rounds 2000]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+
+from cf_classifier import CHALLENGE_KINDS, classify_response
+from bench_extractor import build_page
+
+FIXTURE_DIR = os.path.join(BENCH_DIR, 'fixtures', 'cf')
+
+# 原 load_page 中的关键字
+LEGACY_KEYWORDS = ['cloudflare', 'just a moment', '请稍候', '正在验证']
+
+
+def legacy_classify(status_code, headers, body):
+    """原 curl_cffi load_page 的判断逻辑"""
+    if status_code == 404:
+        return 'not_found'
+    if status_code != 200:
+        return 'error'
+    content = body.decode('utf-8', 'ignore').lower()
+    if any(keyword in content for keyword in LEGACY_KEYWORDS):
+        return 'challenge'
+    return 'ok'
+
+
+def same_outcome(kind, expected):
+    """挑战类（interstitial / turnstile）在原逻辑中都是 'challenge'"""
+    if expected in CHALLENGE_KINDS:
+        return kind in CHALLENGE_KINDS or kind == 'challenge'
+    return kind == expected
+
+
+def load_fixtures():
+    """读取样本"""
+    with open(os.path.join(FIXTURE_DIR, 'manifest.json'), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    for item in manifest:
+        with open(os.path.join(FIXTURE_DIR, item['file']), 'rb') as f:
+            item['body'] = f.read()
+    return manifest
+
+
+def bench(func, cases, rounds):
+    """返回每次分类平均耗时（微秒）"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for case in cases:
+            func(case['status'], case['headers'], case['body'])
+    return (time.perf_counter() - start) / rounds / len(cases) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cloudflare 分类准确率和性能')
+    parser.add_argument('--rounds', type=int, default=2000, help='每种实现的运行轮数')
+    args = parser.parse_args()
+
+    cases = load_fixtures()
+
+    # 加一个真实大小的帖子页面（评论中提到 Cloudflare）
+    big_page = build_page().replace('word7 ', 'cloudflare just a moment ', 1).encode('utf-8')
+    cases.append({'file': '<合成帖子页面>', 'status': 200, 'headers': {'server': 'cloudflare'},
+                  'body': big_page, 'expected': 'ok'})
+
+    new_errors = legacy_errors = 0
+    print(f"{'样本':<28}{'期望':<14}{'cf_classifier':<30}{'原子串匹配':<12}")
+    for case in cases:
+        result = classify_response(case['status'], case['headers'], case['body'])
+        legacy = legacy_classify(case['status'], case['headers'], case['body'])
+
+        new_ok = same_outcome(result.kind, case['expected'])
+        legacy_ok = same_outcome(legacy, case['expected'])
+        new_errors += not new_ok
+        legacy_errors += not legacy_ok
+
+        new_col = f"{'✅' if new_ok else '❌'} {result.kind} ({result.reason})"
+        print(f"{case['file']:<28}{case['expected']:<14}{new_col[:29]:<30}{'✅' if legacy_ok else '❌'} {legacy}")
+
+    print(f'\n误判：cf_classifier {new_errors}/{len(cases)}，原子串匹配 {legacy_errors}/{len(cases)}')
+
+    new_us = bench(classify_response, cases, args.rounds)
+    legacy_us = bench(legacy_classify, cases, args.rounds)
+    print(f'cf_classifier: {new_us:8.1f} µs/次')
+    print(f'原子串匹配:    {legacy_us:8.1f} µs/次')
+
+    if new_errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+评论提取性能对比
+对比原 BeautifulSoup 解析路径和 comment_extractor（lxml）路径，
+校验两者输出完全一致，并输出单页耗时和加速比；
+另外测试目标用户不在页面上时预扫描（跳过 DOM 解析）的耗时
+
+用法：
+    python3 benchmarks/bench_extractor.py [--html page.html] [--rounds 50]
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bs4 import BeautifulSoup
+
+from config import Config
+from comment_extractor import extract_comments, prescan
+
+PAGE_URL = 'https://lowendtalk.com/discussion/212154/test/p241'
+IMAGE_URL = Config.REQUIRED_IMAGE_URL
+
+
+def soup_parse_comments(html, page_num, page_url):
+    """原 parse_comments 的 BeautifulSoup 实现（作为基准和正确性参照）"""
+    soup = BeautifulSoup(html, 'lxml')
+
+    page_not_found = soup.find('h1', string='Page not found.')
+    not_found_msg = soup.find('div', {'id': 'Message'})
+    if page_not_found or (not_found_msg and 'could not be found' in not_found_msg.get_text()):
+        return None
+
+    comments = []
+    comment_items = soup.find_all('li', class_=lambda x: x and 'ItemComment' in x)
+
+    for item in comment_items:
+        comment_id = item.get('id', '')
+        author_elem = item.find('a', class_='Username')
+        if not author_elem:
+            continue
+        author = author_elem.get_text(strip=True)
+        if author != Config.TARGET_USER:
+            continue
+
+        time_elem = item.find('time')
+        timestamp = time_elem.get('datetime', '') if time_elem else ''
+        time_text = time_elem.get('title', '') if time_elem else ''
+
+        message_elem = item.find('div', class_='Message userContent')
+        if message_elem:
+            if not message_elem.find('img', src=IMAGE_URL):
+                continue
+            if Config.FILTER_BLOCKQUOTE and message_elem.find('blockquote') is not None:
+                continue
+            content = message_elem.get_text(separator='\n', strip=True)
+            links = []
+            for a_tag in message_elem.find_all('a', href=True):
+                href = a_tag.get('href', '')
+                if href and not href.startswith('#') and not href.startswith('javascript:'):
+                    if href.startswith('/'):
+                        href = f"https://lowendtalk.com{href}"
+                    links.append(href)
+            if links:
+                content += '\n\n📎 链接:\n' + '\n'.join(f'- {link}' for link in links)
+        else:
+            content = ''
+            links = []
+
+        comments.append({
+            'comment_id': comment_id,
+            'author': author,
+            'timestamp': time_text or timestamp,
+            'content': content,
+            'links': links,
+            'link': f"{page_url}#{comment_id}",
+            'page': page_num
+        })
+
+    # 分页中的最大页码（PagerBefore / PagerAfter 在主题中可能是 div 或 span）
+    pages = []
+    for pager in soup.find_all(id=re.compile(r'^Pager(Before|After)$')):
+        for a_tag in pager.find_all('a', href=True):
+            match = re.search(r'/p(\d+)$', a_tag['href'])
+            if match:
+                pages.append(int(match.group(1)))
+            elif a_tag.get_text(strip=True).isdigit():
+                pages.append(int(a_tag.get_text(strip=True)))
+
+    # 每条评论第一个 <time> 的发布时间（不含侧栏中的时间）
+    comment_times = []
+    for item in comment_items:
+        time_elem = item.find('time')
+        if time_elem and time_elem.get('datetime'):
+            comment_times.append(datetime.fromisoformat(time_elem['datetime']).timestamp())
+
+    return {'comments': comments, 'total': len(comment_items), 'last_page': max(pages) if pages else None,
+            'comment_times': sorted(comment_times)}
+
+
+def build_comment(i, author, body):
+    """生成一条 Vanilla 论坛格式的评论"""
+    return f"""
+<li class="Item ItemComment Role_Member" id="Comment_{4000000 + i}">
+  <div class="Comment">
+    <div class="Options"><span class="ToggleFlyout OptionsMenu"><span class="OptionsTitle" title="Options">Options</span>
+      <span class="SpFlyoutHandle"></span><ul class="Flyout MenuItems" style="display: none;">
+      <li><a href="/discussion/flag/{i}" class="FlagContent">Flag</a></li></ul></span></div>
+    <div class="Item-Header CommentHeader">
+      <div class="AuthorWrap"><span class="Author">
+        <a title="{author}" href="/profile/{author}" class="PhotoWrap"><img src="https://lowendtalk.com/uploads/userpics/{i}/n{author}.png" alt="{author}" class="ProfilePhoto ProfilePhotoMedium"></a>
+        <a href="/profile/{author}" class="Username">{author}</a></span>
+        <span class="AuthorInfo"><span class="MItem RoleTitle">Member</span></span></div>
+      <div class="Meta CommentMeta CommentInfo">
+        <span class="MItem DateCreated"><a href="/discussion/comment/{4000000 + i}/#Comment_{4000000 + i}" class="Permalink" rel="nofollow">
+        <time title="November 29, 2025 {i % 12 + 1}:30PM" datetime="2025-11-29T{i % 24:02d}:30:00+00:00">November 29</time></a></span>
+      </div>
+    </div>
+    <div class="Item-BodyWrap"><div class="Item-Body">
+      <div class="Message userContent">{body}</div>
+      <div class="Reactions"><a href="/react/comment/like/{i}" class="ReactButton React-1" title="Like" rel="nofollow"><span class="ReactSprite"></span> <span class="ReactLabel">Like</span></a></div>
+    </div></div>
+  </div>
+</li>"""
+
+
+def build_page(comments_per_page=30, with_target=True):
+    """生成一个接近真实大小的帖子页面"""
+    nav = ''.join(f'<li><a href="/categories/cat{i}">Category {i}</a></li>' for i in range(200))
+    # 侧栏的 In this Discussion 也有 <time>，不属于评论
+    sidebar = ''.join(f'<li><a href="/profile/user{i}">user{i}</a> <time datetime="2025-11-{i % 28 + 1:02d}T08:00:00+00:00">'
+                      f'November {i % 28 + 1}</time></li>' for i in range(20))
+    scripts = ''.join(f'<script>window.gdn_{i} = {{"a": {i}, "b": "{"x" * 200}"}};</script>' for i in range(60))
+
+    items = []
+    for i in range(comments_per_page):
+        if i % 10 == 3:
+            body = (f'aluy<br>1 vCPU<br>{7000 + i}MB RAM<br>17412MB SSD<br>3.28 EUR/yr<br>'
+                    f'<a href="/go/deal{i}" rel="nofollow">order</a> <a href="https://example.com/cart?id={i}">cart</a>'
+                    f'<br><img src="{IMAGE_URL}" alt="image">')
+            author = Config.TARGET_USER if with_target else f'user{i}'
+        elif i % 10 == 6:
+            body = (f'<blockquote class="Quote UserQuote"><div class="QuoteText">quoted {i}</div></blockquote>'
+                    f'reply <img src="{IMAGE_URL}" alt="image">')
+            author = Config.TARGET_USER if with_target else f'user{i}'
+        else:
+            body = ('<p>' + ' '.join(f'word{j}' for j in range(120)) + '</p>'
+                    '<ul><li>one</li><li>two <b>bold</b></li></ul>'
+                    '<blockquote class="Quote"><a href="#Comment_1">@someone said:</a> text</blockquote>'
+                    '<pre><code>line1\nline2</code></pre>')
+            author = f'user{i}'
+        items.append(build_comment(i, author, body))
+
+    return f"""<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>Megathread - LowEndTalk</title>{scripts}</head>
+<body id="vanilla_discussion_index" class="Vanilla Discussion isDesktop">
+<div id="Frame"><div class="Head"><ul class="Nav">{nav}</ul></div>
+<div id="Body"><div id="Content" class="Column ContentColumn">
+<span id="PagerBefore" class="Pager"><a href="/discussion/212154/test/p240" class="Previous">«</a><a href="/discussion/212154/test/p1" class="FirstPage">1</a><span class="Ellipsis">…</span><a href="/discussion/212154/test/p412" class="LastPage">412</a></span>
+<div class="CommentsWrap"><div class="DataBox DataBox-Comments"><h2 class="CommentHeading">Comments</h2>
+<ul class="MessageList DataList Comments">{''.join(items)}</ul></div></div>
+<span id="PagerAfter" class="Pager"><a href="/discussion/212154/test/p242" class="Next">»</a></span>
+</div><div id="Panel" class="Column PanelColumn"><div class="Box InThisDiscussion"><h4>In this Discussion</h4>
+<ul class="PanelInfo">{sidebar}</ul></div></div></div></div></body></html>"""
+
+
+def bench(func, html, rounds):
+    """返回每页平均耗时（毫秒）"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func(html)
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='评论提取性能对比')
+    parser.add_argument('--html', help='使用已保存的页面 HTML 文件（默认生成合成页面）')
+    parser.add_argument('--rounds', type=int, default=50, help='每种实现的运行次数')
+    args = parser.parse_args()
+
+    if args.html:
+        with open(args.html, 'rb') as f:
+            html_bytes = f.read()
+    else:
+        html_bytes = build_page().encode('utf-8')
+    html_text = html_bytes.decode('utf-8')
+    quiet_bytes = build_page(with_target=False).encode('utf-8')
+
+    expected = soup_parse_comments(html_text, 241, PAGE_URL)
+    if not args.html and expected['last_page'] != 412:
+        print(f'❌ 合成页面的最后一页应为 412（实际为 {expected["last_page"]}）')
+        sys.exit(1)
+    if len(expected['comment_times']) != expected['total']:
+        print(f'❌ 评论时间 {len(expected["comment_times"])} 个，评论 {expected["total"]} 条')
+        sys.exit(1)
+
+    for html, use_prescan in ((html_bytes, False), (html_bytes, True), (html_text, True)):
+        actual = extract_comments(html, 241, PAGE_URL, use_prescan=use_prescan)
+        # 只比较参照实现给出的字段
+        if expected != {key: actual.get(key) for key in expected}:
+            print(f'❌ 输出不一致（{type(html).__name__}, prescan={use_prescan}）')
+            print(f'  soup: {expected}')
+            print(f'  lxml: {actual}')
+            sys.exit(1)
+
+    for html in (html_bytes, quiet_bytes):
+        scan_total = prescan(html, Config.TARGET_USER, IMAGE_URL)['total']
+        parsed_total = extract_comments(html, 241, PAGE_URL, use_prescan=False)['total']
+        if scan_total != parsed_total:
+            print(f'❌ 预扫描评论数 {scan_total} 与解析结果 {parsed_total} 不一致')
+            sys.exit(1)
+
+    print(f'页面大小: {len(html_bytes) / 1024:.0f} KB，评论 {actual["total"]} 条，'
+          f'目标评论 {len(actual["comments"])} 条（两种实现输出一致）')
+
+    soup_ms = bench(lambda h: soup_parse_comments(h, 241, PAGE_URL), html_text, args.rounds)
+    lxml_ms = bench(lambda h: extract_comments(h, 241, PAGE_URL, use_prescan=False), html_bytes, args.rounds)
+    quiet_soup_ms = bench(lambda h: soup_parse_comments(h, 241, PAGE_URL), quiet_bytes.decode('utf-8'), args.rounds)
+    quiet_scan_ms = bench(lambda h: extract_comments(h, 241, PAGE_URL), quiet_bytes, args.rounds)
+    quiet_text_ms = bench(lambda h: extract_comments(h, 241, PAGE_URL), quiet_bytes.decode('utf-8'), args.rounds)
+
+    print(f'BeautifulSoup: {soup_ms:8.2f} ms/页')
+    print(f'lxml 提取:     {lxml_ms:8.2f} ms/页')
+    print(f'加速比:        {soup_ms / lxml_ms:8.1f}x')
+    print('无目标评论的页面:')
+    print(f'  BeautifulSoup:       {quiet_soup_ms:8.2f} ms/页')
+    print(f'  预扫描（bytes）:     {quiet_scan_ms:8.3f} ms/页')
+    print(f'  预扫描（str，Selenium page_source）: {quiet_text_ms:8.3f} ms/页')
+
+
+if __name__ == '__main__':
+    main()
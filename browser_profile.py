@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+持久化浏览器配置目录（user-data-dir）
+重启浏览器后保留 cookie（cf_clearance）、HTTP 缓存和 localStorage，新浏览器启动即是"热"的：
+- 启动前清理崩溃残留的 Singleton* 锁文件
+- 配置文件损坏（Preferences / Local State 不是合法 JSON）时移到 .corrupt 目录并重新创建
+- 超过 BROWSER_PROFILE_MAX_MB 时先清理缓存目录，仍然超出则重建
+BROWSER_PROFILE_DIR 可以放在 tmpfs（如 /dev/shm）上，减少磁盘 IO
+"""
+
+import os
+import json
+import time
+import shutil
+import logging
+from typing import Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Chrome 运行时创建的锁文件（进程被杀后残留会导致无法启动）
+LOCK_FILES = ('SingletonLock', 'SingletonSocket', 'SingletonCookie', 'lockfile')
+
+# 可以随时删除的缓存目录（相对于配置目录）
+CACHE_DIRS = (
+    'Default/Cache',
+    'Default/Code Cache',
+    'Default/GPUCache',
+    'Default/Service Worker/CacheStorage',
+    'Default/Service Worker/ScriptCache',
+    'GrShaderCache',
+    'GraphiteDawnCache',
+    'ShaderCache',
+    'component_crx_cache',
+)
+
+# 启动时会读取的 JSON 文件，损坏会导致 Chrome 崩溃或丢失配置
+JSON_FILES = ('Local State', 'Default/Preferences')
+
+# 最多保留的损坏配置目录数
+MAX_QUARANTINED = 2
+
+
+def dir_size_mb(path: str) -> float:
+    """目录大小（MB）"""
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total / 1024 / 1024
+
+
+class BrowserProfile:
+    """浏览器配置目录管理
+
+    Args:
+        base_dir: 所有配置目录的父目录，默认 BROWSER_PROFILE_DIR（为空时不使用持久化配置）
+        max_mb: 单个配置目录的大小上限，默认 BROWSER_PROFILE_MAX_MB
+    """
+
+    def __init__(self, base_dir: Optional[str] = None, max_mb: Optional[int] = None):
+        self.base_dir = base_dir if base_dir is not None else Config.BROWSER_PROFILE_DIR
+        self.max_mb = max_mb or Config.BROWSER_PROFILE_MAX_MB
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.base_dir)
+
+    def path(self, name: str) -> str:
+        """配置目录路径"""
+        return os.path.join(self.base_dir, name)
+
+    def prepare(self, name: str) -> Optional[str]:
+        """启动浏览器前检查配置目录，返回可用的路径（未启用时返回 None）"""
+        if not self.enabled:
+            return None
+
+        path = self.path(name)
+        os.makedirs(path, exist_ok=True)
+
+        self.remove_locks(path)
+
+        if not self.is_valid(path):
+            self.quarantine(name)
+            os.makedirs(path, exist_ok=True)
+            return path
+
+        size = dir_size_mb(path)
+        if size > self.max_mb:
+            logger.info(f"🧹 浏览器配置 {name} 占用 {size:.0f} MB，超过上限 {self.max_mb} MB，清理缓存...")
+            self.prune_caches(path)
+
+            size = dir_size_mb(path)
+            if size > self.max_mb:
+                logger.warning(f"⚠️  清理缓存后仍有 {size:.0f} MB，重建浏览器配置 {name}")
+                shutil.rmtree(path, ignore_errors=True)
+                os.makedirs(path, exist_ok=True)
+
+        return path
+
+    @staticmethod
+    def remove_locks(path: str):
+        """删除上次崩溃残留的锁文件"""
+        for name in LOCK_FILES:
+            lock = os.path.join(path, name)
+            if os.path.lexists(lock):
+                try:
+                    os.remove(lock)
+                    logger.debug(f"删除残留锁文件 {lock}")
+                except OSError as e:
+                    logger.warning(f"⚠️  删除锁文件 {lock} 失败: {e}")
+
+    @staticmethod
+    def is_valid(path: str) -> bool:
+        """配置目录中的 JSON 文件是否完整"""
+        for name in JSON_FILES:
+            file_path = os.path.join(path, name)
+            if not os.path.exists(file_path):
+                continue
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️  浏览器配置文件 {file_path} 损坏: {e}")
+                return False
+        return True
+
+    @staticmethod
+    def prune_caches(path: str):
+        """删除缓存目录（cookie 和 localStorage 不受影响）"""
+        for name in CACHE_DIRS:
+            shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+
+    def quarantine(self, name: str):
+        """把损坏的配置目录移走，保留最近几份用于排查"""
+        path = self.path(name)
+        target = f"{path}.corrupt-{int(time.time())}"
+        try:
+            os.replace(path, target)
+            logger.warning(f"🚑 浏览器配置 {name} 已隔离到 {target}，使用新的配置目录")
+        except OSError as e:
+            logger.warning(f"⚠️  隔离浏览器配置失败，直接删除: {e}")
+            shutil.rmtree(path, ignore_errors=True)
+            return
+
+        prefix = f"{name}.corrupt-"
+        old = sorted(d for d in os.listdir(self.base_dir) if d.startswith(prefix))
+        for d in old[:-MAX_QUARANTINED]:
+            shutil.rmtree(os.path.join(self.base_dir, d), ignore_errors=True)
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+浏览器内存看门狗
+从 /proc 统计本进程启动的 Chrome / Playwright 进程树的内存（RSS）和渲染进程数，
+只在内存或渲染进程数超过上限、或浏览器无响应时才回收浏览器，
+代替固定每 RESTART_INTERVAL 页重启一次
+"""
+
+import os
+import logging
+from typing import Callable, Dict, List, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+PROC = '/proc'
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+# 回收原因类型（recycle_reason 之后读取 last_kind，按问题选择重启范围）
+UNRESPONSIVE = 'unresponsive'
+MEMORY = 'memory'
+RENDERERS = 'renderers'
+PAGES = 'pages'
+
+
+def _read_ppid(pid: str) -> Optional[int]:
+    """读取父进程 ID（/proc/<pid>/stat 第 4 个字段，进程名可能含空格和括号）"""
+    try:
+        with open(f'{PROC}/{pid}/stat', 'r') as f:
+            data = f.read()
+        return int(data.rsplit(')', 1)[1].split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _read_rss(pid: int) -> int:
+    """读取进程 RSS（字节）"""
+    try:
+        with open(f'{PROC}/{pid}/statm', 'r') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def _is_renderer(pid: int) -> bool:
+    """是否是 Chrome 渲染进程"""
+    try:
+        with open(f'{PROC}/{pid}/cmdline', 'rb') as f:
+            return b'--type=renderer' in f.read()
+    except OSError:
+        return False
+
+
+def descendant_pids(root_pid: int) -> List[int]:
+    """root_pid 的所有子孙进程"""
+    children: Dict[int, List[int]] = {}
+    for name in os.listdir(PROC):
+        if not name.isdigit():
+            continue
+        ppid = _read_ppid(name)
+        if ppid is not None:
+            children.setdefault(ppid, []).append(int(name))
+
+    pids = []
+    stack = list(children.get(root_pid, []))
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(children.get(pid, []))
+    return pids
+
+
+class BrowserWatchdog:
+    """浏览器进程树监控
+
+    Args:
+        root_pid: 浏览器进程的祖先进程，默认当前进程（chromedriver / Playwright driver 都是它的子进程）
+    """
+
+    def __init__(self, root_pid: Optional[int] = None):
+        self.root_pid = root_pid or os.getpid()
+        self.max_rss_mb = Config.BROWSER_MAX_RSS_MB
+        self.max_renderers = Config.BROWSER_MAX_RENDERERS
+        self.enabled = Config.RECYCLE_MODE == 'memory' and os.path.isdir(PROC)
+
+        self.last_rss_mb: Optional[float] = None
+        self.peak_rss_mb = 0.0
+        self.last_kind: Optional[str] = None  # 最近一次回收原因的类型
+
+        if Config.RECYCLE_MODE == 'memory' and not self.enabled:
+            logger.warning("⚠️  无法读取 /proc，浏览器回收改为按页数（RESTART_INTERVAL）")
+
+    def sample(self) -> Dict:
+        """采样浏览器进程树
+
+        Returns:
+            {'rss_mb': 总内存, 'processes': 进程数, 'renderers': 渲染进程数}
+        """
+        pids = descendant_pids(self.root_pid)
+        rss = sum(_read_rss(pid) for pid in pids)
+        return {
+            'rss_mb': rss / 1024 / 1024,
+            'processes': len(pids),
+            'renderers': sum(1 for pid in pids if _is_renderer(pid)),
+        }
+
+    def reset(self):
+        """浏览器重启后重新记录"""
+        self.last_rss_mb = None
+        self.peak_rss_mb = 0.0
+
+    def check(self, is_alive: Optional[Callable[[], bool]] = None) -> Optional[str]:
+        """检查浏览器状态并记录内存曲线
+
+        Returns:
+            需要回收时返回原因，否则返回 None
+        """
+        self.last_kind = None
+
+        if is_alive and not is_alive():
+            self.last_kind = UNRESPONSIVE
+            return "浏览器无响应"
+
+        stats = self.sample()
+        rss_mb = stats['rss_mb']
+        delta = '' if self.last_rss_mb is None else f"（{rss_mb - self.last_rss_mb:+.0f} MB）"
+        self.last_rss_mb = rss_mb
+        self.peak_rss_mb = max(self.peak_rss_mb, rss_mb)
+
+        logger.info(f"🧠 浏览器内存 {rss_mb:.0f} MB{delta}，峰值 {self.peak_rss_mb:.0f} MB，"
+                    f"{stats['processes']} 个进程，{stats['renderers']} 个渲染进程")
+
+        if rss_mb >= self.max_rss_mb:
+            self.last_kind = MEMORY
+            return f"内存 {rss_mb:.0f} MB 超过上限 {self.max_rss_mb} MB"
+
+        if stats['renderers'] > self.max_renderers:
+            self.last_kind = RENDERERS
+            return f"渲染进程 {stats['renderers']} 个超过上限 {self.max_renderers} 个"
+
+        return None
+
+    def recycle_reason(
+        self,
+        pages_checked: int,
+        page_switched: bool,
+        is_alive: Optional[Callable[[], bool]] = None
+    ) -> Optional[str]:
+        """是否需要回收浏览器
+
+        RECYCLE_MODE=memory 时按内存 / 渲染进程数 / 存活检查；
+        RECYCLE_MODE=pages（或没有 /proc）时保持原来的逻辑：切换页面且已检查 RESTART_INTERVAL 页
+        """
+        if self.enabled:
+            return self.check(is_alive)
+
+        self.last_kind = None
+        if page_switched and pages_checked >= Config.RESTART_INTERVAL:
+            self.last_kind = PAGES
+            return f"已检查 {pages_checked} 页，定期重启"
+
+        return None
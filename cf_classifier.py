@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Cloudflare 响应分类
+根据状态码、响应头（cf-mitigated、server）和页面结构标记区分：
+正常页面 / 5 秒盾（interstitial）/ Turnstile 人机验证 / 封禁（block）/ 404，
+代替在整个 HTML 中查找 'cloudflare' 等子串（正常页面引用 Cloudflare 脚本或评论中提到 Cloudflare 时会误判）
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Mapping, Optional, Union
+
+# 分类结果
+OK = 'ok'
+INTERSTITIAL = 'interstitial'
+TURNSTILE = 'turnstile'
+BLOCK = 'block'
+NOT_FOUND = 'not_found'
+ERROR = 'error'
+
+# 需要浏览器 / 等待挑战的分类
+CHALLENGE_KINDS = (INTERSTITIAL, TURNSTILE)
+
+# 正常论坛页面的结构标记
+_PAGE_MARKERS = (b'MessageList', b'ItemComment')
+
+# LowEndTalk 的 "Page not found" 页面（HTTP 200 也可能返回）
+_NOT_FOUND_MARKERS = (b'Page not found.', b'could not be found')
+
+# 挑战页标记（只出现在挑战页，正常页面注入的 challenge-platform/scripts/jsd 不含这些）
+_CHALLENGE_MARKERS = (b'_cf_chl_opt', b'cf-browser-verification', b'id="challenge-form"', b'id="challenge-running"')
+_TURNSTILE_MARKERS = (b'cf-turnstile', b'challenges.cloudflare.com/turnstile')
+
+# 封禁 / 错误页标记（Error 1020 Access denied、1015 rate limited 等）
+_BLOCK_MARKERS = (b'cf-error-details', b'cf-error-code', b'Sorry, you have been blocked')
+
+# 挑战页标题（英文 / 中文本地化；"Attention Required" 也用于封禁页，不在此列）
+_RE_CHALLENGE_TITLE = re.compile(
+    r'<title>\s*(just a moment|请稍候|稍等片刻|正在检查)'.encode(),
+    re.IGNORECASE
+)
+_RE_ERROR_CODE = re.compile(rb'(?:Error code|cf-error-code[^>]*>)\s*(\d{4})', re.IGNORECASE)
+
+# 挑战页都很小，只检查前面这部分内容
+_HEAD_BYTES = 64 * 1024
+
+
+@dataclass(frozen=True)
+class Classification:
+    """分类结果"""
+    kind: str
+    reason: str
+
+    @property
+    def is_challenge(self) -> bool:
+        return self.kind in CHALLENGE_KINDS
+
+
+def _header(headers: Optional[Mapping], name: str) -> str:
+    """读取响应头（大小写不敏感）"""
+    if not headers:
+        return ''
+    value = headers.get(name)
+    if value is None:
+        value = headers.get(name.title())
+    return (value or '').lower()
+
+
+def _contains(data: bytes, markers) -> Optional[bytes]:
+    """返回第一个出现的标记"""
+    for marker in markers:
+        if marker in data:
+            return marker
+    return None
+
+
+def classify_response(
+    status_code: int,
+    headers: Optional[Mapping] = None,
+    body: Union[bytes, str, None] = None
+) -> Classification:
+    """对 HTTP 响应分类
+
+    Args:
+        status_code: HTTP 状态码
+        headers: 响应头
+        body: 响应内容（bytes 或 str）
+    """
+    if isinstance(body, str):
+        body = body.encode('utf-8', 'ignore')
+    body = body or b''
+    head = body[:_HEAD_BYTES]
+
+    mitigated = _header(headers, 'cf-mitigated')
+    from_cloudflare = 'cloudflare' in _header(headers, 'server') or bool(_header(headers, 'cf-ray'))
+    turnstile = _contains(head, _TURNSTILE_MARKERS)
+
+    # 1. Cloudflare 明确标记为挑战
+    if mitigated == 'challenge':
+        if turnstile:
+            return Classification(TURNSTILE, f"cf-mitigated: challenge + {turnstile.decode()}")
+        return Classification(INTERSTITIAL, "cf-mitigated: challenge")
+
+    # 2. 正常页面：有论坛结构标记时，不管内容里提到什么都不是挑战页
+    page_marker = _contains(body, _PAGE_MARKERS)
+    if status_code == 200 and page_marker:
+        return Classification(OK, page_marker.decode())
+
+    # 3. 页面结构之外的挑战页（旧版本没有 cf-mitigated 头）
+    challenge = _contains(head, _CHALLENGE_MARKERS)
+    title = _RE_CHALLENGE_TITLE.search(head)
+    if challenge or (title and from_cloudflare):
+        if turnstile:
+            return Classification(TURNSTILE, turnstile.decode())
+        marker = challenge.decode() if challenge else title.group(0).decode('utf-8', 'ignore')
+        return Classification(INTERSTITIAL, marker)
+
+    if turnstile and not page_marker:
+        return Classification(TURNSTILE, turnstile.decode())
+
+    # 4. 封禁 / 限流（5xx 的 Cloudflare 错误页是源站故障，不算封禁）
+    block = _contains(head, _BLOCK_MARKERS)
+    if status_code in (403, 429) and (block or from_cloudflare):
+        code = _RE_ERROR_CODE.search(head)
+        detail = f"error {code.group(1).decode()}" if code else (block.decode() if block else f"HTTP {status_code}")
+        return Classification(BLOCK, detail)
+
+    # 5. 页面不存在
+    if status_code == 404:
+        return Classification(NOT_FOUND, "HTTP 404")
+
+    if status_code == 200:
+        not_found = _contains(body, _NOT_FOUND_MARKERS)
+        if not_found:
+            return Classification(NOT_FOUND, not_found.decode())
+        return Classification(OK, "HTTP 200")
+
+    return Classification(ERROR, f"HTTP {status_code}")
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+chromedriver 缓存（undetected-chromedriver）
+uc.Chrome(version_main=None) 每次启动都要检测 Chrome 版本、下载并修补 chromedriver，
+重启频繁时耗时明显且有大量磁盘 IO。这里把检测到的 Chrome 版本和修补后的 chromedriver
+按 Chrome 版本号缓存，之后启动直接传 driver_executable_path 和 version_main：
+- Chrome 版本按可执行文件的路径 + mtime + 大小缓存，Chrome 升级后自动重新检测
+- 修补后的 chromedriver 复制到 CHROMEDRIVER_CACHE_DIR/chromedriver-<版本号>，跨进程复用
+- 缓存的 driver 启动失败时删除缓存，回退到 uc 自动下载修补
+"""
+
+import os
+import re
+import json
+import shutil
+import logging
+import subprocess
+from typing import Dict, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Chrome 可执行文件名（按优先级）
+CHROME_NAMES = (
+    'google-chrome',
+    'google-chrome-stable',
+    'chromium',
+    'chromium-browser',
+    'chrome',
+)
+
+_RE_VERSION = re.compile(r'(\d+)\.\d+\.\d+\.\d+')
+
+# 最多保留的 chromedriver 版本数
+MAX_DRIVERS = 2
+
+
+def find_chrome() -> Optional[str]:
+    """查找 Chrome 可执行文件"""
+    for name in CHROME_NAMES:
+        path = shutil.which(name)
+        if path:
+            return os.path.realpath(path)
+    return None
+
+
+class ChromeDriverCache:
+    """Chrome 版本和修补后的 chromedriver 缓存
+
+    Args:
+        cache_dir: 缓存目录，默认 CHROMEDRIVER_CACHE_DIR（为空时不使用缓存）
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir if cache_dir is not None else Config.CHROMEDRIVER_CACHE_DIR
+        self.index_path = os.path.join(self.cache_dir, 'versions.json') if self.cache_dir else None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.cache_dir)
+
+    def _load_index(self) -> Dict[str, str]:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index: Dict[str, str]):
+        tmp_path = f"{self.index_path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(index, f, indent=2)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            logger.warning(f"⚠️  保存 Chrome 版本缓存失败: {e}")
+
+    def chrome_build(self) -> Optional[str]:
+        """已安装的 Chrome 版本号（如 120.0.6099.109），找不到 Chrome 时返回 None"""
+        if not self.enabled:
+            return None
+
+        chrome = find_chrome()
+        if not chrome:
+            return None
+
+        try:
+            stat = os.stat(chrome)
+        except OSError:
+            return None
+        key = f"{chrome}:{int(stat.st_mtime)}:{stat.st_size}"
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        index = self._load_index()
+        if key in index:
+            return index[key]
+
+        try:
+            output = subprocess.run(
+                [chrome, '--version'],
+                capture_output=True,
+                text=True,
+                timeout=10
+            ).stdout
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.warning(f"⚠️  检测 Chrome 版本失败: {e}")
+            return None
+
+        match = _RE_VERSION.search(output)
+        if not match:
+            logger.warning(f"⚠️  无法识别 Chrome 版本: {output.strip()}")
+            return None
+
+        build = match.group(0)
+        logger.info(f"🔍 检测到 Chrome {build}")
+
+        # 同一路径只保留当前版本
+        index = {k: v for k, v in index.items() if not k.startswith(f"{chrome}:")}
+        index[key] = build
+        self._save_index(index)
+        return build
+
+    def driver_path(self, build: Optional[str]) -> Optional[str]:
+        """缓存的 chromedriver 路径（不存在时返回 None）"""
+        if not self.enabled or not build:
+            return None
+        path = os.path.join(self.cache_dir, f"chromedriver-{build}")
+        return path if os.access(path, os.X_OK) else None
+
+    def chrome_kwargs(self, build: Optional[str]) -> Dict:
+        """uc.Chrome 的 version_main / driver_executable_path 参数"""
+        if not build:
+            return {'version_main': None}
+
+        kwargs = {'version_main': int(build.split('.')[0])}
+        path = self.driver_path(build)
+        if path:
+            kwargs['driver_executable_path'] = path
+        return kwargs
+
+    def store(self, build: Optional[str], source_path: Optional[str]):
+        """保存 uc 修补好的 chromedriver"""
+        if not self.enabled or not build or not source_path or not os.path.isfile(source_path):
+            return
+
+        target = os.path.join(self.cache_dir, f"chromedriver-{build}")
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            shutil.copy2(source_path, tmp_path)
+            os.chmod(tmp_path, 0o755)
+            os.replace(tmp_path, target)
+            logger.info(f"💾 已缓存 chromedriver（Chrome {build}）")
+        except OSError as e:
+            logger.warning(f"⚠️  缓存 chromedriver 失败: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        self._prune(keep=target)
+
+    def invalidate(self, build: Optional[str]):
+        """删除缓存的 chromedriver（启动失败时调用）"""
+        path = self.driver_path(build)
+        if path:
+            try:
+                os.remove(path)
+                logger.warning(f"🗑️  已删除缓存的 chromedriver（Chrome {build}）")
+            except OSError:
+                pass
+
+    def _prune(self, keep: str):
+        """只保留最近的几个版本"""
+        drivers = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.startswith('chromedriver-') and not name.endswith('.tmp') and path != keep:
+                drivers.append((os.path.getmtime(path), path))
+
+        for _mtime, path in sorted(drivers, reverse=True)[MAX_DRIVERS - 1:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
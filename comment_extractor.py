@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+评论提取核心
+所有监控后端（Selenium / Playwright / curl_cffi / 异步版本）共用的评论解析，
+直接用 lxml 从 bytes 解析，一次遍历 li.ItemComment，返回与原 parse_comments 相同的结构。
+解析前先对原始内容做字节级预扫描，页面上不可能有目标评论时跳过 DOM 解析；
+同时从分页（#PagerBefore / #PagerAfter）读取帖子当前的最后一页，用于落后时直接跳页，
+并读取所有评论的发布时间，用于估计发帖速度（poll_scheduler.py）
+"""
+
+import re
+import html as html_lib
+import logging
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Union
+
+from lxml import etree
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# bytes 按 UTF-8 解析（LowEndTalk 全站 UTF-8，避免 libxml2 默认按 latin-1 解码）
+_BYTES_PARSER = etree.HTMLParser(encoding='utf-8')
+_TEXT_PARSER = etree.HTMLParser()
+
+# 预编译的 XPath
+_XP_ITEMS = etree.XPath("//li[contains(@class, 'ItemComment')]")
+_XP_NOT_FOUND_H1 = etree.XPath("//h1[. = 'Page not found.']")
+_XP_MESSAGE_DIV = etree.XPath("//div[@id = 'Message']")
+_XP_USERNAME = etree.XPath(".//a[contains(concat(' ', normalize-space(@class), ' '), ' Username ')]")
+_XP_TIME = etree.XPath(".//time")
+_XP_MESSAGE = etree.XPath(
+    ".//div[contains(concat(' ', normalize-space(@class), ' '), ' Message ')"
+    " and contains(concat(' ', normalize-space(@class), ' '), ' userContent ')]"
+)
+_XP_IMAGE = etree.XPath(".//img[@src = $src]")
+_XP_BLOCKQUOTE = etree.XPath(".//blockquote")
+_XP_LINKS = etree.XPath(".//a[@href]")
+
+# get_text() 不包含这些标签内的文字
+_SKIP_TEXT_TAGS = {'script', 'style'}
+
+# 预扫描：统计 class 含 ItemComment 的 <li>（与 _XP_ITEMS 一致）
+_ITEM_PATTERN = r'''<li\b[^>]*\bclass\s*=\s*["'][^"']*ItemComment'''
+_RE_ITEMS_BYTES = re.compile(_ITEM_PATTERN.encode(), re.IGNORECASE)
+_RE_ITEMS_TEXT = re.compile(_ITEM_PATTERN, re.IGNORECASE)
+
+# 每页评论数（页面评论数达到该值才会有下一页）
+COMMENTS_PER_PAGE = 30
+
+# 分页：Vanilla 的 #PagerBefore / #PagerAfter（按 id 匹配，不同主题下可能是 div 或 span，
+# 内部还可能嵌套同名标签如 span.Ellipsis，按嵌套层数找到对应的结束标签），
+# 页码取自链接的 /p<页码> 和链接文字（LastPage 链接就是最后一页）
+_PAGER_PATTERN = r'''<([a-zA-Z][a-zA-Z0-9]*)\b[^>]*\bid\s*=\s*["']Pager(?:Before|After)["'][^>]*>'''
+_PAGE_NUM_PATTERN = r'''href\s*=\s*["'][^"']*/p(\d+)(?:[?#][^"']*)?["']|>\s*(\d+)\s*<'''
+# 没有分页时（只有一页或页面结构变化）从讨论的评论总数推算
+_COUNT_PATTERN = r'''["']?CountComments["']?\s*:\s*["']?(\d+)'''
+_RE_PAGER_BYTES = re.compile(_PAGER_PATTERN.encode(), re.IGNORECASE)
+_RE_PAGER_TEXT = re.compile(_PAGER_PATTERN, re.IGNORECASE)
+_RE_PAGE_NUM_BYTES = re.compile(_PAGE_NUM_PATTERN.encode(), re.IGNORECASE)
+_RE_PAGE_NUM_TEXT = re.compile(_PAGE_NUM_PATTERN, re.IGNORECASE)
+_RE_COUNT_BYTES = re.compile(_COUNT_PATTERN.encode())
+_RE_COUNT_TEXT = re.compile(_COUNT_PATTERN)
+
+# 评论时间：<time datetime="2025-11-28T12:34:56+00:00">
+_TIME_PATTERN = r'''<time\b[^>]*\bdatetime\s*=\s*["']([^"']+)["']'''
+_RE_TIME_BYTES = re.compile(_TIME_PATTERN.encode(), re.IGNORECASE)
+_RE_TIME_TEXT = re.compile(_TIME_PATTERN, re.IGNORECASE)
+
+
+def _iter_text(elem) -> Iterator[str]:
+    """按文档顺序遍历文本节点（跳过注释、script、style，与 BeautifulSoup.get_text 一致）"""
+    tag = elem.tag
+    if not isinstance(tag, str) or tag in _SKIP_TEXT_TAGS:
+        return
+
+    if elem.text:
+        yield elem.text
+
+    for child in elem:
+        yield from _iter_text(child)
+        if child.tail:
+            yield child.tail
+
+
+def get_text(elem, separator: str = '') -> str:
+    """等价于 BeautifulSoup 的 get_text(separator=..., strip=True)"""
+    return separator.join(s for s in (t.strip() for t in _iter_text(elem)) if s)
+
+
+def parse_html(html: Union[bytes, str]):
+    """解析 HTML，返回根节点"""
+    parser = _BYTES_PARSER if isinstance(html, bytes) else _TEXT_PARSER
+    return etree.fromstring(html, parser)
+
+
+def is_page_not_found(root) -> bool:
+    """是否是 "Page not found" 页面"""
+    if _XP_NOT_FOUND_H1(root):
+        return True
+
+    message = _XP_MESSAGE_DIV(root)
+    return bool(message) and 'could not be found' in get_text(message[0])
+
+
+def _contains_any(data: Union[bytes, str], value: str) -> bool:
+    """原始内容中是否出现 value（也检查 HTML 转义后的形式）"""
+    needles = {value, html_lib.escape(value)}
+    if isinstance(data, bytes):
+        return any(n.encode('utf-8') in data for n in needles)
+    return any(n in data for n in needles)
+
+
+def prescan(html: Union[bytes, str], target_user: str, required_image_url: str) -> Dict:
+    """对原始内容做预扫描（不构建 DOM）
+
+    Returns:
+        {'total': 评论数, 'has_user': 是否出现目标用户名, 'has_image': 是否出现指定图片}
+    """
+    pattern = _RE_ITEMS_BYTES if isinstance(html, bytes) else _RE_ITEMS_TEXT
+    return {
+        'total': len(pattern.findall(html)),
+        'has_user': _contains_any(html, target_user),
+        'has_image': _contains_any(html, required_image_url),
+    }
+
+
+def _pager_contents(html: Union[bytes, str]) -> Iterator[Union[bytes, str]]:
+    """#PagerBefore / #PagerAfter 元素的内部 HTML（不限标签名）"""
+    is_bytes = isinstance(html, bytes)
+    pager_re = _RE_PAGER_BYTES if is_bytes else _RE_PAGER_TEXT
+
+    for match in pager_re.finditer(html):
+        # 同名的开始 / 结束标签，深度回到 0 时就是分页元素的结束标签
+        tag_pattern = r'<(/?)' + re.escape(match.group(1).decode() if is_bytes else match.group(1)) + r'\b[^>]*>'
+        tag_re = re.compile(tag_pattern.encode() if is_bytes else tag_pattern, re.IGNORECASE)
+        depth = 1
+        for tag_match in tag_re.finditer(html, match.end()):
+            depth += -1 if tag_match.group(1) else 1
+            if depth == 0:
+                yield html[match.end():tag_match.start()]
+                break
+
+
+def extract_last_page(html: Union[bytes, str]) -> Optional[int]:
+    """从分页读取帖子的最后一页（不构建 DOM），找不到分页和评论总数时返回 None"""
+    is_bytes = isinstance(html, bytes)
+    number_re = _RE_PAGE_NUM_BYTES if is_bytes else _RE_PAGE_NUM_TEXT
+
+    pages = [
+        int(href or text)
+        for pager in _pager_contents(html)
+        for href, text in number_re.findall(pager)
+    ]
+    if pages:
+        return max(pages)
+
+    count_re = _RE_COUNT_BYTES if is_bytes else _RE_COUNT_TEXT
+    match = count_re.search(html)
+    if match:
+        return max(1, -(-int(match.group(1)) // COMMENTS_PER_PAGE))
+    return None
+
+
+def parse_comment_time(value: Union[bytes, str, None]) -> Optional[float]:
+    """评论时间（ISO 8601）转为时间戳，无法识别时返回 None"""
+    if not value:
+        return None
+    if isinstance(value, bytes):
+        value = value.decode('ascii', 'ignore')
+    try:
+        return datetime.fromisoformat(value.strip().replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def extract_comment_times(html: Union[bytes, str]) -> List[float]:
+    """页面中所有评论的发布时间（不构建 DOM，按时间排序）
+
+    只取每条评论（li.ItemComment）中的第一个 <time>，与 EXTRACT_COMMENTS_JS 一致，
+    侧栏（In this Discussion 等）中的时间不计入
+    """
+    is_bytes = isinstance(html, bytes)
+    item_re = _RE_ITEMS_BYTES if is_bytes else _RE_ITEMS_TEXT
+    time_re = _RE_TIME_BYTES if is_bytes else _RE_TIME_TEXT
+
+    starts = [match.start() for match in item_re.finditer(html)]
+    times = []
+    for start, end in zip(starts, starts[1:] + [len(html)]):
+        match = time_re.search(html, start, end)
+        timestamp = parse_comment_time(match.group(1)) if match else None
+        if timestamp is not None:
+            times.append(timestamp)
+    return sorted(times)
+
+
+def extract_links(message_elem) -> List[str]:
+    """提取评论中的链接（相对链接补全为绝对链接）"""
+    links = []
+    for a_tag in _XP_LINKS(message_elem):
+        href = a_tag.get('href', '')
+        if href and not href.startswith('#') and not href.startswith('javascript:'):
+            if href.startswith('/'):
+                href = f"https://lowendtalk.com{href}"
+            links.append(href)
+    return links
+
+
+def build_comment(
+    comment_id: str,
+    author: str,
+    timestamp: str,
+    content: str,
+    links: List[str],
+    page_num: int,
+    page_url: str
+) -> Dict:
+    """生成评论结构（链接附加在内容末尾）"""
+    if links:
+        content += '\n\n📎 链接:\n' + '\n'.join(f'- {link}' for link in links)
+
+    return {
+        'comment_id': comment_id,
+        'author': author,
+        'timestamp': timestamp,
+        'content': content,
+        'links': links,
+        'link': f"{page_url}#{comment_id}",
+        'page': page_num
+    }
+
+
+def extract_comments(
+    html: Union[bytes, str],
+    page_num: int,
+    page_url: str,
+    target_user: Optional[str] = None,
+    required_image_url: Optional[str] = None,
+    filter_blockquote: Optional[bool] = None,
+    use_prescan: bool = True
+) -> Optional[Dict]:
+    """解析页面中目标用户的评论
+
+    Args:
+        html: 页面 HTML（bytes 或 str）
+        page_num: 页码
+        page_url: 页面 URL（用于生成评论链接）
+        target_user: 目标用户，默认 Config.TARGET_USER
+        required_image_url: 评论必须包含的图片，默认 Config.REQUIRED_IMAGE_URL
+        filter_blockquote: 是否过滤包含引用的评论，默认 Config.FILTER_BLOCKQUOTE
+        use_prescan: 是否先做预扫描，目标用户或指定图片不在页面上时跳过 DOM 解析
+
+    Returns:
+        {'comments': [...], 'total': 总评论数, 'last_page': 分页中的最后一页,
+         'comment_times': 所有评论的发布时间}；页面不存在时返回 None
+    """
+    target_user = target_user or Config.TARGET_USER
+    required_image_url = required_image_url or Config.REQUIRED_IMAGE_URL
+    if filter_blockquote is None:
+        filter_blockquote = Config.FILTER_BLOCKQUOTE
+
+    try:
+        # 页面有评论但不含目标用户或指定图片：只需要评论数，不必解析
+        # （没有评论时仍完整解析，用于识别 "Page not found" 页面）
+        if use_prescan:
+            scan = prescan(html, target_user, required_image_url)
+            if scan['total'] and not (scan['has_user'] and scan['has_image']):
+                logger.info(f"📊 找到 {scan['total']} 条评论（预扫描无 {target_user} 的候选评论，跳过解析）")
+                return {'comments': [], 'total': scan['total'], 'last_page': extract_last_page(html),
+                        'comment_times': extract_comment_times(html)}
+
+        root = parse_html(html)
+        if root is None:
+            return {'comments': [], 'total': 0}
+
+        if is_page_not_found(root):
+            return None
+
+        comments = []
+        comment_items = _XP_ITEMS(root)
+        total_comments = len(comment_items)
+
+        logger.info(f"📊 找到 {total_comments} 条评论")
+
+        for item in comment_items:
+            try:
+                author_elems = _XP_USERNAME(item)
+                if not author_elems:
+                    continue
+
+                author = get_text(author_elems[0])
+                if author != target_user:
+                    continue
+
+                comment_id = item.get('id', '')
+
+                time_elems = _XP_TIME(item)
+                timestamp = time_elems[0].get('datetime', '') if time_elems else ''
+                time_text = time_elems[0].get('title', '') if time_elems else ''
+
+                message_elems = _XP_MESSAGE(item)
+                if message_elems:
+                    message_elem = message_elems[0]
+
+                    # ===== 筛选条件检查 =====
+                    if not _XP_IMAGE(message_elem, src=required_image_url):
+                        logger.debug(f"跳过评论 {comment_id}: 不包含指定图片")
+                        continue
+
+                    if filter_blockquote and _XP_BLOCKQUOTE(message_elem):
+                        logger.debug(f"跳过评论 {comment_id}: 包含引用(blockquote)")
+                        continue
+
+                    logger.info(f"✅ 评论 {comment_id} 通过筛选")
+
+                    content = get_text(message_elem, separator='\n')
+                    links = extract_links(message_elem)
+                else:
+                    content = ''
+                    links = []
+
+                comments.append(build_comment(
+                    comment_id, author, time_text or timestamp, content, links, page_num, page_url
+                ))
+                logger.info(f"🎯 发现 {target_user} 的评论: {comment_id}")
+
+            except Exception as e:
+                logger.error(f"解析单条评论失败: {e}")
+                continue
+
+        return {
+            'comments': comments,
+            'total': total_comments,
+            'last_page': extract_last_page(html),
+            'comment_times': extract_comment_times(html)
+        }
+
+    except Exception as e:
+        logger.error(f"❌ 解析评论失败: {e}")
+        return {'comments': [], 'total': 0}
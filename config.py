@@ -22,6 +22,18 @@ class Config:
     CHECK_INTERVAL = int(os.getenv('CHECK_INTERVAL', '60'))  # 秒
     TARGET_USER = os.getenv('TARGET_USER', 'FAT32')
     
+    # 跳页和补查（落后时按分页直接跳到最后一页）
+    PAGE_JUMP = os.getenv('PAGE_JUMP', 'true').lower() == 'true'
+    PAGE_JUMP_MIN_GAP = int(os.getenv('PAGE_JUMP_MIN_GAP', '2'))  # 最后一页比当前页多出几页以上才跳
+    BACKFILL_SKIPPED = os.getenv('BACKFILL_SKIPPED', 'true').lower() == 'true'  # 是否补查跳过的页面
+    BACKFILL_PER_CYCLE = int(os.getenv('BACKFILL_PER_CYCLE', '1'))  # 每个轮询周期补查的页数
+    
+    # 批量补查（monitor_curlcffi.py --backfill START:END）
+    BACKFILL_WORKERS = int(os.getenv('BACKFILL_WORKERS', '8'))  # 抓取线程数（每个线程一个会话，不超过出口地址数）
+    BACKFILL_RATE = float(os.getenv('BACKFILL_RATE', '2'))  # 对站点的总请求速率（次/秒）
+    BACKFILL_BURST = int(os.getenv('BACKFILL_BURST', '4'))  # 总请求的突发数
+    BACKFILL_PARSE_PROCESSES = int(os.getenv('BACKFILL_PARSE_PROCESSES', '2'))  # 解析进程数，0 表示在抓取线程中解析
+    
     # 线程 URL
     THREAD_BASE_URL = os.getenv(
         'THREAD_BASE_URL',
@@ -48,6 +60,76 @@ class Config:
     WAIT_MIN = int(os.getenv('WAIT_MIN', '30'))  # 最小等待时间
     WAIT_MAX = int(os.getenv('WAIT_MAX', '120'))  # 最大等待时间
     
+    # 自适应轮询间隔（按发帖速度和目标用户的历史活跃时段调整）
+    POLL_SCHEDULER = os.getenv('POLL_SCHEDULER', 'adaptive').lower()  # adaptive / fixed（CHECK_INTERVAL、WAIT_MIN-WAIT_MAX）
+    POLL_MIN = int(os.getenv('POLL_MIN', '20'))  # 最短等待时间（秒），高峰期也不会更快
+    POLL_MAX = int(os.getenv('POLL_MAX', '300'))  # 最长等待时间（秒）
+    POLL_COMMENTS = float(os.getenv('POLL_COMMENTS', '2'))  # 两次检查之间期望出现的新评论数
+    POLL_JITTER = float(os.getenv('POLL_JITTER', '0.2'))  # 等待时间的随机抖动比例
+
+    # 分级抓取配置（curl_cffi 优先，遇到 CF 挑战再升级到浏览器）
+    TIER_BROWSER = os.getenv('TIER_BROWSER', 'playwright').lower()  # 升级使用的浏览器：playwright / uc
+    TIER_BROWSER_IDLE_TIMEOUT = int(os.getenv('TIER_BROWSER_IDLE_TIMEOUT', '600'))  # 浏览器空闲多久后关闭（秒，0 表示不关闭）
+
+    # Cookie 共享配置（浏览器通过挑战后导出给 curl_cffi 使用）
+    COOKIE_JAR_FILE = os.getenv('COOKIE_JAR_FILE', 'cf_cookies.json')
+    COOKIE_JAR_MAX_AGE = int(os.getenv('COOKIE_JAR_MAX_AGE', '86400'))  # 会话 cookie 最长保留时间（秒）
+    IMPERSONATE_MAX_DRIFT = int(os.getenv('IMPERSONATE_MAX_DRIFT', '4'))  # 浏览器与 curl_cffi 模拟目标最多相差的主版本数
+
+    # 异步多目标监控配置（monitor_async.py）
+    WATCH_TARGETS_FILE = os.getenv('WATCH_TARGETS_FILE', 'watch_targets.json')  # 监控目标列表
+    ASYNC_MAX_CONCURRENCY = int(os.getenv('ASYNC_MAX_CONCURRENCY', '8'))  # 同时进行的请求数上限
+    HOST_RATE = float(os.getenv('HOST_RATE', '0.5'))  # 每个主机每秒请求数
+    HOST_BURST = int(os.getenv('HOST_BURST', '2'))  # 每个主机允许的突发请求数
+    SEEN_CACHE_SIZE = int(os.getenv('SEEN_CACHE_SIZE', '1000'))  # 每个目标在内存中保留的已通知评论数
+
+    # 状态持久化配置（已通知评论 + 监控进度）
+    STATE_DB = os.getenv('STATE_DB', 'monitor_state.db')  # SQLite 数据库文件
+
+    # Telegram 发送队列配置（后台线程发送，不阻塞页面轮询）
+    TELEGRAM_QUEUE = os.getenv('TELEGRAM_QUEUE', 'true').lower() == 'true'  # false 时在抓取线程中同步发送
+    TELEGRAM_QUEUE_SIZE = int(os.getenv('TELEGRAM_QUEUE_SIZE', '100'))  # 队列容量
+    TELEGRAM_BATCH_WINDOW = float(os.getenv('TELEGRAM_BATCH_WINDOW', '2'))  # 合并窗口（秒），窗口内的评论合并成一条消息
+    TELEGRAM_MAX_RETRIES = int(os.getenv('TELEGRAM_MAX_RETRIES', '5'))  # 单条消息最大重试次数
+
+    # 浏览器回收配置
+    RECYCLE_MODE = os.getenv('RECYCLE_MODE', 'memory').lower()  # memory：按内存/渲染进程数回收；pages：每 RESTART_INTERVAL 页重启
+    BROWSER_MAX_RSS_MB = int(os.getenv('BROWSER_MAX_RSS_MB', '600'))  # 浏览器进程树内存上限（MB）
+    BROWSER_MAX_RENDERERS = int(os.getenv('BROWSER_MAX_RENDERERS', '4'))  # 渲染进程数上限
+    WARM_STANDBY = os.getenv('WARM_STANDBY', 'false').lower() == 'true'  # 回收时先预热新浏览器再切换（短时间内存占用翻倍）
+
+    # Playwright 资源拦截配置（始终放行 Cloudflare 挑战和站点自身的 HTML / JS）
+    BLOCK_RESOURCES = os.getenv('BLOCK_RESOURCES', 'true').lower() == 'true'  # 挑战通过率下降时可关闭
+    BLOCK_RESOURCE_TYPES = [t.strip() for t in os.getenv('BLOCK_RESOURCE_TYPES', 'image,media,font').split(',') if t.strip()]
+    RESOURCE_ALLOW_HOSTS = [h.strip().lower() for h in os.getenv('RESOURCE_ALLOW_HOSTS', '').split(',') if h.strip()]  # 额外放行的第三方主机
+
+    # 持久化浏览器配置目录（重启后保留 cookie、缓存）
+    BROWSER_PROFILE_DIR = os.getenv('BROWSER_PROFILE_DIR', '')  # 为空时每次使用全新配置；可放在 tmpfs（/dev/shm）上
+    BROWSER_PROFILE_MAX_MB = int(os.getenv('BROWSER_PROFILE_MAX_MB', '200'))  # 单个配置目录大小上限（超过时清理缓存）
+
+    # IPv6 出口地址配置
+    IPV6_BIND_MODE = os.getenv('IPV6_BIND_MODE', 'route').lower()  # route：ipv6_rotate.py 改写系统默认路由；bind：进程内按请求绑定源地址
+    IPV6_POOL = [a.strip() for a in os.getenv('IPV6_POOL', '').split(',') if a.strip()]  # 固定的地址池，为空时自动发现网卡上的地址
+
+    # IPv6 地址池自动发现（为空时自动检测）
+    IPV6_PREFIX = os.getenv('IPV6_PREFIX', '')  # 可轮换的网段，如 2a0e:6a80:3:38d::/64；为空时使用 SSH 主地址所在网段
+    IPV6_MAIN_IP = os.getenv('IPV6_MAIN_IP', '')  # SSH 主地址（不参与轮换）；为空时取 SSH_CONNECTION 或网段的 :: 地址
+    IPV6_INTERFACE = os.getenv('IPV6_INTERFACE', '')  # 网卡；为空时使用 IPv6 默认路由的网卡
+    IPV6_INVENTORY_FILE = os.getenv('IPV6_INVENTORY_FILE', '.ipv6_inventory.json')  # 发现结果缓存（网卡地址变化时自动更新）
+
+    IPV6_SELECTION = os.getenv('IPV6_SELECTION', 'health').lower()  # health：按挑战率、延迟和冷却时间选择；random：随机
+    IPV6_COOLDOWN = int(os.getenv('IPV6_COOLDOWN', '600'))  # 地址被挑战后的冷却时间（秒）
+    IPV6_STATS_HALF_LIFE = float(os.getenv('IPV6_STATS_HALF_LIFE', '6'))  # 地址统计的半衰期（小时）
+
+    # curl_cffi 会话池（追赶积压页面时每个出口地址一个会话并行抓取）
+    SESSION_POOL_SIZE = int(os.getenv('SESSION_POOL_SIZE', '4'))  # 会话数上限（受可绑定的 IPv6 地址数限制），小于 2 时不启用
+    SESSION_POOL_STRATEGY = os.getenv('SESSION_POOL_STRATEGY', 'least_challenged').lower()  # least_challenged / round_robin
+    SESSION_RATE = float(os.getenv('SESSION_RATE', '0.2'))  # 每个会话每秒请求数
+    SESSION_BURST = int(os.getenv('SESSION_BURST', '2'))  # 每个会话允许的突发请求数
+
+    # chromedriver 缓存（undetected-chromedriver 版本）
+    CHROMEDRIVER_CACHE_DIR = os.getenv('CHROMEDRIVER_CACHE_DIR', '.chromedriver_cache')  # 为空时每次启动都由 uc 检测版本并修补
+
     # 日志配置
     LOG_FILE = 'monitor.log'
     
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Cloudflare Cookie 共享存储
+浏览器通过挑战后导出 cf_clearance 等 cookie 和对应 User-Agent，
+curl_cffi 会话加载后即可复用，无需再次启动浏览器；
+cf_clearance 与浏览器指纹绑定，curl_cffi 会话改为模拟与浏览器主版本最接近的 chromeNNN，
+相差超过 IMPERSONATE_MAX_DRIFT 个版本时不共享
+"""
+
+import os
+import re
+import json
+import time
+import logging
+from functools import lru_cache
+from typing import List, Dict, Optional, Sequence
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# curl_cffi 会话默认模拟的浏览器（TLS/HTTP2 指纹），应用共享 cookie 时换成与浏览器版本对应的目标
+IMPERSONATE = 'chrome120'
+
+# 读不到 curl_cffi 的 BrowserType 时使用的 Chrome 模拟目标（主版本）
+CHROME_TARGETS = (99, 100, 101, 104, 107, 110, 116, 119, 120, 123, 124, 131)
+
+
+def major_version(value: Optional[str]) -> Optional[int]:
+    """从 User-Agent（.../Chrome/120.0...）、版本号（120.0.6099.109）或模拟目标（chrome120）中取主版本"""
+    if not value:
+        return None
+    match = re.search(r'(?:Chrome/|chrome|^)(\d+)', value)
+    return int(match.group(1)) if match else None
+
+
+@lru_cache(maxsize=1)
+def impersonate_targets() -> List[int]:
+    """已安装的 curl_cffi 支持的 Chrome 模拟目标（主版本，升序）"""
+    try:
+        from curl_cffi.requests import BrowserType
+    except ImportError:
+        return list(CHROME_TARGETS)
+
+    majors = set()
+    for browser in BrowserType:
+        match = re.fullmatch(r'chrome(\d+)', browser.value)
+        if match:
+            majors.add(int(match.group(1)))
+    return sorted(majors) or list(CHROME_TARGETS)
+
+
+def impersonate_for(browser_major: Optional[int], targets: Optional[Sequence[int]] = None) -> Optional[str]:
+    """与浏览器主版本最接近的 chromeNNN 模拟目标（相同距离时取较新的）
+
+    Returns:
+        模拟目标，浏览器版本未知或最接近的目标相差超过 IMPERSONATE_MAX_DRIFT 时返回 None
+    """
+    targets = impersonate_targets() if targets is None else targets
+    if browser_major is None or not targets:
+        return None
+
+    nearest = min(targets, key=lambda major: (abs(major - browser_major), -major))
+    if abs(nearest - browser_major) > Config.IMPERSONATE_MAX_DRIFT:
+        return None
+    return f'chrome{nearest}'
+
+
+class SharedCookieJar:
+    """磁盘持久化的 cookie 共享存储（带过期跟踪）"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or Config.COOKIE_JAR_FILE
+        self.cookies: List[Dict] = []
+        self.user_agent: Optional[str] = None
+        self.browser_major: Optional[int] = None  # 导出 cookie 的浏览器主版本
+        self.saved_at = 0.0
+        self._loaded_mtime = None
+
+    @staticmethod
+    def normalize_playwright_cookies(cookies: List[Dict]) -> List[Dict]:
+        """转换 Playwright context.cookies() 的格式"""
+        result = []
+        for c in cookies:
+            expires = c.get('expires')
+            result.append({
+                'name': c['name'],
+                'value': c['value'],
+                'domain': c.get('domain', ''),
+                'path': c.get('path', '/'),
+                'secure': bool(c.get('secure', False)),
+                # Playwright 用 -1 表示会话 cookie
+                'expires': expires if expires and expires > 0 else None,
+            })
+        return result
+
+    @staticmethod
+    def normalize_selenium_cookies(cookies: List[Dict]) -> List[Dict]:
+        """转换 Selenium driver.get_cookies() 的格式"""
+        result = []
+        for c in cookies:
+            result.append({
+                'name': c['name'],
+                'value': c['value'],
+                'domain': c.get('domain', ''),
+                'path': c.get('path', '/'),
+                'secure': bool(c.get('secure', False)),
+                'expires': c.get('expiry'),
+            })
+        return result
+
+    def is_expired(self, cookie: Dict, now: Optional[float] = None) -> bool:
+        """判断 cookie 是否已过期（会话 cookie 按 COOKIE_JAR_MAX_AGE 计算）"""
+        now = now or time.time()
+        expires = cookie.get('expires')
+        if expires is None:
+            expires = self.saved_at + Config.COOKIE_JAR_MAX_AGE
+        return expires <= now
+
+    def valid_cookies(self) -> List[Dict]:
+        """返回未过期的 cookie"""
+        now = time.time()
+        return [c for c in self.cookies if not self.is_expired(c, now)]
+
+    def has_clearance(self) -> bool:
+        """是否持有有效的 cf_clearance"""
+        return any(c['name'] == 'cf_clearance' for c in self.valid_cookies())
+
+    def save(self, cookies: List[Dict], user_agent: Optional[str], browser_version: Optional[str] = None):
+        """保存 cookie、User-Agent 和浏览器主版本到磁盘（原子写入）
+
+        Args:
+            browser_version: 浏览器实际的版本（User-Agent 可能被改写），为 None 时从 User-Agent 中读取
+        """
+        self.cookies = cookies
+        self.user_agent = user_agent
+        self.browser_major = major_version(browser_version) or major_version(user_agent)
+        self.saved_at = time.time()
+
+        data = {
+            'user_agent': self.user_agent,
+            'browser_major': self.browser_major,
+            'saved_at': self.saved_at,
+            'cookies': self.cookies,
+        }
+
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+            self._loaded_mtime = os.path.getmtime(self.path)
+            logger.info(f"🍪 已导出 {len(cookies)} 个 cookie 到 {self.path}"
+                        f"（cf_clearance: {'有' if self.has_clearance() else '无'}）")
+        except Exception as e:
+            logger.error(f"❌ 保存 cookie 失败: {e}")
+
+    def load(self) -> bool:
+        """从磁盘加载 cookie（文件未变化时跳过）
+
+        Returns:
+            bool: 是否读取到了新的内容
+        """
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+
+        if mtime == self._loaded_mtime:
+            return False
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️  读取 cookie 文件失败: {e}")
+            return False
+
+        self._loaded_mtime = mtime
+        self.user_agent = data.get('user_agent')
+        # 旧文件没有 browser_major
+        self.browser_major = data.get('browser_major') or major_version(self.user_agent)
+        self.saved_at = data.get('saved_at', 0.0)
+        self.cookies = data.get('cookies', [])
+
+        valid = self.valid_cookies()
+        logger.info(f"🍪 已加载 {len(valid)}/{len(self.cookies)} 个有效 cookie"
+                    f"（cf_clearance: {'有' if self.has_clearance() else '无'}）")
+        return True
+
+    def impersonate(self) -> Optional[str]:
+        """导出 cookie 的浏览器对应的 curl_cffi 模拟目标（没有足够接近的目标时返回 None）"""
+        return impersonate_for(self.browser_major)
+
+    def apply_to_session(self, session, impersonate: str = IMPERSONATE) -> bool:
+        """将有效 cookie 和 User-Agent 写入 curl_cffi 会话
+
+        会话的模拟目标必须是 impersonate() 的结果（调用方先按它重建会话），否则跳过：
+        UA 和 TLS 指纹对不上，Cloudflare 会把请求判为机器人，cf_clearance 也不会被接受
+
+        Returns:
+            bool: 是否应用了 cf_clearance
+        """
+        valid = self.valid_cookies()
+        if not valid:
+            return False
+
+        target = self.impersonate()
+        if target != impersonate:
+            if target is None:
+                logger.info(f"🍪 curl_cffi 没有与浏览器版本（Chrome {self.browser_major or '未知'}）"
+                            f"足够接近的模拟目标，不使用导出的 cookie")
+            else:
+                logger.info(f"🍪 会话模拟的 {impersonate} 与浏览器对应的 {target} 不一致，不使用导出的 cookie")
+            return False
+
+        for c in valid:
+            session.cookies.set(
+                c['name'],
+                c['value'],
+                domain=c.get('domain', ''),
+                path=c.get('path', '/'),
+                secure=c.get('secure', False)
+            )
+
+        # cf_clearance 与 User-Agent 绑定，必须使用浏览器的 UA
+        if self.user_agent:
+            session.headers['User-Agent'] = self.user_agent
+
+        return self.has_clearance()
@@ -126,7 +126,10 @@ def example_custom_filter():
 # ============================================================
 
 def example_batch_check():
-    """批量检查多个页面"""
+    """批量检查多个页面
+    
+    大范围扫描请使用 python monitor_curlcffi.py --backfill 241:245（并行抓取、可中断后继续）
+    """
     from monitor import LETMonitor
     
     monitor = LETMonitor()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+IPv6 出口地址健康度
+按源地址记录请求结果（成功 / Cloudflare 挑战 / 错误）、成功请求的延迟和最近使用时间，
+保存在 STATE_DB 的 address_stats 表中（多个进程共用，ipv6_rotate.py 子进程也能读取）。
+轮换时代替 random.choice：
+- 最近 IPV6_COOLDOWN 秒内被挑战过的地址先冷却，不参与选择（全部在冷却时选最早解除的）
+- 其余地址按 Beta(成功 + 1, 挑战 + 1) 采样（Thompson sampling），再按平均延迟折算，取最高分
+- 计数按 IPV6_STATS_HALF_LIFE 指数衰减，很久没用的地址会回到先验，重新获得尝试机会
+"""
+
+import time
+import random
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# 请求结果
+OK = 'ok'
+CHALLENGE = 'challenge'
+ERROR = 'error'
+
+# 延迟折算：平均延迟为该值时得分减半（秒）
+LATENCY_SCALE = 10.0
+
+# 延迟的指数移动平均系数
+LATENCY_ALPHA = 0.3
+
+
+class AddressHealth:
+    """出口地址统计
+
+    Args:
+        path: SQLite 数据库文件，默认 STATE_DB
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or Config.STATE_DB
+        self.half_life = Config.IPV6_STATS_HALF_LIFE * 3600
+        self.cooldown = Config.IPV6_COOLDOWN
+        self.lock = threading.Lock()
+
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=10)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS address_stats (
+                address TEXT PRIMARY KEY,
+                successes REAL NOT NULL DEFAULT 0,
+                challenges REAL NOT NULL DEFAULT 0,
+                errors REAL NOT NULL DEFAULT 0,
+                latency REAL,
+                last_used REAL,
+                last_challenge REAL,
+                updated_at REAL
+            ) WITHOUT ROWID
+        ''')
+
+    def _decay(self, updated_at: Optional[float], now: float) -> float:
+        """距上次更新经过的时间对应的衰减系数"""
+        if not updated_at or self.half_life <= 0:
+            return 1.0
+        return 0.5 ** (max(now - updated_at, 0) / self.half_life)
+
+    def record(self, address: Optional[str], outcome: str, latency: Optional[float] = None):
+        """记录一次请求结果
+
+        Args:
+            address: 出口地址（未知时忽略）
+            outcome: OK / CHALLENGE / ERROR
+            latency: 成功请求的耗时（秒）
+        """
+        if not address:
+            return
+
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT successes, challenges, errors, latency, last_challenge, updated_at '
+                'FROM address_stats WHERE address = ?', (address,)
+            ).fetchone()
+            successes, challenges, errors, avg_latency, last_challenge, updated_at = row or (0, 0, 0, None, None, None)
+
+            factor = self._decay(updated_at, now)
+            successes *= factor
+            challenges *= factor
+            errors *= factor
+
+            if outcome == OK:
+                successes += 1
+                if latency is not None:
+                    avg_latency = latency if avg_latency is None else (
+                        LATENCY_ALPHA * latency + (1 - LATENCY_ALPHA) * avg_latency
+                    )
+            elif outcome == CHALLENGE:
+                challenges += 1
+                last_challenge = now
+            else:
+                errors += 1
+
+            self.conn.execute(
+                'INSERT OR REPLACE INTO address_stats '
+                '(address, successes, challenges, errors, latency, last_used, last_challenge, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (address, successes, challenges, errors, avg_latency, now, last_challenge, now)
+            )
+
+    def stats(self, addresses: List[str]) -> Dict[str, Dict]:
+        """读取地址统计（计数已按时间衰减，没有记录的地址返回空统计）"""
+        now = time.time()
+        result = {a: {'successes': 0.0, 'challenges': 0.0, 'errors': 0.0, 'latency': None,
+                      'last_used': None, 'last_challenge': None} for a in addresses}
+        if not addresses:
+            return result
+
+        placeholders = ','.join('?' * len(addresses))
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT address, successes, challenges, errors, latency, last_used, last_challenge, updated_at '
+                f'FROM address_stats WHERE address IN ({placeholders})', addresses
+            ).fetchall()
+
+        for address, successes, challenges, errors, latency, last_used, last_challenge, updated_at in rows:
+            factor = self._decay(updated_at, now)
+            result[address] = {
+                'successes': successes * factor,
+                'challenges': challenges * factor,
+                'errors': errors * factor,
+                'latency': latency,
+                'last_used': last_used,
+                'last_challenge': last_challenge,
+            }
+        return result
+
+    def choose(self, candidates: List[str]) -> Optional[str]:
+        """从候选地址中选择一个（IPV6_SELECTION=random 时等概率随机）"""
+        if not candidates:
+            return None
+
+        if Config.IPV6_SELECTION == 'random':
+            return random.choice(candidates)
+
+        now = time.time()
+        stats = self.stats(candidates)
+
+        # 冷却中的地址不参与选择；全部在冷却时选最早解除冷却的
+        ready = [a for a in candidates
+                 if not stats[a]['last_challenge'] or now - stats[a]['last_challenge'] >= self.cooldown]
+        if not ready:
+            address = min(candidates, key=lambda a: stats[a]['last_challenge'])
+            logger.info(f"🧊 所有地址都在冷却中，选择最早解除冷却的 {address}")
+            return address
+
+        def score(address: str) -> float:
+            s = stats[address]
+            sample = random.betavariate(s['successes'] + 1, s['challenges'] + 1)
+            latency = s['latency'] or 0.0
+            return sample / (1 + latency / LATENCY_SCALE)
+
+        address = max(ready, key=score)
+        s = stats[address]
+        total = s['successes'] + s['challenges']
+        rate = f"{s['challenges'] / total:.0%}" if total >= 1 else '无记录'
+        latency = f"{s['latency']:.1f}s" if s['latency'] is not None else '无记录'
+        logger.info(f"🎯 选择出口 {address}（挑战率 {rate}，平均延迟 {latency}，"
+                    f"{len(candidates) - len(ready)} 个地址冷却中）")
+        return address
+
+    def close(self):
+        """关闭数据库"""
+        with self.lock:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
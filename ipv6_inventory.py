@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+IPv6 地址池自动发现
+不再需要把 setup_ipv6_pool.sh 生成的地址手动粘贴到 ipv6_rotate.py：
+- 通过 ip -j 读取网卡上的全局 IPv6 地址、默认网关和网卡（没有 ip 命令时直接解析 /proc/net）
+- 只保留 IPV6_PREFIX 网段内的地址（为空时使用 SSH 主地址所在网段），排除 SSH 主地址、
+  临时（隐私扩展）地址和未完成 DAD / 已废弃的地址
+- 结果缓存到 IPV6_INVENTORY_FILE，用 /proc/net/if_inet6 和默认路由的内容做指纹，
+  指纹不变时直接使用缓存（轮换路径上只读两个 /proc 文件，不启动子进程）；
+  setup_ipv6_pool.sh 添加地址后指纹变化，下次读取时自动重新发现
+"""
+
+import os
+import json
+import time
+import hashlib
+import ipaddress
+import logging
+import subprocess
+from typing import Dict, List, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+PROC_IF_INET6 = '/proc/net/if_inet6'
+PROC_IPV6_ROUTE = '/proc/net/ipv6_route'
+
+# 读不到 /proc 时（非 Linux）缓存的有效时间（秒）
+FALLBACK_TTL = 300
+
+# /proc/net/if_inet6 中的地址标志（IFA_F_*）
+IFA_F_TEMPORARY = 0x01
+IFA_F_DADFAILED = 0x08
+IFA_F_DEPRECATED = 0x20
+IFA_F_TENTATIVE = 0x40
+
+_UNUSABLE_FLAGS = IFA_F_TEMPORARY | IFA_F_DADFAILED | IFA_F_DEPRECATED | IFA_F_TENTATIVE
+
+_cache: Optional[Dict] = None
+_cache_checked = 0.0
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path, 'r', encoding='ascii') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _default_routes(text: str) -> List[List[str]]:
+    """/proc/net/ipv6_route 中的默认路由（::/0）"""
+    routes = []
+    for line in text.splitlines():
+        fields = line.split()
+        if len(fields) >= 10 and fields[0] == '0' * 32 and fields[1] == '00':
+            routes.append(fields)
+    return routes
+
+
+def _hex_to_address(value: str) -> str:
+    return str(ipaddress.IPv6Address(bytes.fromhex(value)))
+
+
+def fingerprint() -> Optional[str]:
+    """网卡地址和默认路由的指纹（读不到 /proc 时返回 None）"""
+    addresses = _read(PROC_IF_INET6)
+    routes = _read(PROC_IPV6_ROUTE)
+    if addresses is None or routes is None:
+        return None
+
+    digest = hashlib.sha1()
+    digest.update(addresses.encode())
+    # 只取默认路由的下一跳、度量和网卡（引用计数和使用次数一直在变）
+    for fields in _default_routes(routes):
+        digest.update(f"{fields[4]} {fields[5]} {fields[9]}\n".encode())
+    # 配置变化也需要重新发现
+    digest.update(f"{Config.IPV6_PREFIX}|{Config.IPV6_MAIN_IP}|{Config.IPV6_INTERFACE}".encode())
+    return digest.hexdigest()
+
+
+def _ip_json(*args: str) -> Optional[List[Dict]]:
+    """运行 ip -j -6 ... 并解析 JSON 输出（失败时返回 None）"""
+    try:
+        result = subprocess.run(
+            ['ip', '-j', '-6', *args],
+            capture_output=True,
+            text=True,
+            timeout=10,
+            check=True
+        )
+        return json.loads(result.stdout or '[]')
+    except (OSError, subprocess.SubprocessError, ValueError) as e:
+        logger.debug(f"ip -j -6 {' '.join(args)} 失败: {e}")
+        return None
+
+
+def _addresses_from_ip() -> Optional[List[Dict]]:
+    """ip -j -6 addr：全局地址列表"""
+    links = _ip_json('addr', 'show', 'scope', 'global')
+    if links is None:
+        return None
+
+    entries = []
+    for link in links:
+        for info in link.get('addr_info', []):
+            if info.get('family') != 'inet6' or info.get('scope') != 'global':
+                continue
+            usable = not (
+                info.get('temporary') or info.get('tentative') or info.get('dadfailed')
+                or info.get('deprecated') or info.get('preferred_life_time') == 0
+            )
+            entries.append({
+                'address': info['local'],
+                'prefixlen': info.get('prefixlen', 128),
+                'interface': link.get('ifname'),
+                'usable': usable,
+            })
+    return entries
+
+
+def _addresses_from_proc() -> List[Dict]:
+    """/proc/net/if_inet6：全局地址列表"""
+    entries = []
+    for line in (_read(PROC_IF_INET6) or '').splitlines():
+        fields = line.split()
+        if len(fields) < 6 or fields[3] != '00':
+            continue
+        flags = int(fields[4], 16)
+        entries.append({
+            'address': _hex_to_address(fields[0]),
+            'prefixlen': int(fields[2], 16),
+            'interface': fields[5],
+            'usable': not flags & _UNUSABLE_FLAGS,
+        })
+    return entries
+
+
+def _default_gateway() -> Dict[str, Optional[str]]:
+    """默认网关和网卡（多条默认路由时取度量最小的）"""
+    routes = _ip_json('route', 'show', 'default')
+    if routes:
+        route = min(routes, key=lambda r: r.get('metric', 0))
+        return {'gateway': route.get('gateway'), 'interface': route.get('dev'), 'source': route.get('prefsrc')}
+
+    routes = _default_routes(_read(PROC_IPV6_ROUTE) or '')
+    routes = [r for r in routes if r[4] != '0' * 32]
+    if routes:
+        route = min(routes, key=lambda r: int(r[5], 16))
+        return {'gateway': _hex_to_address(route[4]), 'interface': route[9], 'source': None}
+
+    return {'gateway': None, 'interface': None, 'source': None}
+
+
+def default_source() -> Optional[str]:
+    """默认路由的源地址（ip -6 route 中的 src，没有指定或读取失败时返回 None）"""
+    return _default_gateway()['source']
+
+
+def _ssh_address() -> Optional[str]:
+    """当前 SSH 连接的服务器端地址（SSH_CONNECTION 的第三个字段）"""
+    fields = os.getenv('SSH_CONNECTION', '').split()
+    if len(fields) >= 3:
+        try:
+            return str(ipaddress.IPv6Address(fields[2].split('%')[0]))
+        except ValueError:
+            pass
+    return None
+
+
+def discover() -> Dict:
+    """读取网卡上的地址和默认路由，得到可轮换的地址池"""
+    entries = _addresses_from_ip()
+    if entries is None:
+        entries = _addresses_from_proc()
+
+    route = _default_gateway()
+    interface = Config.IPV6_INTERFACE or route['interface']
+    if interface:
+        entries = [e for e in entries if e['interface'] == interface]
+
+    local = {str(ipaddress.IPv6Address(e['address'])): e for e in entries}
+
+    # SSH 主地址：配置 > 当前 SSH 连接 > 网段的 :: 地址（setup_ipv6_pool.sh 的约定）
+    main_ip = str(ipaddress.IPv6Address(Config.IPV6_MAIN_IP)) if Config.IPV6_MAIN_IP else _ssh_address()
+
+    if Config.IPV6_PREFIX:
+        network = ipaddress.IPv6Network(Config.IPV6_PREFIX, strict=False)
+    elif main_ip and main_ip in local:
+        network = ipaddress.IPv6Network(f"{main_ip}/{local[main_ip]['prefixlen']}", strict=False)
+    else:
+        # 地址最多的网段
+        networks = [ipaddress.IPv6Network(f"{a}/{e['prefixlen']}", strict=False) for a, e in local.items()]
+        network = max(set(networks), key=networks.count) if networks else None
+
+    if network is not None and not main_ip and str(network.network_address) in local:
+        main_ip = str(network.network_address)
+
+    addresses = sorted(
+        (a for a, e in local.items()
+         if e['usable'] and a != main_ip and network is not None and ipaddress.IPv6Address(a) in network),
+        key=ipaddress.IPv6Address
+    )
+
+    return {
+        'addresses': addresses,
+        'main_ip': main_ip,
+        'prefix': str(network) if network is not None else None,
+        'interface': interface,
+        'gateway': route['gateway'],
+        'source': route['source'],
+        'discovered_at': time.time(),
+    }
+
+
+def _load_file(key: Optional[str]) -> Optional[Dict]:
+    if not Config.IPV6_INVENTORY_FILE or key is None:
+        return None
+    try:
+        with open(Config.IPV6_INVENTORY_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # 旧版本的缓存没有 source
+    return data if data.get('fingerprint') == key and 'source' in data else None
+
+
+def _save_file(data: Dict):
+    if not Config.IPV6_INVENTORY_FILE:
+        return
+    tmp_path = f"{Config.IPV6_INVENTORY_FILE}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, Config.IPV6_INVENTORY_FILE)
+    except OSError as e:
+        logger.warning(f"⚠️  保存 IPv6 地址缓存失败: {e}")
+
+
+def inventory(force: bool = False) -> Dict:
+    """当前的地址池（网卡地址或默认路由变化时重新发现）
+
+    Returns:
+        addresses（可轮换的地址）、main_ip、prefix、interface、gateway、source（默认路由的源地址）、fingerprint
+    """
+    global _cache, _cache_checked
+    key = fingerprint()
+
+    if not force and _cache is not None:
+        if key is not None and _cache['fingerprint'] == key:
+            return _cache
+        if key is None and time.time() - _cache_checked < FALLBACK_TTL:
+            return _cache
+
+    cached = None if force else _load_file(key)
+    if cached is not None:
+        _cache = cached
+    else:
+        previous = _cache
+        _cache = discover()
+        _cache['fingerprint'] = key
+        _save_file(_cache)
+
+        if previous is None:
+            logger.info(f"🔎 发现 {len(_cache['addresses'])} 个可轮换的 IPv6 地址"
+                        f"（{_cache['prefix']}，网卡 {_cache['interface']}，网关 {_cache['gateway']}）")
+        elif set(previous['addresses']) != set(_cache['addresses']):
+            added = len(set(_cache['addresses']) - set(previous['addresses']))
+            removed = len(set(previous['addresses']) - set(_cache['addresses']))
+            logger.info(f"🔎 IPv6 地址池变化：新增 {added} 个，移除 {removed} 个，"
+                        f"共 {len(_cache['addresses'])} 个")
+
+    _cache_checked = time.time()
+    return _cache
@@ -5,16 +5,18 @@ IPv6 地址轮换工具
 """
 
 import subprocess
-import random
 import logging
 import sys
 
+from ipv6_health import AddressHealth
+from ipv6_inventory import inventory
+
 # ===== 配置你的 IPv6 地址池 =====
+# 默认自动发现网卡上的地址、网关和网卡（见 ipv6_inventory.py，运行 --list 查看），
+# setup_ipv6_pool.sh 添加的地址会自动加入地址池，以下配置只在自动发现失败时使用
 # IPv6 地址段: 2a0e:6a80:3:38d::/64
 # 主 IP (SSH用，不轮换): 2a0e:6a80:3:38d::
 
-# 运行 sudo bash setup_ipv6_pool.sh 后，将生成的地址列表粘贴到这里
-# 或手动填写，格式如下：
 IPV6_POOL = [
     '2a0e:6a80:3:38d::1',
     '2a0e:6a80:3:38d::2',
@@ -78,14 +80,22 @@ def rotate_ipv6():
     current = get_current_ipv6()
     logging.info(f"当前 IPv6 地址: {current}")
     
+    # 自动发现的地址池（有缓存，网卡地址不变时不会重新检测），发现失败时使用上面的配置
+    found = inventory()
+    pool = found['addresses'] or IPV6_POOL
+    main_ip = found['main_ip'] or MAIN_IP
+    gateway = found['gateway'] or GATEWAY
+    interface = found['interface'] or INTERFACE
+    
     # 从池中选择一个不同的地址（排除主 IP）
-    available = [ip for ip in IPV6_POOL if ip != current and ip != MAIN_IP]
+    available = [ip for ip in pool if ip != current and ip != main_ip]
     
     if not available:
         logging.warning("没有可用的备用 IPv6 地址")
         return current
     
-    selected = random.choice(available)
+    # 按各地址的挑战率、延迟和冷却时间选择（IPV6_SELECTION=random 时随机）
+    selected = AddressHealth().choose(available)
     logging.info(f"选择新的 IPv6 地址: {selected}")
     
     try:
@@ -98,13 +108,16 @@ def rotate_ipv6():
         # 添加新的默认路由，绑定到选择的 IPv6 地址
         subprocess.run([
             'sudo', 'ip', '-6', 'route', 'add', 'default',
-            'via', GATEWAY,
-            'dev', INTERFACE,
+            'via', gateway,
+            'dev', interface,
             'src', selected
         ], check=True)
         
         logging.info(f"✅ 成功切换到 IPv6: {selected}")
-        logging.info(f"   (主 IP {MAIN_IP} 保持不变，用于 SSH)")
+        logging.info(f"   (主 IP {main_ip} 保持不变，用于 SSH)")
+
+        # 更新地址缓存中的默认路由源地址（监控进程启动时从缓存读取当前出口地址）
+        inventory(force=True)
         return selected
         
     except subprocess.CalledProcessError as e:
@@ -112,28 +125,23 @@ def rotate_ipv6():
         return None
 
 def list_ipv6_addresses():
-    """列出服务器上所有配置的 IPv6 地址"""
+    """列出自动发现的 IPv6 地址池"""
     try:
-        result = subprocess.run(
-            ['ip', '-6', 'addr', 'show'],
-            capture_output=True,
-            text=True,
-            check=True
-        )
+        found = inventory(force=True)
         
-        print("\n可用的 IPv6 地址:")
+        print("\n自动发现的 IPv6 地址池:")
         print("=" * 60)
+        print(f"  网段: {found['prefix']}")
+        print(f"  网卡: {found['interface']}")
+        print(f"  网关: {found['gateway']}")
+        print(f"  主 IP (SSH 用，不轮换): {found['main_ip'] or '未检测到'}")
+        print("-" * 60)
         
-        for line in result.stdout.split('\n'):
-            if 'inet6' in line and 'scope global' in line:
-                # 提取 IPv6 地址
-                parts = line.strip().split()
-                if len(parts) >= 2:
-                    addr = parts[1].split('/')[0]
-                    print(f"  {addr}")
+        for addr in found['addresses']:
+            print(f"  {addr}")
         
         print("=" * 60)
-        print("\n请将这些地址添加到 ipv6_rotate.py 的 IPV6_POOL 中")
+        print(f"\n共 {len(found['addresses'])} 个可轮换地址，轮换时自动使用，无需手动填写")
         
     except Exception as e:
         logging.error(f"列出 IPv6 地址失败: {e}")
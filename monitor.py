@@ -5,18 +5,32 @@ LowEndTalk FAT32 评论监控器
 """
 
 import time
+import html
+import threading
 import logging
 from logging.handlers import RotatingFileHandler
 from datetime import datetime
-from typing import List, Dict, Optional, Set
+from typing import List, Dict, Optional
 import undetected_chromedriver as uc
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
 import requests
 
 from config import Config
+from comment_extractor import extract_comments
+from cookie_jar import SharedCookieJar
+from page_cache import PageValidatorCache
+from state_store import StateStore
+from page_jump import PageJumper
+from poll_scheduler import AdaptiveScheduler
+from telegram_queue import TelegramDeliveryQueue
+from browser_watchdog import BrowserWatchdog
+from browser_profile import BrowserProfile
+from chromedriver_cache import ChromeDriverCache
+from source_bind import current_address, route_changed, shared_pool, shared_proxy
+from ipv6_health import AddressHealth, CHALLENGE, OK as REQUEST_OK
+from page_scripts import COMMENT_COUNT_JS, cf_challenge_reason, probe_cloudflare
 
 
 # 配置日志 - 使用轮转日志
@@ -72,10 +86,11 @@ class TelegramNotifier:
             logger.error(f"❌ 发送 Telegram 消息时出错: {e}")
             return False
     
-    def send_comment_notification(self, comment: Dict) -> bool:
-        """发送评论通知"""
+    def format_comment(self, comment: Dict) -> str:
+        """生成评论通知消息（HTML）"""
         # 基础消息内容（限制长度避免太长）
         content = comment['content'][:800] + ('...' if len(comment['content']) > 800 else '')
+        content = html.escape(content)
         
         message = f"""
 🔔 <b>发现 {Config.TARGET_USER} 的新评论！</b>
@@ -92,82 +107,175 @@ class TelegramNotifier:
         if comment.get('links') and len(comment['links']) > 0:
             message += "\n<b>🔗 评论中的链接：</b>\n"
             for i, link in enumerate(comment['links'][:10], 1):  # 最多显示10个链接
-                message += f"{i}. {link}\n"
+                message += f"{i}. {html.escape(link)}\n"
         
-        return self.send_message(message.strip())
+        return message.strip()
+    
+    def send_comment_notification(self, comment: Dict) -> bool:
+        """发送评论通知"""
+        return self.send_message(self.format_comment(comment))
 
 
 class LETMonitor:
-    """LowEndTalk 监控器"""
+    """LowEndTalk 监控器
+
+    Args:
+        parent: 分级抓取时的 curl_cffi 监控器，共用它的状态存储、地址统计和 Telegram 发送队列
+                （每个进程一个数据库连接和一个发送线程），为 None 时自己创建
+    """
     
-    def __init__(self):
+    def __init__(self, parent=None):
         self.config = Config
         self.driver: Optional[uc.Chrome] = None
-        self.notifier = TelegramNotifier(
+        self.owns_state = parent is None  # cleanup 时是否关闭状态存储、地址统计和发送队列
+        self.notifier = parent.notifier if parent else TelegramNotifier(
             Config.TELEGRAM_BOT_TOKEN,
             Config.TELEGRAM_CHAT_ID
         )
-        self.seen_comments: Set[str] = set()  # 已发送通知的评论ID
-        self.pages_checked = 0  # 已检查的页面数（用于定期重启）
+        self.state_store = parent.state_store if parent else StateStore()  # 持久化的通知记录和监控进度
+        self.seen_comments = self.state_store.seen  # 已发送通知的评论ID
+        self.page_jumper = PageJumper(self.state_store)  # 落后时跳到最后一页，补查跳过的页面
+        self.scheduler = AdaptiveScheduler(self.state_store)  # 按发帖速度决定轮询间隔
+        self.pages_checked = 0  # 已检查的页面数（RECYCLE_MODE=pages 时用于定期重启）
+        self.watchdog = BrowserWatchdog()  # Chrome 进程树内存监控
+        self.profile = BrowserProfile()  # 持久化 user-data-dir（BROWSER_PROFILE_DIR 为空时不启用）
+        self.profile_slot = 0  # 当前使用的配置目录（备用 driver 使用另一个）
+        self.driver_cache = ChromeDriverCache()  # Chrome 版本和修补后的 chromedriver 缓存
+        self.source_pool = shared_pool()  # IPV6_BIND_MODE=bind 时浏览器经本地代理绑定出口地址
+        self.address_health = parent.address_health if parent else AddressHealth()  # 各出口地址的挑战率和延迟
+        self.cookie_jar = SharedCookieJar()  # 通过挑战后的 cookie 共享给 curl_cffi
+        self.page_cache = PageValidatorCache()  # 评论区摘要，未变化时跳过解析
+        
+        # Telegram 后台发送队列（TELEGRAM_QUEUE=false 时在抓取线程中同步发送）
+        if parent:
+            self.delivery = parent.delivery
+        else:
+            self.delivery = TelegramDeliveryQueue(
+                self.notifier,
+                on_delivered=self.mark_delivered,
+                disable_web_page_preview=False
+            ) if Config.TELEGRAM_QUEUE else None
         
         # Cloudflare 卡住检测
         self.current_page = None  # 当前正在检查的页面
         self.cf_fail_count = 0  # 当前页面的 CF 失败次数
         
+        # 最近一次页面加载各阶段耗时（秒）
+        self.last_load_timings: Dict[str, float] = {}
+        
+        # 预热的备用 driver（WARM_STANDBY）
+        self.standby_driver: Optional[uc.Chrome] = None
+        self.standby_thread: Optional[threading.Thread] = None
+        self.standby_slot = 1
+        self.standby_failures = 0
+        
     def init_driver(self):
         """初始化 Chrome driver"""
         try:
             logger.info("🚀 初始化 Chrome driver...")
-            
-            options = uc.ChromeOptions()
-            
-            if Config.HEADLESS:
-                options.add_argument('--headless=new')  # 使用新的无头模式
-            
-            options.add_argument('--disable-blink-features=AutomationControlled')
-            options.add_argument('--no-sandbox')
-            options.add_argument('--disable-dev-shm-usage')
-            options.add_argument('--disable-gpu')
-            options.add_argument('--window-size=1920,1080')
-            options.add_argument('--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-            
-            # 注意：不使用 Chrome 参数强制 IPv6，因为会导致 DNS 解析失败
-            # 应该使用系统级配置（见 FORCE_IPV6.md）
-            
-            # 内存优化参数（防止崩溃）
-            options.add_argument('--disable-extensions')
-            options.add_argument('--disable-plugins')
-            
-            # ===== Cloudflare 绕过优化 =====
-            # 注意：禁用 JS 和图片会被 Cloudflare 检测为爬虫！
-            # 为了通过 Cloudflare，我们需要保持正常行为
-            # 如果内存不足，可以重新启用这些参数，但会降低成功率
-            
-            # options.add_argument('--disable-images')  # 已禁用：会被检测
-            # options.add_argument('--blink-settings=imagesEnabled=false')  # 已禁用：会被检测
-            # options.add_argument('--disable-javascript')  # 已禁用：Cloudflare 需要 JS
-            
-            logger.info("💡 已启用 JS 和图片加载以提高 Cloudflare 通过率")
-            # ===== Cloudflare 优化结束 =====
-            # 限制内存使用
-            options.add_argument('--disable-dev-shm-usage')
-            options.add_argument('--disable-software-rasterizer')
-            options.add_argument('--disable-background-networking')
-            options.add_argument('--disable-default-apps')
-            options.add_argument('--disable-sync')
-            options.add_argument('--metrics-recording-only')
-            options.add_argument('--mute-audio')
-            # 设置进程限制
-            options.add_argument('--single-process')  # 单进程模式，减少内存消耗
-            options.add_argument('--disable-renderer-backgrounding')
-            
-            self.driver = uc.Chrome(options=options, version_main=None)
+            self.driver = self._create_driver()
             logger.info("✅ Chrome driver 初始化成功")
             
         except Exception as e:
             logger.error(f"❌ Chrome driver 初始化失败: {e}")
             raise
     
+    def _create_driver(self, slot: Optional[int] = None) -> uc.Chrome:
+        """创建 Chrome driver（init_driver 和后台预热共用）"""
+        # 持久化配置目录：重启后保留 cookie（cf_clearance）和缓存
+        user_data_dir = self.profile.prepare(f"uc-{self.profile_slot if slot is None else slot}")
+        if user_data_dir:
+            logger.info(f"📁 使用浏览器配置目录: {user_data_dir}")
+        
+        start_time = time.time()
+        
+        # 使用缓存的 Chrome 版本和修补好的 chromedriver，跳过 uc 的版本检测和修补
+        build = self.driver_cache.chrome_build()
+        kwargs = self.driver_cache.chrome_kwargs(build)
+        cached = 'driver_executable_path' in kwargs
+        
+        try:
+            driver = uc.Chrome(options=self._chrome_options(), user_data_dir=user_data_dir, **kwargs)
+        except Exception as e:
+            if not cached:
+                raise
+            logger.warning(f"⚠️  缓存的 chromedriver 启动失败，重新下载修补: {e}")
+            self.driver_cache.invalidate(build)
+            cached = False
+            driver = uc.Chrome(
+                options=self._chrome_options(),
+                user_data_dir=user_data_dir,
+                version_main=kwargs['version_main']
+            )
+        
+        if not cached:
+            patcher = getattr(driver, 'patcher', None)
+            self.driver_cache.store(build, getattr(patcher, 'executable_path', None))
+        
+        logger.info(f"⏱️  Chrome driver 启动耗时 {time.time() - start_time:.1f} 秒"
+                    f"（{'缓存的' if cached else '新修补的'} chromedriver）")
+        return driver
+    
+    def _chrome_options(self) -> uc.ChromeOptions:
+        """Chrome 启动参数（uc 不允许重复使用同一个 ChromeOptions 对象）"""
+        options = uc.ChromeOptions()
+        
+        if Config.HEADLESS:
+            options.add_argument('--headless=new')  # 使用新的无头模式
+        
+        options.add_argument('--disable-blink-features=AutomationControlled')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument('--disable-gpu')
+        options.add_argument('--window-size=1920,1080')
+        options.add_argument('--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+        
+        # 注意：不使用 Chrome 参数强制 IPv6，因为会导致 DNS 解析失败
+        # 应该使用系统级配置（见 FORCE_IPV6.md），或 IPV6_BIND_MODE=bind 经本地代理绑定源地址
+        if self.source_pool:
+            options.add_argument(f'--proxy-server={shared_proxy().url}')
+        
+        # 内存优化参数（防止崩溃）
+        options.add_argument('--disable-extensions')
+        options.add_argument('--disable-plugins')
+        
+        # ===== Cloudflare 绕过优化 =====
+        # 注意：禁用 JS 和图片会被 Cloudflare 检测为爬虫！
+        # 为了通过 Cloudflare，我们需要保持正常行为
+        # 如果内存不足，可以重新启用这些参数，但会降低成功率
+        
+        # options.add_argument('--disable-images')  # 已禁用：会被检测
+        # options.add_argument('--blink-settings=imagesEnabled=false')  # 已禁用：会被检测
+        # options.add_argument('--disable-javascript')  # 已禁用：Cloudflare 需要 JS
+        
+        logger.info("💡 已启用 JS 和图片加载以提高 Cloudflare 通过率")
+        # ===== Cloudflare 优化结束 =====
+        # 限制内存使用
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument('--disable-software-rasterizer')
+        options.add_argument('--disable-background-networking')
+        options.add_argument('--disable-default-apps')
+        options.add_argument('--disable-sync')
+        options.add_argument('--metrics-recording-only')
+        options.add_argument('--mute-audio')
+        # 设置进程限制
+        options.add_argument('--single-process')  # 单进程模式，减少内存消耗
+        options.add_argument('--disable-renderer-backgrounding')
+        
+        return options
+    
+    def export_cookies(self):
+        """导出 cookie 和 User-Agent 到共享存储，供 curl_cffi 会话复用"""
+        if not self.driver:
+            return
+        
+        try:
+            cookies = SharedCookieJar.normalize_selenium_cookies(self.driver.get_cookies())
+            user_agent = self.driver.execute_script('return navigator.userAgent')
+            self.cookie_jar.save(cookies, user_agent, self.driver.capabilities.get('browserVersion'))
+        except Exception as e:
+            logger.warning(f"⚠️  导出 cookie 失败: {e}")
+    
     def get_page_url(self, page_num: int) -> str:
         """获取页面 URL"""
         return f"{Config.THREAD_BASE_URL}{page_num}"
@@ -179,60 +287,21 @@ class LETMonitor:
         try:
             logger.info("☁️  检测到可能的 Cloudflare 挑战，等待中...")
             
-            # Cloudflare 检测关键字（支持中英文）
-            cf_keywords_title = [
-                'cloudflare',
-                'just a moment',
-                '请稍候',
-                '稍等片刻',
-                '正在检查',
-            ]
-            
-            cf_keywords_content = [
-                'checking your browser',
-                'ray id',
-                'cloudflare',
-                '正在验证您是否是真人',
-                '正在检查您的浏览器',
-                '这可能需要几秒钟',
-                '验证您的浏览器',
-                '人机验证',
-                '安全检查',
-                'cloudflare-static',
-                'cf-browser-verification',
-            ]
-            
             start_time = time.time()
             
             while time.time() - start_time < timeout:
                 try:
-                    title = self.driver.title.lower()
-                    page_source = self.driver.page_source
-                    page_source_lower = page_source.lower()
-                    
-                    # 检查是否还在 Cloudflare 挑战页面
-                    is_cf_page = False
-                    
-                    # 检查标题
-                    for keyword in cf_keywords_title:
-                        if keyword in title:
-                            is_cf_page = True
-                            break
+                    # 页面内探测，只传回很小的状态对象（不序列化整个 page_source）
+                    reason = cf_challenge_reason(probe_cloudflare(self.driver))
                     
-                    # 检查页面内容
-                    if not is_cf_page:
-                        for keyword in cf_keywords_content:
-                            if keyword in page_source_lower or keyword in page_source:
-                                is_cf_page = True
-                                break
-                    
-                    if is_cf_page:
+                    if reason:
                         elapsed = int(time.time() - start_time)
-                        logger.info(f"⏳ Cloudflare 挑战进行中... ({elapsed}秒)")
+                        logger.info(f"⏳ Cloudflare 挑战进行中（{reason}）... ({elapsed}秒)")
                         time.sleep(2)
                         continue
                     else:
                         logger.info("✅ Cloudflare 挑战已通过")
+                        self.export_cookies()
                         return True
                         
                 except Exception as e:
@@ -247,6 +316,36 @@ class LETMonitor:
             logger.error(f"❌ 等待 Cloudflare 时出错: {e}")
             return False
     
+    def wait_for_ready_state(self, timeout: float = 10) -> bool:
+        """等待 document.readyState 离开 loading（DOM 已解析完成）"""
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=0.1).until(
+                lambda d: d.execute_script('return document.readyState') != 'loading'
+            )
+            return True
+        except Exception:
+            logger.debug(f"等待 readyState 超时（{timeout}秒）")
+            return False
+    
+    def wait_for_comments(self, timeout: float = 8, poll_interval: float = 0.2) -> bool:
+        """等待评论出现且数量稳定（连续两次检测数量相同，且 DOM 已解析完成）
+        
+        Returns:
+            是否找到评论元素
+        """
+        deadline = time.time() + timeout
+        last_count = -1
+        count = 0
+        
+        while time.time() < deadline:
+            state, count = self.driver.execute_script(COMMENT_COUNT_JS)
+            if count and count == last_count and state != 'loading':
+                return True
+            last_count = count
+            time.sleep(poll_interval)
+        
+        return count > 0
+    
     def load_page(self, page_num: int, max_retries: Optional[int] = None) -> bool:
         """加载指定页面（带重试）"""
         max_retries = max_retries or Config.MAX_PAGE_RETRIES
@@ -259,26 +358,30 @@ class LETMonitor:
                 else:
                     logger.info(f"📖 加载页面: {url}")
                 
+                timings = {}
+                stage_start = time.time()
+                
                 self.driver.get(url)
+                timings['导航'] = time.time() - stage_start
                 
-                # 等待 Cloudflare 挑战（如果有）
-                time.sleep(3)  # 初始等待
+                # 等待文档解析完成（代替固定的初始等待）
+                stage_start = time.time()
+                self.wait_for_ready_state()
+                timings['就绪'] = time.time() - stage_start
                 
                 # 检查是否遇到 Cloudflare 挑战（支持中英文）
-                title = self.driver.title.lower()
-                page_source = self.driver.page_source
-                
-                # 检测 Cloudflare 特征（中英文）
-                cf_detected = False
-                cf_keywords = ['cloudflare', 'just a moment', '请稍候', '正在检查', '正在验证']
+                cf_reason = cf_challenge_reason(probe_cloudflare(self.driver))
                 
-                for keyword in cf_keywords:
-                    if keyword in title or keyword in page_source:
-                        cf_detected = True
-                        break
+                # 按出口地址统计挑战率和延迟（轮换时据此选择地址）
+                self.address_health.record(current_address(), CHALLENGE if cf_reason else REQUEST_OK, timings['导航'])
                 
-                if cf_detected:
-                    if not self.wait_for_cloudflare():
+                if cf_reason:
+                    logger.info(f"🔍 检测到 Cloudflare 挑战：{cf_reason}")
+                    stage_start = time.time()
+                    passed = self.wait_for_cloudflare()
+                    timings['Cloudflare'] = time.time() - stage_start
+                    
+                    if not passed:
                         # Cloudflare 挑战失败，计数
                         self.cf_fail_count += 1
                         logger.warning(f"⚠️  Cloudflare 挑战失败 ({self.cf_fail_count}/{Config.MAX_CF_FAILS})")
@@ -292,24 +395,21 @@ class LETMonitor:
                 
                 # 等待评论列表加载 - 使用更长的超时时间
                 logger.info("⏳ 等待页面元素加载...")
-                WebDriverWait(self.driver, 20).until(
+                stage_start = time.time()
+                WebDriverWait(self.driver, 20, poll_frequency=0.2).until(
                     EC.presence_of_element_located((By.CLASS_NAME, "MessageList"))
                 )
+                timings['评论列表'] = time.time() - stage_start
                 
-                # 额外等待确保内容完全加载
-                time.sleep(3)
-                
-                # 验证页面是否真的加载了评论
-                page_source = self.driver.page_source
-                if 'ItemComment' not in page_source:
-                    logger.warning("⚠️  页面加载了但没有找到评论元素，可能需要更多时间")
-                    time.sleep(5)  # 再等待一会
-                    page_source = self.driver.page_source
-                    
-                    if 'ItemComment' not in page_source:
-                        raise Exception("页面加载后仍未找到评论元素")
+                # 等待评论数量稳定（代替固定等待）
+                stage_start = time.time()
+                if not self.wait_for_comments():
+                    raise Exception("页面加载后仍未找到评论元素")
+                timings['评论'] = time.time() - stage_start
                 
-                logger.info(f"✅ 页面 {page_num} 加载成功")
+                self.last_load_timings = timings
+                stages = ' / '.join(f"{name} {seconds:.1f}s" for name, seconds in timings.items())
+                logger.info(f"✅ 页面 {page_num} 加载成功（{stages}，共 {sum(timings.values()):.1f}s）")
                 return True
                 
             except Exception as e:
@@ -329,111 +429,21 @@ class LETMonitor:
         """解析页面中的所有评论"""
         try:
             page_source = self.driver.page_source
-            soup = BeautifulSoup(page_source, 'lxml')
             
-            # 检查是否是 "Page not found" 页面
-            page_not_found = soup.find('h1', string='Page not found.')
-            not_found_msg = soup.find('div', {'id': 'Message'})
+            # 评论区与上次相同，直接复用上次的解析结果
+            url = self.get_page_url(page_num)
+            if self.page_cache.is_unchanged(url, page_source):
+                logger.info(f"♻️  页面 {page_num} 评论区未变化，跳过解析")
+                return dict(self.page_cache.get_result(url), unchanged=True)
             
-            if page_not_found or (not_found_msg and 'could not be found' in not_found_msg.get_text()):
+            result = extract_comments(page_source, page_num, url)
+            
+            if result is None:
                 logger.warning(f"⚠️  页面 {page_num} 尚不存在，等待中...")
                 return None  # 返回 None 表示页面不存在
             
-            comments = []
-            
-            # 查找所有评论项
-            # 根据提供的HTML，评论在 <li class="Item ItemComment ..."> 中
-            comment_items = soup.find_all('li', class_=lambda x: x and 'ItemComment' in x)
-            
-            total_comments = len(comment_items)
-            logger.info(f"📊 找到 {total_comments} 条评论")
-            
-            for item in comment_items:
-                try:
-                    # 提取评论ID
-                    comment_id = item.get('id', '')
-                    
-                    # 提取作者
-                    author_elem = item.find('a', class_='Username')
-                    author = author_elem.text.strip() if author_elem else ''
-                    
-                    # 只处理目标用户的评论
-                    if author != Config.TARGET_USER:
-                        continue
-                    
-                    # 提取时间戳
-                    time_elem = item.find('time')
-                    timestamp = time_elem.get('datetime', '') if time_elem else ''
-                    time_text = time_elem.get('title', '') if time_elem else ''
-                    
-                    # 提取评论内容和链接
-                    message_elem = item.find('div', class_='Message userContent')
-                    if message_elem:
-                        # ===== 筛选条件检查 =====
-                        # 1. 检查是否包含特定图片标签
-                        required_image = message_elem.find('img', src=Config.REQUIRED_IMAGE_URL)
-                        
-                        # 2. 检查是否包含 blockquote 标签（引用）
-                        has_blockquote = message_elem.find('blockquote') is not None
-                        
-                        # 3. 只处理包含特定图片且没有引用的评论
-                        if not required_image:
-                            logger.debug(f"跳过评论 {comment_id}: 不包含指定图片")
-                            continue
-                        
-                        if Config.FILTER_BLOCKQUOTE and has_blockquote:
-                            logger.debug(f"跳过评论 {comment_id}: 包含引用(blockquote)")
-                            continue
-                        
-                        logger.info(f"✅ 评论 {comment_id} 通过筛选（有图片且无引用）")
-                        # ===== 筛选条件检查结束 =====
-                        
-                        # 提取纯文本内容
-                        content = message_elem.get_text(separator='\n', strip=True)
-                        
-                        # 提取所有链接
-                        links = []
-                        for a_tag in message_elem.find_all('a', href=True):
-                            href = a_tag.get('href', '')
-                            # 过滤掉空链接和锚点链接
-                            if href and not href.startswith('#') and not href.startswith('javascript:'):
-                                # 处理相对链接
-                                if href.startswith('/'):
-                                    href = f"https://lowendtalk.com{href}"
-                                links.append(href)
-                        
-                        # 如果有链接，将链接信息追加到内容后
-                        if links:
-                            content += '\n\n📎 链接:\n' + '\n'.join(f'- {link}' for link in links)
-                    else:
-                        content = ''
-                        links = []
-                    
-                    # 构建评论链接
-                    comment_link = f"{self.get_page_url(page_num)}#{comment_id}"
-                    
-                    comment = {
-                        'comment_id': comment_id,
-                        'author': author,
-                        'timestamp': time_text or timestamp,
-                        'content': content,
-                        'links': links,  # 新增：单独保存链接列表
-                        'link': comment_link,
-                        'page': page_num
-                    }
-                    
-                    comments.append(comment)
-                    logger.info(f"🎯 发现 {Config.TARGET_USER} 的评论: {comment_id}")
-                    
-                except Exception as e:
-                    logger.error(f"解析单条评论失败: {e}")
-                    continue
-            
-            # 返回评论列表，包含总数信息
-            return {
-                'comments': comments,
-                'total': total_comments  # 总评论数
-            }
+            self.page_cache.store_result(url, result)
+            return result
             
         except Exception as e:
             logger.error(f"❌ 解析评论失败: {e}")
@@ -475,6 +485,10 @@ class LETMonitor:
         
         return {'comments': [], 'total': 0}
     
+    def mark_delivered(self, comment: Dict):
+        """评论通知发送成功（由发送队列线程回调）"""
+        self.seen_comments.add(comment['comment_id'], comment.get('page'))
+    
     def notify_new_comments(self, comments: List[Dict]):
         """发送新评论通知"""
         for comment in comments:
@@ -485,9 +499,15 @@ class LETMonitor:
                 logger.info(f"⏭️  跳过已通知的评论: {comment_id}")
                 continue
             
+            # 交给后台发送队列
+            if self.delivery:
+                if not self.delivery.is_pending(comment_id) and self.delivery.submit(comment):
+                    logger.info(f"📨 评论 {comment_id} 已加入发送队列")
+                continue
+            
             # 发送通知
             if self.notifier.send_comment_notification(comment):
-                self.seen_comments.add(comment_id)
+                self.seen_comments.add(comment_id, comment.get('page'))
                 logger.info(f"📤 已发送评论 {comment_id} 的通知")
             else:
                 logger.warning(f"⚠️  评论 {comment_id} 通知发送失败")
@@ -502,7 +522,8 @@ class LETMonitor:
             if not self.driver:
                 self.init_driver()
             
-            current_page = start_page or Config.START_PAGE
+            # 未指定起始页面时，从上次保存的进度继续
+            current_page = self.state_store.resume_page(start_page)
             
             logger.info(f"🎬 开始监控，起始页面: {current_page}")
             logger.info(f"🎯 目标用户: {Config.TARGET_USER}")
@@ -510,6 +531,10 @@ class LETMonitor:
             
             while True:
                 try:
+                    # 备用 driver 已就绪，切换
+                    if self.standby_driver:
+                        self.swap_standby()
+                    
                     logger.info(f"\n{'='*60}")
                     logger.info(f"🔍 检查页面 {current_page}")
                     logger.info(f"{'='*60}\n")
@@ -525,12 +550,14 @@ class LETMonitor:
                     
                     # 检查页面是否存在
                     if result.get('not_found'):
-                        logger.warning(f"⏸️  页面 {current_page} 尚不存在，等待 {Config.CHECK_INTERVAL} 秒后重新检查...")
-                        time.sleep(Config.CHECK_INTERVAL)
+                        wait_time = self.scheduler.next_wait()
+                        logger.warning(f"⏸️  页面 {current_page} 尚不存在，等待 {wait_time:.0f} 秒后重新检查...")
+                        time.sleep(wait_time)
                         continue  # 不增加页面计数，继续检查当前页
                     
                     comments = result.get('comments', [])
                     total_comments = result.get('total', 0)
+                    self.scheduler.observe(current_page, result)
                     
                     # 页面成功加载，重置 CF 失败计数
                     if self.cf_fail_count > 0:
@@ -547,22 +574,27 @@ class LETMonitor:
                         logger.info(f"📭 页面 {current_page} 没有 {Config.TARGET_USER} 的符合条件的评论")
                     
                     # 判断是否切换到下一页
-                    # 只有当前页评论满 30 条时才切换到下一页
+                    # 只有当前页评论满 30 条时才切换到下一页（落后较多时直接跳到分页中的最后一页）
                     if total_comments >= 30:
                         logger.info(f"✅ 页面 {current_page} 已满 ({total_comments} 条评论)，切换到下一页")
-                        current_page += 1
-                        
-                        # 每隔 N 页重启一次 Chrome driver（防止内存泄漏）
-                        if self.pages_checked >= Config.RESTART_INTERVAL:
-                            logger.info(f"📊 已检查 {self.pages_checked} 页，执行定期重启以释放资源...")
-                            self.restart_driver()
+                        current_page = self.page_jumper.next_page(current_page, result)
+                        self.state_store.save_checkpoint(current_page)
                     else:
-                        logger.info(f"⏳ 页面 {current_page} 仅有 {total_comments} 条评论（未满30条），等待 {Config.CHECK_INTERVAL} 秒后继续检查...")
-                        # 不切换页面，继续等待当前页
+                        logger.info(f"⏳ 页面 {current_page} 仅有 {total_comments} 条评论（未满30条），稍后继续检查...")
+                        self.state_store.save_checkpoint(current_page, total_comments)
+                        # 不切换页面，继续等待当前页；利用等待间隙补查跳过的页面
+                        self.page_jumper.backfill(self.check_page, self.notify_new_comments)
+                    
+                    # Chrome 内存或渲染进程数超限、或 driver 无响应时才重启（防止内存泄漏）
+                    reason = self.watchdog.recycle_reason(self.pages_checked, total_comments >= 30, self.is_driver_alive)
+                    if reason:
+                        logger.info(f"📊 {reason}，重启 Chrome driver 以释放资源...")
+                        self.recycle_driver()
                     
-                    # 等待一段时间再检查下一页
-                    logger.info(f"⏳ 等待 {Config.CHECK_INTERVAL} 秒后检查下一页...")
-                    time.sleep(Config.CHECK_INTERVAL)
+                    # 等待一段时间再检查下一页（按发帖速度调整，POLL_SCHEDULER=fixed 时为 CHECK_INTERVAL）
+                    wait_time = self.scheduler.next_wait(full=total_comments >= 30)
+                    logger.info(f"⏳ 等待 {wait_time:.0f} 秒后检查下一页...")
+                    time.sleep(wait_time)
                     
                 except KeyboardInterrupt:
                     logger.info("\n⏹️  收到中断信号，停止监控...")
@@ -603,6 +635,98 @@ class LETMonitor:
         finally:
             self.cleanup()
     
+    def is_driver_alive(self) -> bool:
+        """Chrome driver 是否仍能响应"""
+        try:
+            return self.driver.execute_script('return 1') == 1
+        except Exception as e:
+            logger.warning(f"⚠️  Chrome driver 无响应: {e}")
+            return False
+    
+    def recycle_driver(self):
+        """回收 Chrome driver
+        
+        开启 WARM_STANDBY 时在后台启动并预热新的 driver（打开帖子、通过挑战），
+        旧 driver 继续轮询，就绪后在下一轮检查前切换；否则直接重启
+        """
+        if Config.WARM_STANDBY and self.standby_failures < 2 and self.is_driver_alive():
+            self.start_standby()
+        else:
+            self.restart_driver()
+    
+    def start_standby(self):
+        """在后台线程中启动备用 driver"""
+        if self.standby_driver or (self.standby_thread and self.standby_thread.is_alive()):
+            return
+        
+        url = self.get_page_url(self.current_page or Config.START_PAGE)
+        self.standby_slot = 1 - self.profile_slot
+        self.standby_thread = threading.Thread(
+            target=self._prepare_standby,
+            args=(url, self.standby_slot),
+            name='chrome-standby',
+            daemon=True
+        )
+        self.standby_thread.start()
+    
+    def _prepare_standby(self, url: str, slot: int):
+        """启动并预热备用 driver（后台线程）"""
+        driver = None
+        try:
+            logger.info("🔥 后台启动备用 Chrome driver...")
+            start_time = time.time()
+            
+            driver = self._create_driver(slot)
+            driver.get(url)
+            
+            # 评论列表出现说明已通过 Cloudflare 挑战
+            WebDriverWait(driver, Config.CLOUDFLARE_TIMEOUT + 20).until(
+                EC.presence_of_element_located((By.CLASS_NAME, "MessageList"))
+            )
+            
+            self.standby_driver = driver
+            self.standby_failures = 0
+            logger.info(f"✅ 备用 Chrome driver 已就绪（耗时 {time.time() - start_time:.1f} 秒）")
+            
+        except Exception as e:
+            self.standby_failures += 1
+            logger.warning(f"⚠️  备用 Chrome driver 预热失败 ({self.standby_failures} 次): {e}")
+            if driver:
+                self._quit_driver(driver)
+    
+    def swap_standby(self):
+        """切换到备用 driver，旧 driver 在后台关闭"""
+        driver, self.standby_driver = self.standby_driver, None
+        if not driver:
+            return
+        
+        self.export_cookies()
+        old_driver, self.driver = self.driver, driver
+        self.profile_slot = self.standby_slot
+        self.pages_checked = 0
+        self.watchdog.reset()
+        logger.info("🔁 已切换到预热好的备用 Chrome driver")
+        
+        if old_driver:
+            threading.Thread(target=self._quit_driver, args=(old_driver,), daemon=True).start()
+    
+    def discard_standby(self):
+        """关闭备用 driver（重启或退出时）"""
+        if self.standby_thread and self.standby_thread.is_alive():
+            self.standby_thread.join(Config.CLOUDFLARE_TIMEOUT + 30)
+        
+        driver, self.standby_driver = self.standby_driver, None
+        if driver:
+            self._quit_driver(driver)
+    
+    @staticmethod
+    def _quit_driver(driver: uc.Chrome):
+        """关闭 driver，忽略错误"""
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"关闭 driver 时出错: {e}")
+    
     def restart_driver(self, rotate_ipv6=False):
         """重启 Chrome driver（防止内存泄漏）
         
@@ -611,6 +735,12 @@ class LETMonitor:
         """
         logger.info("🔄 重启 Chrome driver 以释放资源...")
         
+        # 关闭前保存 cookie，供 curl_cffi 会话继续使用
+        self.export_cookies()
+        
+        # 备用 driver 可能用的是轮换前的 IPv6，一并关闭
+        self.discard_standby()
+        
         # 关闭旧的 driver
         if self.driver:
             try:
@@ -622,7 +752,10 @@ class LETMonitor:
         time.sleep(2)
         
         # ===== 轮换 IPv6（如果需要）=====
-        if rotate_ipv6:
+        if rotate_ipv6 and self.source_pool:
+            # bind 模式：换一个源地址，不修改系统路由，无需等待
+            self.source_pool.rotate()
+        elif rotate_ipv6:
             logger.info("🌐 开始轮换 IPv6 地址...")
             try:
                 import subprocess
@@ -641,6 +774,8 @@ class LETMonitor:
                             logger.info(f"   {line}")
                 else:
                     logger.warning(f"⚠️  IPv6 轮换失败: {result.stderr}")
+                
+                route_changed()
                     
                 # 额外等待确保网络配置生效
                 time.sleep(3)
@@ -656,17 +791,28 @@ class LETMonitor:
         
         # 重置页面计数
         self.pages_checked = 0
+        self.watchdog.reset()
+        self.standby_failures = 0
         logger.info("✅ Chrome driver 重启完成")
     
     def cleanup(self):
         """清理资源"""
+        self.discard_standby()
+        
         if self.driver:
             logger.info("🧹 关闭 Chrome driver...")
+            self.export_cookies()
             try:
                 self.driver.quit()
             except:
                 pass
             logger.info("✅ 清理完成")
+        
+        if self.owns_state:
+            if self.delivery:
+                self.delivery.close()
+            self.state_store.close()
+            self.address_health.close()
 
 
 def main():
@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+"""
+LowEndTalk Monitor - 异步多目标版本
+基于 curl_cffi AsyncSession，在一个进程内同时监控多个帖子 / 多个用户，
+无需为每个帖子启动一个 Chrome
+"""
+
+import json
+import time
+import random
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Union
+
+from curl_cffi.requests import AsyncSession
+
+from config import Config
+from comment_extractor import extract_comments
+from cookie_jar import IMPERSONATE, SharedCookieJar, major_version
+from page_cache import PageValidatorCache
+from rate_limit import HostRateLimiter
+from state_store import StateStore
+from page_jump import PageJumper
+from poll_scheduler import AdaptiveScheduler
+from telegram_queue import TelegramDeliveryQueue
+from cf_classifier import BLOCK, ERROR, NOT_FOUND, classify_response
+from source_bind import current_address, shared_pool
+from ipv6_health import AddressHealth, CHALLENGE, ERROR as REQUEST_ERROR, OK as REQUEST_OK
+from monitor_curlcffi import TelegramNotifier
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WatchTarget:
+    """单个监控目标及其状态"""
+    name: str
+    thread_base_url: str
+    start_page: int
+    target_user: str
+    required_image_url: str = Config.REQUIRED_IMAGE_URL
+
+    # 运行状态
+    current_page: int = 0
+    page_cf_retries: Dict[int, int] = field(default_factory=dict)  # 各页面连续的 CF 挑战次数（补查的页面单独计数）
+    cf_challenges: int = 0  # 累计 CF 挑战次数
+    fail_count: int = 0
+    pages_checked: int = 0
+    seen_comments: "OrderedDict[str, None]" = field(default_factory=OrderedDict)
+    page_cache: PageValidatorCache = field(default_factory=lambda: PageValidatorCache(max_entries=2))
+
+    def __post_init__(self):
+        if not self.current_page:
+            self.current_page = self.start_page
+
+    @property
+    def checkpoint_key(self) -> str:
+        """监控进度在状态存储中的键"""
+        return StateStore.checkpoint_key(self.thread_base_url, self.target_user)
+
+    def get_page_url(self, page_num: int) -> str:
+        """获取页面 URL"""
+        return f"{self.thread_base_url}{page_num}"
+
+    def mark_seen(self, comment_id: str):
+        """记录已通知的评论（只在内存中保留最近 SEEN_CACHE_SIZE 条）"""
+        self.seen_comments[comment_id] = None
+        self.seen_comments.move_to_end(comment_id)
+        while len(self.seen_comments) > Config.SEEN_CACHE_SIZE:
+            self.seen_comments.popitem(last=False)
+
+
+def load_watch_targets(path: Optional[str] = None) -> List[WatchTarget]:
+    """加载监控目标列表，文件不存在时使用 .env 中的单个目标
+
+    文件格式（JSON 数组）：
+        [{"name": "bf2025", "thread_base_url": "https://.../p",
+          "start_page": 241, "target_user": "FAT32"}]
+    """
+    path = path or Config.WATCH_TARGETS_FILE
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            items = json.load(f)
+    except FileNotFoundError:
+        logger.info(f"ℹ️  未找到 {path}，使用 .env 中的监控目标")
+        return [WatchTarget(
+            name='default',
+            thread_base_url=Config.THREAD_BASE_URL,
+            start_page=Config.START_PAGE,
+            target_user=Config.TARGET_USER
+        )]
+
+    targets = []
+    for i, item in enumerate(items):
+        targets.append(WatchTarget(
+            name=item.get('name', f'target{i + 1}'),
+            thread_base_url=item['thread_base_url'],
+            start_page=int(item.get('start_page', 1)),
+            target_user=item.get('target_user', Config.TARGET_USER),
+            required_image_url=item.get('required_image_url', Config.REQUIRED_IMAGE_URL)
+        ))
+    return targets
+
+
+class AsyncLETMonitor:
+    """LowEndTalk 监控器 - 异步多目标版本"""
+
+    def __init__(self, targets: List[WatchTarget]):
+        self.config = Config
+        self.targets = targets
+        self.session: Optional[AsyncSession] = None
+        self.impersonate = IMPERSONATE  # 会话的模拟目标（应用共享 cookie 时与浏览器版本对齐）
+        self.retired_sessions: List[AsyncSession] = []  # 换模拟目标前的会话（可能还有请求在进行，退出时关闭）
+        self.notifier = TelegramNotifier(
+            Config.TELEGRAM_BOT_TOKEN,
+            Config.TELEGRAM_CHAT_ID
+        )
+        self.cookie_jar = SharedCookieJar()
+        self.source_pool = shared_pool()  # IPV6_BIND_MODE=bind 时按请求绑定出口地址
+        self.address_health = AddressHealth()  # 各出口地址的挑战率和延迟
+        self.rate_limiter = HostRateLimiter(Config.HOST_RATE, Config.HOST_BURST)
+        self.semaphore = asyncio.Semaphore(Config.ASYNC_MAX_CONCURRENCY)
+        self.state_store = StateStore()  # 所有目标共用，评论 ID 全局唯一
+        self.delivery = TelegramDeliveryQueue(
+            self.notifier,
+            on_delivered=self.mark_delivered
+        ) if Config.TELEGRAM_QUEUE else None
+
+        # 从上次保存的进度继续
+        for target in self.targets:
+            checkpoint = self.state_store.load_checkpoint(target.checkpoint_key)
+            if checkpoint:
+                target.current_page = checkpoint['current_page']
+                logger.info(f"💾 [{target.name}] 恢复进度：页面 {target.current_page}")
+
+    def create_session(self, impersonate: str) -> AsyncSession:
+        """创建异步会话（所有目标共用连接池，UA 与模拟的 Chrome 版本一致）"""
+        bind_options = self.source_pool.curl_options() if self.source_pool else {}
+        session = AsyncSession(
+            impersonate=impersonate,
+            max_clients=Config.ASYNC_MAX_CONCURRENCY,
+            **bind_options
+        )
+        session.headers.update({
+            'User-Agent': f'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) '
+                          f'Chrome/{major_version(impersonate)}.0.0.0 Safari/537.36',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+            'Upgrade-Insecure-Requests': '1',
+            'Sec-Fetch-Dest': 'document',
+            'Sec-Fetch-Mode': 'navigate',
+            'Sec-Fetch-Site': 'none',
+        })
+        return session
+
+    def init_session(self):
+        """初始化异步 HTTP 会话"""
+        logger.info("🚀 初始化 curl_cffi 异步会话...")
+        self.session = self.create_session(self.impersonate)
+
+        self.load_shared_cookies(force=True)
+        logger.info(f"✅ 异步会话初始化成功，{len(self.targets)} 个监控目标")
+
+    def load_shared_cookies(self, force: bool = False) -> bool:
+        """加载共享 cookie 存储（文件有更新时才重新应用，浏览器版本变化时按它重建会话）"""
+        if not self.cookie_jar.load() and not force:
+            return False
+
+        target = self.cookie_jar.impersonate()
+        if target and target != self.impersonate and self.cookie_jar.has_clearance():
+            logger.info(f"🔁 浏览器为 Chrome {self.cookie_jar.browser_major}，会话改为模拟 {target}")
+            self.retired_sessions.append(self.session)
+            self.session = self.create_session(target)
+            self.impersonate = target
+
+        return self.cookie_jar.apply_to_session(self.session, self.impersonate)
+
+    async def load_page(self, target: WatchTarget, page_num: int, conditional: bool = True) -> Optional[Union[bytes, str]]:
+        """加载指定页面（conditional 为 False 时不发送条件请求头）
+
+        Returns:
+            bytes: 页面 HTML（成功）
+            'not_found' / 'not_modified' / 'cf_challenge': 同 curl_cffi 版本
+            None: 其他错误
+        """
+        url = target.get_page_url(page_num)
+
+        try:
+            self.load_shared_cookies()
+
+            async with self.semaphore:
+                await self.rate_limiter.acquire(url)
+                request_start = time.time()
+                response = await self.session.get(
+                    url,
+                    headers=target.page_cache.conditional_headers(url) if conditional else {},
+                    timeout=30,
+                    allow_redirects=True,
+                    interface=self.source_pool.current if self.source_pool else None
+                )
+
+            latency = time.time() - request_start
+
+            if response.status_code == 304:
+                self.address_health.record(current_address(), REQUEST_OK, latency)
+                return 'not_modified'
+
+            verdict = classify_response(response.status_code, response.headers, response.content)
+
+            if verdict.is_challenge or verdict.kind == BLOCK:
+                self.address_health.record(current_address(), CHALLENGE)
+            elif verdict.kind == ERROR:
+                self.address_health.record(current_address(), REQUEST_ERROR)
+            else:
+                self.address_health.record(current_address(), REQUEST_OK, latency)
+
+            if verdict.kind == NOT_FOUND:
+                return 'not_found'
+
+            if verdict.is_challenge or verdict.kind == BLOCK:
+                logger.warning(f"⚠️  [{target.name}] Cloudflare {verdict.kind}（{verdict.reason}）")
+                return 'cf_challenge'
+
+            if verdict.kind == ERROR:
+                logger.error(f"❌ [{target.name}] HTTP 状态码: {response.status_code}")
+                return None
+
+            if target.page_cache.is_unchanged(url, response.content, response.headers):
+                return 'not_modified'
+
+            return response.content
+
+        except Exception as e:
+            logger.error(f"❌ [{target.name}] 加载页面 {page_num} 失败: {e}")
+            self.address_health.record(current_address(), REQUEST_ERROR)
+            return None
+
+    def parse_comments(self, target: WatchTarget, html: Union[bytes, str], page_num: int) -> Optional[Dict]:
+        """解析页面中的评论（在线程池中运行，不阻塞事件循环）"""
+        return extract_comments(
+            html,
+            page_num,
+            target.get_page_url(page_num),
+            target_user=target.target_user,
+            required_image_url=target.required_image_url
+        )
+
+    async def check_page(self, target: WatchTarget, page_num: int) -> Dict:
+        """检查指定页面（逻辑与 curl_cffi 版本一致）"""
+        max_retries = Config.MAX_PAGE_RETRIES
+        url = target.get_page_url(page_num)
+
+        for retry in range(max_retries):
+            result = await self.load_page(target, page_num)
+
+            # 页面未变化，复用上次的解析结果；结果已被淘汰时立即不带条件请求头重新请求（不占用重试次数）
+            if result == 'not_modified':
+                cached = target.page_cache.get_result(url)
+                if cached is not None:
+                    return dict(cached, unchanged=True)
+                logger.info(f"♻️  [{target.name}] 页面 {page_num} 缓存的解析结果已被淘汰，重新完整请求")
+                result = await self.load_page(target, page_num, conditional=False)
+                if result == 'not_modified':
+                    cached = target.page_cache.get_result(url)
+                    if cached is not None:
+                        return dict(cached, unchanged=True)
+                    result = None  # 仍然没有可用的结果，按错误重试
+
+            if result != 'cf_challenge':
+                target.page_cf_retries.pop(page_num, None)
+
+            if result == 'not_found':
+                return {'comments': [], 'total': 0, 'not_found': True}
+
+            if result == 'cf_challenge':
+                cf_retries = target.page_cf_retries.get(page_num, 0) + 1
+                target.page_cf_retries[page_num] = cf_retries
+                target.cf_challenges += 1
+                logger.warning(f"⚠️  [{target.name}] CF 挑战 ({cf_retries}/{Config.MAX_PAGE_CF_RETRIES})")
+
+                if cf_retries >= Config.MAX_PAGE_CF_RETRIES:
+                    logger.error(f"❌ [{target.name}] 页面 {page_num} CF 挑战连续失败，放弃此页面")
+                    del target.page_cf_retries[page_num]
+                    return {'comments': [], 'total': 0, 'skip_page': True}
+
+                if retry < max_retries - 1:
+                    await asyncio.sleep(10)
+                    continue
+                return {'comments': [], 'total': 0, 'skip_page': True}
+
+            if result is None:
+                if retry < max_retries - 1:
+                    await asyncio.sleep(10)
+                    continue
+                return {'comments': [], 'total': 0, 'not_found': True}
+
+            parsed = await asyncio.to_thread(self.parse_comments, target, result, page_num)
+
+            if parsed is None:
+                return {'comments': [], 'total': 0, 'not_found': True}
+
+            target.page_cache.store_result(url, parsed)
+            return parsed
+
+        # 重试次数用完，不能当作空页面处理
+        return {'comments': [], 'total': 0, 'not_found': True}
+
+    def comment_key(self, comment: Dict) -> Optional[str]:
+        """评论所属监控目标的键（按评论链接和作者匹配）"""
+        for target in self.targets:
+            link = comment.get('link', '')
+            if comment.get('author') == target.target_user and link.startswith(target.thread_base_url):
+                return target.checkpoint_key
+        return None
+
+    def mark_delivered(self, comment: Dict):
+        """评论通知发送成功（由发送队列线程回调，目标的内存缓存在下次检查时更新）"""
+        self.state_store.mark_seen(comment['comment_id'], comment.get('page'), self.comment_key(comment))
+
+    async def notify_new_comments(self, target: WatchTarget, comments: List[Dict]):
+        """发送新评论通知"""
+        for comment in comments:
+            comment_id = comment['comment_id']
+
+            if comment_id in target.seen_comments:
+                continue
+
+            # 内存中没有时再查状态存储（重启前已通知过的评论）
+            if self.state_store.is_seen(comment_id):
+                target.mark_seen(comment_id)
+                continue
+
+            # 交给后台发送队列，不占用事件循环和线程池
+            if self.delivery:
+                if not self.delivery.is_pending(comment_id) and self.delivery.submit(comment):
+                    logger.info(f"📨 [{target.name}] 评论 {comment_id} 已加入发送队列")
+                continue
+
+            if await asyncio.to_thread(self.notifier.send_comment_notification, comment):
+                target.mark_seen(comment_id)
+                self.state_store.mark_seen(comment_id, comment.get('page'), target.checkpoint_key)
+                logger.info(f"📤 [{target.name}] 已发送评论 {comment_id} 的通知")
+            else:
+                logger.warning(f"⚠️  [{target.name}] 评论 {comment_id} 通知发送失败")
+
+    async def watch(self, target: WatchTarget):
+        """单个目标的监控循环"""
+        # 错开各目标的首次请求
+        await asyncio.sleep(random.uniform(0, min(Config.CHECK_INTERVAL, 10)))
+
+        logger.info(f"🎬 [{target.name}] 开始监控，页面 {target.current_page}，用户 {target.target_user}")
+        jumper = PageJumper(self.state_store, key=target.checkpoint_key, name=target.name)
+        scheduler = AdaptiveScheduler(self.state_store, key=target.checkpoint_key, name=target.name)
+
+        current_num = None
+        while True:
+            try:
+                if current_num != target.current_page:
+                    current_num = target.current_page
+                    target.page_cf_retries.pop(current_num, None)
+
+                result = await self.check_page(target, target.current_page)
+
+                if result.get('skip_page'):
+                    logger.warning(f"⏭️  [{target.name}] 跳过页面 {target.current_page}")
+                    target.current_page += 1
+                    self.state_store.save_checkpoint(target.current_page, key=target.checkpoint_key)
+                    continue
+
+                if result.get('not_found'):
+                    await asyncio.sleep(scheduler.next_wait(fallback=random.randint(Config.WAIT_MIN, Config.WAIT_MAX)))
+                    continue
+
+                target.fail_count = 0
+                target.pages_checked += 1
+
+                comments = result.get('comments', [])
+                total_comments = result.get('total', 0)
+                scheduler.observe(target.current_page, result)
+
+                if comments:
+                    await self.notify_new_comments(target, comments)
+
+                if total_comments >= 30:
+                    logger.info(f"✅ [{target.name}] 页面 {target.current_page} 已满，切换")
+                    target.current_page = jumper.next_page(target.current_page, result)
+                    self.state_store.save_checkpoint(target.current_page, key=target.checkpoint_key)
+                    await asyncio.sleep(scheduler.next_wait(full=True, fallback=Config.CHECK_INTERVAL))
+                else:
+                    self.state_store.save_checkpoint(target.current_page, total_comments, key=target.checkpoint_key)
+
+                    # 已追上最新页面，利用等待间隙补查跳过的页面
+                    for page_num in jumper.pending():
+                        backfill = await self.check_page(target, page_num)
+                        if backfill.get('comments'):
+                            await self.notify_new_comments(target, backfill['comments'])
+                        if not jumper.finish(page_num, backfill):
+                            break
+
+                    await asyncio.sleep(scheduler.next_wait(fallback=random.randint(Config.WAIT_MIN, Config.WAIT_MAX)))
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                logger.error(f"❌ [{target.name}] 出错: {e}")
+                target.fail_count += 1
+                await asyncio.sleep(30)
+
+    async def run(self):
+        """并发运行所有监控目标"""
+        Config.validate()
+
+        if not self.session:
+            self.init_session()
+
+        logger.info(f"🎬 开始监控（异步版本），{len(self.targets)} 个目标")
+        logger.info(f"🚦 并发上限 {Config.ASYNC_MAX_CONCURRENCY}，每主机 {Config.HOST_RATE} 请求/秒")
+
+        try:
+            await asyncio.gather(*(self.watch(target) for target in self.targets))
+        finally:
+            await self.close()
+
+    async def close(self):
+        """关闭会话"""
+        if self.session:
+            await self.session.close()
+            self.session = None
+        for session in self.retired_sessions:
+            await session.close()
+        self.retired_sessions.clear()
+        if self.delivery:
+            await asyncio.to_thread(self.delivery.close)
+        self.state_store.close()
+        self.address_health.close()
+        logger.info("✅ 监控结束")
+
+    async def test(self):
+        """测试模式：每个目标检查一次"""
+        self.init_session()
+        try:
+            results = await asyncio.gather(
+                *(self.check_page(target, target.current_page) for target in self.targets)
+            )
+            for target, result in zip(self.targets, results):
+                logger.info(f"[{target.name}] 页面 {target.current_page}: "
+                            f"总评论数 {result.get('total', 0)}，目标评论数 {len(result.get('comments', []))}")
+        finally:
+            await self.close()
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='LowEndTalk Monitor - 异步多目标版本')
+    parser.add_argument('--targets', help='监控目标 JSON 文件（默认 WATCH_TARGETS_FILE）')
+    parser.add_argument('--test', action='store_true', help='测试模式')
+
+    args = parser.parse_args()
+
+    monitor = AsyncLETMonitor(load_watch_targets(args.targets))
+
+    try:
+        if args.test:
+            logger.info("🧪 测试模式")
+            asyncio.run(monitor.test())
+        else:
+            asyncio.run(monitor.run())
+    except KeyboardInterrupt:
+        logger.info("\n👋 再见!")
+    except Exception as e:
+        logger.error(f"❌ 程序异常: {e}")
+
+
+if __name__ == '__main__':
+    main()
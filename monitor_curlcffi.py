@@ -5,35 +5,51 @@ LowEndTalk Monitor - curl_cffi 版本
 """
 
 import time
+import html
 import logging
 from logging.handlers import RotatingFileHandler
-from typing import List, Dict, Optional, Set
+from typing import List, Dict, Optional, Union
 import subprocess
 import random
+from concurrent.futures import ThreadPoolExecutor
 
-from curl_cffi import requests
-from bs4 import BeautifulSoup
+from curl_cffi import CurlOpt, requests
 
 from config import Config
+from comment_extractor import extract_comments
+from cookie_jar import IMPERSONATE, SharedCookieJar, major_version
+from page_cache import PageValidatorCache
+from state_store import StateStore
+from page_jump import PageJumper
+from poll_scheduler import AdaptiveScheduler
+from telegram_queue import TelegramDeliveryQueue
+from cf_classifier import BLOCK, ERROR, NOT_FOUND, classify_response
+from source_bind import CURL_IPRESOLVE_V6, current_address, route_changed, shared_pool
+from ipv6_health import AddressHealth, CHALLENGE, ERROR as REQUEST_ERROR, OK as REQUEST_OK
+from session_pool import PooledSession, SessionPool
 
 # 配置日志
-file_handler = RotatingFileHandler(
-    Config.LOG_FILE,
-    maxBytes=5*1024*1024,
-    backupCount=3,
-    encoding='utf-8'
-)
-file_handler.setLevel(logging.INFO)
-file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+# --backfill 的解析进程（forkserver/spawn）会以 __mp_main__ 重新导入本模块，
+# 这时不再配置日志，避免每个进程都向 monitor.log 添加一个 RotatingFileHandler
+if __name__ != '__mp_main__':
+    file_handler = RotatingFileHandler(
+        Config.LOG_FILE,
+        maxBytes=5*1024*1024,
+        backupCount=3,
+        encoding='utf-8'
+    )
+    file_handler.setLevel(logging.INFO)
+    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
 
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
-console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.INFO)
+    console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+
+    logging.basicConfig(
+        level=logging.INFO,
+        handlers=[file_handler, console_handler]
+    )
 
-logging.basicConfig(
-    level=logging.INFO,
-    handlers=[file_handler, console_handler]
-)
 logger = logging.getLogger(__name__)
 
 
@@ -45,30 +61,37 @@ class TelegramNotifier:
         self.chat_id = chat_id
         self.base_url = f"https://api.telegram.org/bot{bot_token}"
     
-    def send_comment_notification(self, comment: Dict) -> bool:
-        """发送评论通知"""
-        try:
-            import requests as std_requests
-            
-            message = f"""🔔 发现 {Config.TARGET_USER} 的新评论！
+    def format_comment(self, comment: Dict) -> str:
+        """生成评论通知消息"""
+        # 在转义之前截断原始内容，避免切断 HTML 实体
+        content = comment['content'][:800] + ('...' if len(comment['content']) > 800 else '')
+        author = comment.get('author') or Config.TARGET_USER
+        message = f"""🔔 发现 {author} 的新评论！
 
 📝 评论内容：
-{comment['content']}
+{html.escape(content)}
 
 ⏰ 时间：{comment['timestamp']}
 🔗 链接：{comment['link']}
 📄 页面：{comment['page']}
 """
-            
-            if comment.get('links'):
-                message += "\n🔗 评论中的链接：\n"
-                for i, link in enumerate(comment['links'], 1):
-                    message += f"{i}. {link}\n"
+        
+        if comment.get('links'):
+            message += "\n🔗 评论中的链接：\n"
+            for i, link in enumerate(comment['links'][:10], 1):  # 最多显示10个链接
+                message += f"{i}. {html.escape(link)}\n"
+        
+        return message
+    
+    def send_comment_notification(self, comment: Dict) -> bool:
+        """发送评论通知"""
+        try:
+            import requests as std_requests
             
             url = f"{self.base_url}/sendMessage"
             data = {
                 'chat_id': self.chat_id,
-                'text': message,
+                'text': self.format_comment(comment),
                 'parse_mode': 'HTML',
                 'disable_web_page_preview': True
             }
@@ -87,38 +110,72 @@ class LETMonitorCurlCffi:
     def __init__(self):
         self.config = Config
         self.session = None
+        self.impersonate = IMPERSONATE  # 主会话的模拟目标（应用共享 cookie 时与浏览器版本对齐）
         self.notifier = TelegramNotifier(
             Config.TELEGRAM_BOT_TOKEN,
             Config.TELEGRAM_CHAT_ID
         )
-        self.seen_comments: Set[str] = set()
+        self.state_store = StateStore()  # 持久化的通知记录和监控进度
+        self.seen_comments = self.state_store.seen
+        self.page_jumper = PageJumper(self.state_store)  # 落后时跳到最后一页，补查跳过的页面
+        self.scheduler = AdaptiveScheduler(self.state_store)  # 按发帖速度决定轮询间隔
         self.pages_checked = 0
         self.current_page_num = None
         self.fail_count = 0
-        self.page_cf_retry_count = 0  # 当前页面的 CF 重试次数
+        self.page_cf_retries: Dict[int, int] = {}  # 各页面连续的 CF 挑战次数（补查的页面不影响正在监控的页面）
+        self.cookie_jar = SharedCookieJar()  # 浏览器导出的 cf_clearance
+        self.page_cache = PageValidatorCache()  # ETag/Last-Modified 和评论区摘要
+        self.source_pool = shared_pool()  # IPV6_BIND_MODE=bind 时按请求绑定出口地址
+        self.address_health = AddressHealth()  # 各出口地址的挑战率和延迟
+        self.session_pool: Optional[SessionPool] = None  # 追赶积压页面时按出口地址并行抓取
+        
+        # Telegram 后台发送队列（TELEGRAM_QUEUE=false 时在抓取线程中同步发送）
+        self.delivery = TelegramDeliveryQueue(
+            self.notifier,
+            on_delivered=self.mark_delivered,
+            disable_web_page_preview=True
+        ) if Config.TELEGRAM_QUEUE else None
+    
+    def create_session(self, ipv6_only: bool = False, impersonate: str = IMPERSONATE) -> requests.Session:
+        """创建模拟 Chrome 的会话（绑定 IPv6 源地址时只解析 AAAA）"""
+        bind_options = {'curl_options': {CurlOpt.IPRESOLVE: CURL_IPRESOLVE_V6}} if ipv6_only else {}
+        session = requests.Session(impersonate=impersonate, **bind_options)
+        
+        # 设置默认头（UA 与模拟的 Chrome 版本一致）
+        session.headers.update({
+            'User-Agent': f'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) '
+                          f'Chrome/{major_version(impersonate)}.0.0.0 Safari/537.36',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+            'Accept-Encoding': 'gzip, deflate, br',
+            'DNT': '1',
+            'Connection': 'keep-alive',
+            'Upgrade-Insecure-Requests': '1',
+            'Sec-Fetch-Dest': 'document',
+            'Sec-Fetch-Mode': 'navigate',
+            'Sec-Fetch-Site': 'none',
+            'Cache-Control': 'max-age=0',
+        })
+        return session
     
     def init_session(self):
         """初始化 HTTP 会话"""
         try:
             logger.info("🚀 初始化 curl_cffi 会话...")
             
-            # 创建会话，模拟 Chrome 120
-            self.session = requests.Session(impersonate="chrome120")
-            
-            # 设置默认头
-            self.session.headers.update({
-                'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'DNT': '1',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'none',
-                'Cache-Control': 'max-age=0',
-            })
+            self.session = self.create_session(self.main_ipv6_only(), self.impersonate)
+            
+            # 复用浏览器通过挑战后导出的 cookie
+            self.load_shared_cookies(force=True)
+            
+            # 会话池：每个出口地址一个会话（只有一个会话时没有并行的意义）
+            if Config.SESSION_POOL_SIZE > 1 and not self.session_pool:
+                pool = SessionPool(lambda address: self.create_session(ipv6_only=address is not None),
+                                   health=self.address_health)
+                if len(pool) > 1:
+                    self.session_pool = pool
+                else:
+                    pool.close()
             
             logger.info("✅ curl_cffi 会话初始化成功")
             logger.info("💡 curl_cffi 模拟真实浏览器 TLS 指纹，极高 Cloudflare 绕过率")
@@ -127,165 +184,172 @@ class LETMonitorCurlCffi:
             logger.error(f"❌ 会话初始化失败: {e}")
             raise
     
+    def main_ipv6_only(self) -> bool:
+        """主会话是否绑定了 IPv6 源地址"""
+        return bool(self.source_pool and self.source_pool.current)
+    
+    def load_shared_cookies(self, force: bool = False) -> bool:
+        """加载共享 cookie 存储（文件有更新时才重新应用）
+        
+        浏览器版本与主会话的模拟目标不一致时，先按浏览器版本重建主会话
+        
+        Returns:
+            bool: 是否应用了有效的 cf_clearance
+        """
+        if not self.session:
+            return False
+        
+        if not self.cookie_jar.load() and not force:
+            return False
+        
+        target = self.cookie_jar.impersonate()
+        if target and target != self.impersonate and self.cookie_jar.has_clearance():
+            logger.info(f"🔁 浏览器为 Chrome {self.cookie_jar.browser_major}，主会话改为模拟 {target}")
+            old_session = self.session
+            self.session = self.create_session(self.main_ipv6_only(), target)
+            self.impersonate = target
+            old_session.close()
+        
+        if self.cookie_jar.apply_to_session(self.session, self.impersonate):
+            logger.info("🍪 已应用浏览器导出的 cf_clearance")
+            return True
+        return False
+    
     def get_page_url(self, page_num: int) -> str:
         """获取页面 URL"""
         return f"{Config.THREAD_BASE_URL}{page_num}"
     
-    def load_page(self, page_num: int) -> Optional[str]:
+    def record_outcome(self, outcome: str, latency: Optional[float] = None, pooled: Optional[PooledSession] = None):
+        """按出口地址统计挑战率和延迟（轮换时据此选择地址）"""
+        if pooled:
+            self.session_pool.record(pooled, outcome, latency)
+        else:
+            self.address_health.record(current_address(), outcome, latency)
+    
+    def load_page(
+        self,
+        page_num: int,
+        pooled: Optional[PooledSession] = None,
+        conditional: bool = True
+    ) -> Optional[Union[bytes, str]]:
         """加载指定页面
         
+        Args:
+            page_num: 页码
+            pooled: 会话池中借出的会话（默认使用主会话）
+            conditional: 是否发送条件请求头（缓存的解析结果被淘汰后重新请求时为 False）
+        
         Returns:
-            str: 页面 HTML（成功）
-            'not_found': HTTP 404，页面不存在
-            'cf_challenge': Cloudflare 挑战失败
+            bytes: 页面 HTML（成功，直接交给 lxml 解析）
+            'not_found': HTTP 404 / "Page not found"，页面不存在
+            'not_modified': 评论区与上次相同（304 或摘要一致），可复用上次的解析结果
+            'cf_challenge': Cloudflare 挑战（5 秒盾 / Turnstile）或封禁
             None: 其他错误
         """
         try:
             url = self.get_page_url(page_num)
-            logger.info(f"📖 加载页面: {url}")
+            logger.info(f"📖 加载页面: {url}" + (f"（{pooled.name}）" if pooled else ""))
             
             # 添加随机延迟（模拟人类）
             time.sleep(random.uniform(1, 3))
             
-            # 使用 curl_cffi 请求
-            response = self.session.get(
+            if pooled:
+                # 会话池中的会话使用各自的 cookie（浏览器导出的 cf_clearance 与浏览器的地址绑定）
+                session, interface = pooled.session, pooled.address
+            else:
+                # 其他进程（浏览器）可能刚刚导出了新的 cookie
+                self.load_shared_cookies()
+                session = self.session
+                interface = self.source_pool.current if self.source_pool else None
+            
+            # 使用 curl_cffi 请求（有缓存结果时发送条件请求头）
+            request_start = time.time()
+            response = session.get(
                 url,
+                headers=self.page_cache.conditional_headers(url) if conditional else {},
                 timeout=30,
                 allow_redirects=True,
-                verify=True
+                verify=True,
+                interface=interface
             )
             
+            latency = time.time() - request_start
+            
             # 检查状态码
-            if response.status_code == 404:
-                logger.warning(f"⚠️  HTTP 404: 页面不存在")
+            if response.status_code == 304:
+                self.record_outcome(REQUEST_OK, latency, pooled)
+                logger.info(f"♻️  页面 {page_num} 未变化（HTTP 304）")
+                return 'not_modified'
+            
+            # 根据状态码、响应头和页面结构分类（正常页面中提到 Cloudflare 不会误判）
+            verdict = classify_response(response.status_code, response.headers, response.content)
+            
+            if verdict.is_challenge or verdict.kind == BLOCK:
+                self.record_outcome(CHALLENGE, pooled=pooled)
+            elif verdict.kind == ERROR:
+                self.record_outcome(REQUEST_ERROR, pooled=pooled)
+            else:
+                self.record_outcome(REQUEST_OK, latency, pooled)
+            
+            if verdict.kind == NOT_FOUND:
+                logger.warning(f"⚠️  页面不存在（{verdict.reason}）")
                 return 'not_found'  # 返回特殊标记
             
-            if response.status_code != 200:
+            if verdict.is_challenge or verdict.kind == BLOCK:
+                logger.warning(f"⚠️  检测到 Cloudflare {verdict.kind}（{verdict.reason}）")
+                return 'cf_challenge'  # 返回 CF 挑战标记
+            
+            if verdict.kind == ERROR:
                 logger.error(f"❌ HTTP 状态码: {response.status_code}")
                 return None
             
-            # 检查是否是 Cloudflare 挑战页面
-            content = response.text.lower()
-            cf_keywords = ['cloudflare', 'just a moment', '请稍候', '正在验证']
-            
-            if any(keyword in content for keyword in cf_keywords):
-                logger.warning("⚠️  检测到 Cloudflare 挑战页面")
-                return 'cf_challenge'  # 返回 CF 挑战标记
+            # 服务器不支持条件请求时，比较评论区摘要
+            if self.page_cache.is_unchanged(url, response.content, response.headers):
+                logger.info(f"♻️  页面 {page_num} 评论区未变化，跳过解析")
+                return 'not_modified'
             
             logger.info(f"✅ 页面 {page_num} 加载成功")
-            return response.text
+            return response.content
             
         except Exception as e:
             logger.error(f"❌ 加载页面 {page_num} 失败: {e}")
+            self.record_outcome(REQUEST_ERROR, pooled=pooled)
             return None
     
-    def parse_comments(self, html: str, page_num: int) -> Dict:
+    def parse_comments(self, html: Union[bytes, str], page_num: int) -> Optional[Dict]:
         """解析页面中的评论"""
-        try:
-            soup = BeautifulSoup(html, 'lxml')
-            
-            # 检查是否是 "Page not found"
-            page_not_found = soup.find('h1', string='Page not found.')
-            not_found_msg = soup.find('div', {'id': 'Message'})
-            
-            if page_not_found or (not_found_msg and 'could not be found' in not_found_msg.get_text()):
-                logger.warning(f"⚠️  页面 {page_num} 尚不存在")
-                return None
-            
-            comments = []
-            comment_items = soup.find_all('li', class_=lambda x: x and 'ItemComment' in x)
-            total_comments = len(comment_items)
-            
-            logger.info(f"📊 找到 {total_comments} 条评论")
-            
-            for item in comment_items:
-                try:
-                    comment_id = item.get('id', '')
-                    author_elem = item.find('a', class_='Username')
-                    
-                    if not author_elem:
-                        continue
-                    
-                    author = author_elem.get_text(strip=True)
-                    
-                    if author != Config.TARGET_USER:
-                        continue
-                    
-                    time_elem = item.find('time')
-                    timestamp = time_elem.get('datetime', '') if time_elem else ''
-                    time_text = time_elem.get('title', '') if time_elem else ''
-                    
-                    message_elem = item.find('div', class_='Message userContent')
-                    if message_elem:
-                        # 筛选条件
-                        required_image = message_elem.find('img', src=Config.REQUIRED_IMAGE_URL)
-                        has_blockquote = message_elem.find('blockquote') is not None
-                        
-                        if not required_image:
-                            logger.debug(f"跳过评论 {comment_id}: 不包含指定图片")
-                            continue
-                        
-                        if Config.FILTER_BLOCKQUOTE and has_blockquote:
-                            logger.debug(f"跳过评论 {comment_id}: 包含引用")
-                            continue
-                        
-                        logger.info(f"✅ 评论 {comment_id} 通过筛选")
-                        
-                        content = message_elem.get_text(separator='\n', strip=True)
-                        
-                        links = []
-                        for a_tag in message_elem.find_all('a', href=True):
-                            href = a_tag.get('href', '')
-                            if href and not href.startswith('#') and not href.startswith('javascript:'):
-                                if href.startswith('/'):
-                                    href = f"https://lowendtalk.com{href}"
-                                links.append(href)
-                        
-                        if links:
-                            content += '\n\n📎 链接:\n' + '\n'.join(f'- {link}' for link in links)
-                    else:
-                        content = ''
-                        links = []
-                    
-                    comment_link = f"{self.get_page_url(page_num)}#{comment_id}"
-                    
-                    comment = {
-                        'comment_id': comment_id,
-                        'author': author,
-                        'timestamp': time_text or timestamp,
-                        'content': content,
-                        'links': links,
-                        'link': comment_link,
-                        'page': page_num
-                    }
-                    
-                    comments.append(comment)
-                    logger.info(f"🎯 发现 {Config.TARGET_USER} 的评论: {comment_id}")
-                    
-                except Exception as e:
-                    logger.error(f"解析单条评论失败: {e}")
-                    continue
-            
-            return {
-                'comments': comments,
-                'total': total_comments
-            }
-            
-        except Exception as e:
-            logger.error(f"❌ 解析评论失败: {e}")
-            return {'comments': [], 'total': 0}
+        result = extract_comments(html, page_num, self.get_page_url(page_num))
+        
+        if result is None:
+            logger.warning(f"⚠️  页面 {page_num} 尚不存在")
+        
+        return result
     
     def check_page(self, page_num: int) -> Dict:
         """检查指定页面"""
         max_retries = Config.MAX_PAGE_RETRIES
         
-        # 重置当前页面的 CF 重试计数
-        if self.current_page_num != page_num:
-            self.page_cf_retry_count = 0
-        
         for retry in range(max_retries):
             try:
                 result = self.load_page(page_num)
+                url = self.get_page_url(page_num)
+                
+                # 页面未变化，复用上次的解析结果；结果已被淘汰时立即不带条件请求头重新请求（不占用重试次数）
+                if result == 'not_modified':
+                    cached = self.page_cache.get_result(url)
+                    if cached is not None:
+                        return dict(cached, unchanged=True)
+                    logger.info(f"♻️  页面 {page_num} 未变化但缓存的解析结果已被淘汰，重新完整请求")
+                    result = self.load_page(page_num, conditional=False)
+                    if result == 'not_modified':
+                        cached = self.page_cache.get_result(url)
+                        if cached is not None:
+                            return dict(cached, unchanged=True)
+                        result = None  # 仍然没有可用的结果，按错误重试
+                
+                # 没有遇到挑战，该页面的 CF 次数清零
+                if result != 'cf_challenge':
+                    self.page_cf_retries.pop(page_num, None)
                 
                 # 情况 1: HTTP 404，页面不存在（应该等待，不计入 CF 次数）
                 if result == 'not_found':
@@ -294,12 +358,14 @@ class LETMonitorCurlCffi:
                 
                 # 情况 2: Cloudflare 挑战失败（计入 CF 次数）
                 if result == 'cf_challenge':
-                    self.page_cf_retry_count += 1
-                    logger.warning(f"⚠️  CF 挑战失败 ({self.page_cf_retry_count}/{Config.MAX_PAGE_CF_RETRIES})")
+                    cf_retries = self.page_cf_retries.get(page_num, 0) + 1
+                    self.page_cf_retries[page_num] = cf_retries
+                    logger.warning(f"⚠️  CF 挑战失败 ({cf_retries}/{Config.MAX_PAGE_CF_RETRIES})")
                     
                     # 检查是否达到 CF 重试上限
-                    if self.page_cf_retry_count >= Config.MAX_PAGE_CF_RETRIES:
-                        logger.error(f"❌ 页面 {page_num} CF 挑战连续失败 {self.page_cf_retry_count} 次，放弃此页面")
+                    if cf_retries >= Config.MAX_PAGE_CF_RETRIES:
+                        logger.error(f"❌ 页面 {page_num} CF 挑战连续失败 {cf_retries} 次，放弃此页面")
+                        del self.page_cf_retries[page_num]
                         return {'comments': [], 'total': 0, 'skip_page': True}
                     
                     # 未达到上限，继续重试
@@ -327,6 +393,7 @@ class LETMonitorCurlCffi:
                     # parse_comments 返回 None 表示页面内容显示 "Page not found"
                     return {'comments': [], 'total': 0, 'not_found': True}
                 
+                self.page_cache.store_result(url, parsed)
                 return parsed
                 
             except Exception as e:
@@ -334,9 +401,81 @@ class LETMonitorCurlCffi:
                 if retry < max_retries - 1:
                     time.sleep(10)
                 else:
-                    return {'comments': [], 'total': 0}
+                    return {'comments': [], 'total': 0, 'not_found': True}
         
-        return {'comments': [], 'total': 0}
+        # 重试次数用完，不能当作空页面处理
+        return {'comments': [], 'total': 0, 'not_found': True}
+    
+    def fetch_page(self, page_num: int) -> Optional[Dict]:
+        """用会话池中的会话抓取并解析页面（追赶时在线程池中并行调用）
+        
+        Returns:
+            解析结果（格式同 check_page），CF 挑战或出错时返回 None
+        """
+        url = self.get_page_url(page_num)
+        with self.session_pool.session() as pooled:
+            result = self.load_page(page_num, pooled)
+            
+            if result == 'not_modified':
+                cached = self.page_cache.get_result(url)
+                if cached is not None:
+                    return cached
+                # 缓存的解析结果已被淘汰，不带条件请求头重新请求
+                logger.info(f"♻️  页面 {page_num} 缓存的解析结果已被淘汰，重新完整请求")
+                pooled.bucket.acquire()
+                result = self.load_page(page_num, pooled, conditional=False)
+        
+        if result == 'not_found':
+            return {'comments': [], 'total': 0, 'not_found': True}
+        
+        if result in ('cf_challenge', None):
+            return None
+        
+        if result == 'not_modified':
+            return self.page_cache.get_result(url)
+        
+        parsed = self.parse_comments(result, page_num)
+        if parsed is None:
+            return {'comments': [], 'total': 0, 'not_found': True}
+        
+        self.page_cache.store_result(url, parsed)
+        return parsed
+    
+    def catch_up(self, start_page: int) -> int:
+        """追赶积压的页面
+        
+        每批并行抓取与会话数相同的页数（每个出口地址一页），按页码顺序处理，
+        遇到未满、不存在或抓取失败的页面时停止，交回正常轮询
+        
+        Returns:
+            下一个需要轮询的页面
+        """
+        size = len(self.session_pool)
+        page = start_page
+        
+        with ThreadPoolExecutor(max_workers=size, thread_name_prefix='catch-up') as executor:
+            while True:
+                pages = list(range(page, page + size))
+                logger.info(f"🏃 追赶：并行抓取页面 {pages[0]}-{pages[-1]}")
+                
+                for page_num, result in zip(pages, executor.map(self.fetch_page, pages)):
+                    if result is None or result.get('not_found'):
+                        return page
+                    
+                    if result['comments']:
+                        logger.info(f"🎉 页面 {page_num} 发现 {len(result['comments'])} 条评论")
+                        self.notify_new_comments(result['comments'])
+                    
+                    if result['total'] < 30:
+                        return page
+                    
+                    logger.info(f"✅ 页面 {page_num} 已满 ({result['total']} 条)")
+                    page += 1
+                    self.state_store.save_checkpoint(page)
+    
+    def mark_delivered(self, comment: Dict):
+        """评论通知发送成功（由发送队列线程回调）"""
+        self.seen_comments.add(comment['comment_id'], comment.get('page'))
     
     def notify_new_comments(self, comments: List[Dict]):
         """发送新评论通知"""
@@ -346,14 +485,25 @@ class LETMonitorCurlCffi:
             if comment_id in self.seen_comments:
                 continue
             
+            # 交给后台发送队列
+            if self.delivery:
+                if not self.delivery.is_pending(comment_id) and self.delivery.submit(comment):
+                    logger.info(f"📨 评论 {comment_id} 已加入发送队列")
+                continue
+            
             if self.notifier.send_comment_notification(comment):
-                self.seen_comments.add(comment_id)
+                self.seen_comments.add(comment_id, comment.get('page'))
                 logger.info(f"📤 已发送评论 {comment_id} 的通知")
             else:
                 logger.warning(f"⚠️  评论 {comment_id} 通知发送失败")
     
     def rotate_ipv6(self):
         """轮换 IPv6 地址"""
+        # bind 模式：换一个源地址，下一个请求立即生效
+        if self.source_pool:
+            self.source_pool.rotate()
+            return
+        
         logger.info("🌐 开始轮换 IPv6 地址...")
         try:
             result = subprocess.run(
@@ -371,6 +521,7 @@ class LETMonitorCurlCffi:
             else:
                 logger.warning(f"⚠️  IPv6 轮换失败: {result.stderr}")
             
+            route_changed()
             time.sleep(3)
             
         except Exception as e:
@@ -384,7 +535,8 @@ class LETMonitorCurlCffi:
             if not self.session:
                 self.init_session()
             
-            current_page = start_page or Config.START_PAGE
+            # 未指定起始页面时，从上次保存的进度继续
+            current_page = self.state_store.resume_page(start_page)
             
             logger.info(f"🎬 开始监控（curl_cffi 版本）")
             logger.info(f"🎯 起始页面: {current_page}")
@@ -397,10 +549,12 @@ class LETMonitorCurlCffi:
                     logger.info(f"🔍 检查页面 {current_page}")
                     logger.info(f"{'='*60}\n")
                     
-                    if self.current_page_num != current_page:
+                    # 第一次检查就已满，说明落后了（用于触发追赶）
+                    first_check = self.current_page_num != current_page
+                    if first_check:
                         self.current_page_num = current_page
                         self.fail_count = 0
-                        self.page_cf_retry_count = 0
+                        self.page_cf_retries.pop(current_page, None)
                     
                     result = self.check_page(current_page)
                     
@@ -408,17 +562,19 @@ class LETMonitorCurlCffi:
                     if result.get('skip_page'):
                         logger.warning(f"⏭️  跳过页面 {current_page}，切换到下一页")
                         current_page += 1
+                        self.state_store.save_checkpoint(current_page)
                         continue
                     
                     if result.get('not_found'):
-                        # 使用随机等待时间
-                        wait_time = random.randint(Config.WAIT_MIN, Config.WAIT_MAX)
-                        logger.warning(f"⏸️  页面 {current_page} 尚不存在，等待 {wait_time} 秒...")
+                        # 下一页出现的时间取决于发帖速度（POLL_SCHEDULER=fixed 时使用随机等待时间）
+                        wait_time = self.scheduler.next_wait(fallback=random.randint(Config.WAIT_MIN, Config.WAIT_MAX))
+                        logger.warning(f"⏸️  页面 {current_page} 尚不存在，等待 {wait_time:.0f} 秒...")
                         time.sleep(wait_time)
                         continue
                     
                     comments = result.get('comments', [])
                     total_comments = result.get('total', 0)
+                    self.scheduler.observe(current_page, result)
                     
                     if self.fail_count > 0:
                         logger.info(f"✅ 失败计数重置（之前 {self.fail_count} 次）")
@@ -426,7 +582,11 @@ class LETMonitorCurlCffi:
                     
                     self.pages_checked += 1
                     
-                    if comments:
+                    if result.get('unchanged'):
+                        logger.info(f"♻️  页面未变化（{total_comments} 条）")
+                        # 已通知的评论会被直接跳过，只重试之前发送失败的
+                        self.notify_new_comments(comments)
+                    elif comments:
                         logger.info(f"🎉 发现 {len(comments)} 条评论")
                         self.notify_new_comments(comments)
                     else:
@@ -435,7 +595,15 @@ class LETMonitorCurlCffi:
                     # 判断是否切换页面
                     if total_comments >= 30:
                         logger.info(f"✅ 页面已满 ({total_comments} 条)，切换")
-                        current_page += 1
+                        next_page = self.page_jumper.next_page(current_page, result)
+                        jumped = next_page > current_page + 1
+                        current_page = next_page
+                        self.state_store.save_checkpoint(current_page)
+                        
+                        # 落后但没有跳页时（分页中没有更后面的页码），用会话池按出口地址并行追赶后面的页面
+                        if first_check and not jumped and self.session_pool:
+                            current_page = self.catch_up(current_page)
+                            logger.info(f"📊 会话池：{self.session_pool.summary()}")
                         
                         # 定期切换 IPv6
                         if self.pages_checked >= Config.RESTART_INTERVAL:
@@ -443,13 +611,19 @@ class LETMonitorCurlCffi:
                             self.rotate_ipv6()
                             self.pages_checked = 0
                         
-                        # 页面已满，使用固定间隔
-                        logger.info(f"⏳ 等待 {Config.CHECK_INTERVAL} 秒...")
-                        time.sleep(Config.CHECK_INTERVAL)
+                        # 页面已满，下一页已经有评论（POLL_SCHEDULER=fixed 时使用固定间隔）
+                        wait_time = self.scheduler.next_wait(full=True, fallback=Config.CHECK_INTERVAL)
+                        logger.info(f"⏳ 等待 {wait_time:.0f} 秒...")
+                        time.sleep(wait_time)
                     else:
-                        # 页面未满，使用随机等待时间
-                        wait_time = random.randint(Config.WAIT_MIN, Config.WAIT_MAX)
-                        logger.info(f"⏳ 仅 {total_comments} 条，随机等待 {wait_time} 秒（{Config.WAIT_MIN}-{Config.WAIT_MAX}）...")
+                        self.state_store.save_checkpoint(current_page, total_comments)
+                        
+                        # 已追上最新页面，利用等待间隙补查跳过的页面
+                        self.page_jumper.backfill(self.check_page, self.notify_new_comments)
+                        
+                        # 页面未满，按发帖速度等待（POLL_SCHEDULER=fixed 时使用随机等待时间）
+                        wait_time = self.scheduler.next_wait(fallback=random.randint(Config.WAIT_MIN, Config.WAIT_MAX))
+                        logger.info(f"⏳ 仅 {total_comments} 条，等待 {wait_time:.0f} 秒...")
                         time.sleep(wait_time)
                     
                 except KeyboardInterrupt:
@@ -470,7 +644,17 @@ class LETMonitorCurlCffi:
         except Exception as e:
             logger.error(f"❌ 监控运行失败: {e}")
         finally:
+            self.close()
             logger.info("✅ 监控结束")
+    
+    def close(self):
+        """等待通知发送完毕并关闭会话池和数据库"""
+        if self.delivery:
+            self.delivery.close()
+        if self.session_pool:
+            self.session_pool.close()
+        self.state_store.close()
+        self.address_health.close()
 
 
 def main():
@@ -480,13 +664,24 @@ def main():
     parser = argparse.ArgumentParser(description='LowEndTalk Monitor - curl_cffi 版本')
     parser.add_argument('--start-page', type=int, help='起始页面')
     parser.add_argument('--test', action='store_true', help='测试模式')
+    parser.add_argument('--backfill', metavar='START:END', help='并行补查页面范围（可中断后继续）')
+    parser.add_argument('--notify', action='store_true', help='补查时为未通知过的评论发送通知')
     
     args = parser.parse_args()
     
     monitor = LETMonitorCurlCffi()
     
     try:
-        if args.test:
+        if args.backfill:
+            from backfill import Backfill, parse_range
+            
+            start_page, end_page = parse_range(args.backfill)
+            monitor.init_session()
+            try:
+                Backfill(monitor, start_page, end_page, notify=args.notify).run()
+            finally:
+                monitor.close()
+        elif args.test:
             logger.info("🧪 测试模式")
             monitor.init_session()
             
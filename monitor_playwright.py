@@ -5,17 +5,30 @@ LowEndTalk Monitor - Playwright 版本
 """
 
 import time
+import html
 import logging
 from logging.handlers import RotatingFileHandler
 from datetime import datetime
-from typing import List, Dict, Optional, Set
+from typing import List, Dict, Optional
 import subprocess
 import random
 
 from playwright.sync_api import sync_playwright, Page, Browser, BrowserContext
-from bs4 import BeautifulSoup
 
 from config import Config
+from comment_extractor import build_comment, extract_comments, parse_comment_time
+from cookie_jar import SharedCookieJar
+from page_cache import PageValidatorCache
+from state_store import StateStore
+from page_jump import PageJumper
+from poll_scheduler import AdaptiveScheduler
+from telegram_queue import TelegramDeliveryQueue
+from browser_watchdog import BrowserWatchdog, MEMORY, PAGES, UNRESPONSIVE
+from resource_policy import ResourcePolicy
+from browser_profile import BrowserProfile
+from source_bind import current_address, route_changed, shared_pool, shared_proxy
+from ipv6_health import AddressHealth, CHALLENGE, OK as REQUEST_OK
+from page_scripts import CF_PROBE_JS, CF_TEXT_KEYWORDS, EXTRACT_COMMENTS_JS, cf_challenge_reason
 
 # 配置日志 - 使用轮转日志
 file_handler = RotatingFileHandler(
@@ -37,6 +50,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 重启范围（由轻到重）：只重建 BrowserContext / 重启浏览器进程 / 连同 Playwright driver 一起重启
+RECYCLE_CONTEXT = 'context'
+RECYCLE_BROWSER = 'browser'
+RECYCLE_FULL = 'full'
+RECYCLE_LEVELS = (RECYCLE_CONTEXT, RECYCLE_BROWSER, RECYCLE_FULL)
+RECYCLE_LEVEL_NAMES = {
+    RECYCLE_CONTEXT: '重建上下文',
+    RECYCLE_BROWSER: '重启浏览器',
+    RECYCLE_FULL: '完全重启',
+}
+
+# 内存回收后仍高于上限的这个比例时，升级到更重的重启
+MEMORY_ESCALATE_RATIO = 0.8
+
 
 class TelegramNotifier:
     """Telegram 通知器"""
@@ -46,31 +73,37 @@ class TelegramNotifier:
         self.chat_id = chat_id
         self.base_url = f"https://api.telegram.org/bot{bot_token}"
     
-    def send_comment_notification(self, comment: Dict) -> bool:
-        """发送评论通知"""
-        try:
-            import requests
-            
-            message = f"""🔔 发现 {Config.TARGET_USER} 的新评论！
+    def format_comment(self, comment: Dict) -> str:
+        """生成评论通知消息"""
+        # 在转义之前截断原始内容，避免切断 HTML 实体
+        content = comment['content'][:800] + ('...' if len(comment['content']) > 800 else '')
+        message = f"""🔔 发现 {Config.TARGET_USER} 的新评论！
 
 📝 评论内容：
-{comment['content']}
+{html.escape(content)}
 
 ⏰ 时间：{comment['timestamp']}
 🔗 链接：{comment['link']}
 📄 页面：{comment['page']}
 """
-            
-            # 如果有提取的链接，单独列出
-            if comment.get('links'):
-                message += "\n🔗 评论中的链接：\n"
-                for i, link in enumerate(comment['links'], 1):
-                    message += f"{i}. {link}\n"
+        
+        # 如果有提取的链接，单独列出
+        if comment.get('links'):
+            message += "\n🔗 评论中的链接：\n"
+            for i, link in enumerate(comment['links'][:10], 1):  # 最多显示10个链接
+                message += f"{i}. {html.escape(link)}\n"
+        
+        return message
+    
+    def send_comment_notification(self, comment: Dict) -> bool:
+        """发送评论通知"""
+        try:
+            import requests
             
             url = f"{self.base_url}/sendMessage"
             data = {
                 'chat_id': self.chat_id,
-                'text': message,
+                'text': self.format_comment(comment),
                 'parse_mode': 'HTML',
                 'disable_web_page_preview': True
             }
@@ -84,25 +117,73 @@ class TelegramNotifier:
 
 
 class LETMonitorPlaywright:
-    """LowEndTalk 监控器 - Playwright 版本"""
+    """LowEndTalk 监控器 - Playwright 版本
+
+    Args:
+        parent: 分级抓取时的 curl_cffi 监控器，共用它的状态存储、地址统计和 Telegram 发送队列
+                （每个进程一个数据库连接和一个发送线程），为 None 时自己创建
+    """
     
-    def __init__(self):
+    USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+    
+    LAUNCH_ARGS = [
+        '--disable-blink-features=AutomationControlled',
+        '--no-sandbox',
+        '--disable-dev-shm-usage',
+    ]
+    
+    # 上下文参数（模拟真实浏览器）
+    CONTEXT_OPTIONS = dict(
+        viewport={'width': 1920, 'height': 1080},
+        user_agent=USER_AGENT,
+        locale='zh-CN',
+        timezone_id='Asia/Shanghai',
+        # 接受语言
+        extra_http_headers={
+            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+        }
+    )
+    
+    def __init__(self, parent=None):
         self.config = Config
         self.playwright = None
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
         
-        self.notifier = TelegramNotifier(
+        self.owns_state = parent is None  # cleanup 时是否关闭状态存储、地址统计和发送队列
+        self.notifier = parent.notifier if parent else TelegramNotifier(
             Config.TELEGRAM_BOT_TOKEN,
             Config.TELEGRAM_CHAT_ID
         )
-        self.seen_comments: Set[str] = set()
+        self.state_store = parent.state_store if parent else StateStore()  # 持久化的通知记录和监控进度
+        self.seen_comments = self.state_store.seen
+        self.page_jumper = PageJumper(self.state_store)  # 落后时跳到最后一页，补查跳过的页面
+        self.scheduler = AdaptiveScheduler(self.state_store)  # 按发帖速度决定轮询间隔
         self.pages_checked = 0
+        self.watchdog = BrowserWatchdog()  # 浏览器进程树内存监控
+        self.resource_policy = ResourcePolicy() if Config.BLOCK_RESOURCES else None  # 拦截非必要资源
+        self.profile = BrowserProfile()  # 持久化配置目录（BROWSER_PROFILE_DIR 为空时不启用）
+        self.profile_slot = 0  # 当前使用的配置目录（预热备用浏览器时使用另一个）
+        self.source_pool = shared_pool()  # IPV6_BIND_MODE=bind 时浏览器经本地代理绑定出口地址
+        self.address_health = parent.address_health if parent else AddressHealth()  # 各出口地址的挑战率和延迟
+        self.cookie_jar = SharedCookieJar()
+        self.page_cache = PageValidatorCache()  # 评论区摘要，未变化时跳过解析
+        
+        # Telegram 后台发送队列（TELEGRAM_QUEUE=false 时在抓取线程中同步发送）
+        if parent:
+            self.delivery = parent.delivery
+        else:
+            self.delivery = TelegramDeliveryQueue(
+                self.notifier,
+                on_delivered=self.mark_delivered,
+                disable_web_page_preview=True
+            ) if Config.TELEGRAM_QUEUE else None
         
         # Cloudflare 卡住检测
         self.current_page_num = None
         self.cf_fail_count = 0
+        self.cf_restarts = 0  # CF 卡住后连续重启次数（页面恢复正常时清零）
     
     def init_browser(self):
         """初始化 Playwright 浏览器"""
@@ -110,46 +191,7 @@ class LETMonitorPlaywright:
             logger.info("🚀 初始化 Playwright 浏览器...")
             
             self.playwright = sync_playwright().start()
-            
-            # 启动浏览器
-            self.browser = self.playwright.chromium.launch(
-                headless=Config.HEADLESS,
-                args=[
-                    '--disable-blink-features=AutomationControlled',
-                    '--no-sandbox',
-                    '--disable-dev-shm-usage',
-                ]
-            )
-            
-            # 创建上下文（模拟真实浏览器）
-            self.context = self.browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                user_agent='Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                locale='zh-CN',
-                timezone_id='Asia/Shanghai',
-                # 接受语言
-                extra_http_headers={
-                    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-                }
-            )
-            
-            # 创建页面
-            self.page = self.context.new_page()
-            
-            # 隐藏自动化特征
-            self.page.add_init_script("""
-                Object.defineProperty(navigator, 'webdriver', {
-                    get: () => undefined
-                });
-                
-                Object.defineProperty(navigator, 'plugins', {
-                    get: () => [1, 2, 3, 4, 5]
-                });
-                
-                Object.defineProperty(navigator, 'languages', {
-                    get: () => ['zh-CN', 'zh', 'en']
-                });
-            """)
+            self.browser, self.context, self.page = self._launch_browser()
             
             logger.info("✅ Playwright 浏览器初始化成功")
             logger.info("💡 Playwright 提供更好的 Cloudflare 绕过能力")
@@ -158,6 +200,110 @@ class LETMonitorPlaywright:
             logger.error(f"❌ Playwright 浏览器初始化失败: {e}")
             raise
     
+    def _launch_browser(self, slot: Optional[int] = None):
+        """启动浏览器并创建上下文和页面（init_browser 和预热备用浏览器共用）
+        
+        启用持久化配置目录时使用 launch_persistent_context，此时返回的 browser 为 None
+        """
+        user_data_dir = self.profile.prepare(f"playwright-{self.profile_slot if slot is None else slot}")
+        
+        launch_options = dict(headless=Config.HEADLESS, args=self.LAUNCH_ARGS)
+        if self.source_pool:
+            # bind 模式：所有连接经本地代理从选定的 IPv6 出站
+            launch_options['proxy'] = {'server': shared_proxy().url}
+        
+        if user_data_dir:
+            # 持久化配置：保留上次的 cookie、缓存
+            browser = None
+            context = self.playwright.chromium.launch_persistent_context(
+                user_data_dir,
+                **launch_options,
+                **self.CONTEXT_OPTIONS
+            )
+            logger.info(f"📁 使用浏览器配置目录: {user_data_dir}")
+        else:
+            # 启动浏览器
+            browser = self.playwright.chromium.launch(**launch_options)
+            context = None
+        
+        context, page = self._new_context(browser, context)
+        return browser, context, page
+    
+    def _new_context(self, browser: Optional[Browser], context: Optional[BrowserContext] = None):
+        """在已有浏览器中创建上下文和页面（传入 context 时只做初始化）"""
+        if context is None:
+            context = browser.new_context(**self.CONTEXT_OPTIONS)
+        
+        # 拦截图片、字体和第三方请求（放行 Cloudflare 挑战和站点自身的 HTML / JS）
+        if self.resource_policy:
+            context.route('**/*', self.resource_policy.handle)
+        
+        # 恢复之前通过挑战得到的 cookie
+        self.import_cookies(context)
+        
+        # 创建页面（持久化上下文启动时已有一个空白页）
+        page = context.pages[0] if context.pages else context.new_page()
+        
+        # 隐藏自动化特征
+        page.add_init_script("""
+            Object.defineProperty(navigator, 'webdriver', {
+                get: () => undefined
+            });
+            
+            Object.defineProperty(navigator, 'plugins', {
+                get: () => [1, 2, 3, 4, 5]
+            });
+            
+            Object.defineProperty(navigator, 'languages', {
+                get: () => ['zh-CN', 'zh', 'en']
+            });
+        """)
+        
+        return context, page
+    
+    def import_cookies(self, context: Optional[BrowserContext] = None):
+        """从共享存储恢复 cookie（仅当 User-Agent 一致时，cf_clearance 与 UA 绑定）"""
+        context = context or self.context
+        try:
+            self.cookie_jar.load()
+            if self.cookie_jar.user_agent != self.USER_AGENT:
+                return
+            
+            cookies = []
+            for c in self.cookie_jar.valid_cookies():
+                cookie = {
+                    'name': c['name'],
+                    'value': c['value'],
+                    'domain': c['domain'],
+                    'path': c['path'],
+                    'secure': c['secure'],
+                }
+                if c.get('expires'):
+                    cookie['expires'] = c['expires']
+                cookies.append(cookie)
+            
+            if cookies:
+                context.add_cookies(cookies)
+                logger.info(f"🍪 已恢复 {len(cookies)} 个 cookie")
+        except Exception as e:
+            logger.warning(f"⚠️  恢复 cookie 失败: {e}")
+    
+    def export_cookies(self):
+        """导出 cookie 和 User-Agent 到共享存储，供 curl_cffi 会话复用"""
+        if not self.context or not self.page:
+            return
+        
+        try:
+            cookies = SharedCookieJar.normalize_playwright_cookies(self.context.cookies())
+            user_agent = self.page.evaluate('navigator.userAgent')
+            # context 改写了 User-Agent，实际版本从 CDP 读取（product 为 Chrome/131.0.6778.33）
+            cdp = self.context.new_cdp_session(self.page)
+            browser_version = cdp.send('Browser.getVersion')['product']
+            cdp.detach()
+            self.cookie_jar.save(cookies, user_agent, browser_version)
+        except Exception as e:
+            logger.warning(f"⚠️  导出 cookie 失败: {e}")
+    
     def get_page_url(self, page_num: int) -> str:
         """获取页面 URL"""
         return f"{Config.THREAD_BASE_URL}{page_num}"
@@ -173,14 +319,13 @@ class LETMonitorPlaywright:
             self.page.wait_for_load_state('networkidle', timeout=timeout * 1000)
             
             # 检查是否仍在 Cloudflare 页面
-            content = self.page.content()
-            cf_keywords = ['cloudflare', 'just a moment', '请稍候', '正在验证']
-            
-            if any(keyword in content.lower() for keyword in cf_keywords):
-                logger.warning("⚠️  Cloudflare 挑战未通过")
+            reason = cf_challenge_reason(self.page.evaluate(CF_PROBE_JS, CF_TEXT_KEYWORDS))
+            if reason:
+                logger.warning(f"⚠️  Cloudflare 挑战未通过（{reason}）")
                 return False
             
             logger.info("✅ Cloudflare 挑战已通过")
+            self.export_cookies()
             return True
             
         except Exception as e:
@@ -192,6 +337,10 @@ class LETMonitorPlaywright:
         try:
             url = self.get_page_url(page_num)
             logger.info(f"📖 加载页面: {url}")
+            start_time = time.time()
+            
+            if self.resource_policy:
+                self.resource_policy.reset_stats()
             
             # Playwright 加载页面
             response = self.page.goto(url, wait_until='domcontentloaded', timeout=30000)
@@ -200,17 +349,19 @@ class LETMonitorPlaywright:
                 logger.error("❌ 页面加载失败：无响应")
                 return False
             
+            navigation_time = time.time() - start_time
+            
             # 添加随机延迟（模拟人类）
             time.sleep(random.uniform(1, 3))
             
-            # 检查 Cloudflare
-            content = self.page.content()
-            cf_keywords = ['cloudflare', 'just a moment', '请稍候', '正在检查', '正在验证']
+            # 检查 Cloudflare（页面内探测，不取整个 HTML）
+            cf_reason = cf_challenge_reason(self.page.evaluate(CF_PROBE_JS, CF_TEXT_KEYWORDS))
             
-            cf_detected = any(keyword in content.lower() for keyword in cf_keywords)
+            # 按出口地址统计挑战率和延迟（轮换时据此选择地址）
+            self.address_health.record(current_address(), CHALLENGE if cf_reason else REQUEST_OK, navigation_time)
             
-            if cf_detected:
-                logger.info("🔍 检测到 Cloudflare 挑战")
+            if cf_reason:
+                logger.info(f"🔍 检测到 Cloudflare 挑战：{cf_reason}")
                 if not self.wait_for_cloudflare():
                     # Cloudflare 挑战失败，计数
                     self.cf_fail_count += 1
@@ -237,111 +388,67 @@ class LETMonitorPlaywright:
                 logger.warning(f"⚠️  等待元素超时: {e}")
                 # 继续尝试，可能已经加载了部分内容
             
-            logger.info(f"✅ 页面 {page_num} 加载成功")
+            logger.info(f"✅ 页面 {page_num} 加载成功（{time.time() - start_time:.1f} 秒）")
+            if self.resource_policy:
+                logger.info(f"🚫 资源拦截：{self.resource_policy.summary()}")
             return True
             
         except Exception as e:
             logger.error(f"❌ 加载页面 {page_num} 失败: {e}")
             return False
     
+    def evaluate_comments(self, page_num: int) -> Optional[Dict]:
+        """在页面内提取评论（一次 page.evaluate，只传回评论数和命中的评论）"""
+        data = self.page.evaluate(EXTRACT_COMMENTS_JS, {
+            'target_user': Config.TARGET_USER,
+            'image_url': Config.REQUIRED_IMAGE_URL,
+            'filter_blockquote': Config.FILTER_BLOCKQUOTE,
+        })
+        
+        if data.get('not_found'):
+            return None
+        
+        url = self.get_page_url(page_num)
+        comments = [
+            build_comment(c['comment_id'], c['author'], c['timestamp'], c['content'], c['links'], page_num, url)
+            for c in data['comments']
+        ]
+        
+        logger.info(f"📊 找到 {data['total']} 条评论")
+        for comment in comments:
+            logger.info(f"🎯 发现 {Config.TARGET_USER} 的评论: {comment['comment_id']}")
+        
+        times = sorted(t for t in map(parse_comment_time, data.get('times', [])) if t is not None)
+        return {'comments': comments, 'total': data['total'], 'last_page': data.get('last_page'), 'comment_times': times}
+    
     def parse_comments(self, page_num: int) -> Dict:
         """解析页面中的评论"""
+        try:
+            result = self.evaluate_comments(page_num)
+            if result is None:
+                logger.warning(f"⚠️  页面 {page_num} 尚不存在，等待中...")
+            return result
+        except Exception as e:
+            logger.warning(f"⚠️  页面内提取失败，改为解析 HTML: {e}")
+        
         try:
             # 获取页面内容
             page_source = self.page.content()
-            soup = BeautifulSoup(page_source, 'lxml')
             
-            # 检查是否是 "Page not found" 页面
-            page_not_found = soup.find('h1', string='Page not found.')
-            not_found_msg = soup.find('div', {'id': 'Message'})
+            # 评论区与上次相同，直接复用上次的解析结果
+            url = self.get_page_url(page_num)
+            if self.page_cache.is_unchanged(url, page_source):
+                logger.info(f"♻️  页面 {page_num} 评论区未变化，跳过解析")
+                return dict(self.page_cache.get_result(url), unchanged=True)
+            
+            result = extract_comments(page_source, page_num, url)
             
-            if page_not_found or (not_found_msg and 'could not be found' in not_found_msg.get_text()):
+            if result is None:
                 logger.warning(f"⚠️  页面 {page_num} 尚不存在，等待中...")
                 return None
             
-            comments = []
-            comment_items = soup.find_all('li', class_=lambda x: x and 'ItemComment' in x)
-            total_comments = len(comment_items)
-            
-            logger.info(f"📊 找到 {total_comments} 条评论")
-            
-            for item in comment_items:
-                try:
-                    comment_id = item.get('id', '')
-                    author_elem = item.find('a', class_='Username')
-                    
-                    if not author_elem:
-                        continue
-                    
-                    author = author_elem.get_text(strip=True)
-                    
-                    # 检查是否是目标用户
-                    if author != Config.TARGET_USER:
-                        continue
-                    
-                    # 提取时间
-                    time_elem = item.find('time')
-                    timestamp = time_elem.get('datetime', '') if time_elem else ''
-                    time_text = time_elem.get('title', '') if time_elem else ''
-                    
-                    # 提取评论内容和链接
-                    message_elem = item.find('div', class_='Message userContent')
-                    if message_elem:
-                        # ===== 筛选条件检查 =====
-                        required_image = message_elem.find('img', src=Config.REQUIRED_IMAGE_URL)
-                        has_blockquote = message_elem.find('blockquote') is not None
-                        
-                        if not required_image:
-                            logger.debug(f"跳过评论 {comment_id}: 不包含指定图片")
-                            continue
-                        
-                        if Config.FILTER_BLOCKQUOTE and has_blockquote:
-                            logger.debug(f"跳过评论 {comment_id}: 包含引用(blockquote)")
-                            continue
-                        
-                        logger.info(f"✅ 评论 {comment_id} 通过筛选")
-                        
-                        # 提取纯文本内容
-                        content = message_elem.get_text(separator='\n', strip=True)
-                        
-                        # 提取所有链接
-                        links = []
-                        for a_tag in message_elem.find_all('a', href=True):
-                            href = a_tag.get('href', '')
-                            if href and not href.startswith('#') and not href.startswith('javascript:'):
-                                if href.startswith('/'):
-                                    href = f"https://lowendtalk.com{href}"
-                                links.append(href)
-                        
-                        if links:
-                            content += '\n\n📎 链接:\n' + '\n'.join(f'- {link}' for link in links)
-                    else:
-                        content = ''
-                        links = []
-                    
-                    comment_link = f"{self.get_page_url(page_num)}#{comment_id}"
-                    
-                    comment = {
-                        'comment_id': comment_id,
-                        'author': author,
-                        'timestamp': time_text or timestamp,
-                        'content': content,
-                        'links': links,
-                        'link': comment_link,
-                        'page': page_num
-                    }
-                    
-                    comments.append(comment)
-                    logger.info(f"🎯 发现 {Config.TARGET_USER} 的评论: {comment_id}")
-                    
-                except Exception as e:
-                    logger.error(f"解析单条评论失败: {e}")
-                    continue
-            
-            return {
-                'comments': comments,
-                'total': total_comments
-            }
+            self.page_cache.store_result(url, result)
+            return result
             
         except Exception as e:
             logger.error(f"❌ 解析评论失败: {e}")
@@ -377,6 +484,10 @@ class LETMonitorPlaywright:
         
         return {'comments': [], 'total': 0}
     
+    def mark_delivered(self, comment: Dict):
+        """评论通知发送成功（由发送队列线程回调）"""
+        self.seen_comments.add(comment['comment_id'], comment.get('page'))
+    
     def notify_new_comments(self, comments: List[Dict]):
         """发送新评论通知"""
         for comment in comments:
@@ -385,76 +496,220 @@ class LETMonitorPlaywright:
             if comment_id in self.seen_comments:
                 continue
             
+            # 交给后台发送队列
+            if self.delivery:
+                if not self.delivery.is_pending(comment_id) and self.delivery.submit(comment):
+                    logger.info(f"📨 评论 {comment_id} 已加入发送队列")
+                continue
+            
             if self.notifier.send_comment_notification(comment):
-                self.seen_comments.add(comment_id)
+                self.seen_comments.add(comment_id, comment.get('page'))
                 logger.info(f"📤 已发送评论 {comment_id} 的通知")
             else:
                 logger.warning(f"⚠️  评论 {comment_id} 通知发送失败")
     
-    def restart_browser(self, rotate_ipv6=False):
-        """重启浏览器"""
-        logger.info("🔄 重启 Playwright 浏览器...")
+    def is_browser_alive(self) -> bool:
+        """浏览器是否仍能响应"""
+        try:
+            if self.browser and not self.browser.is_connected():
+                return False
+            return self.page.evaluate('1') == 1
+        except Exception as e:
+            logger.warning(f"⚠️  浏览器无响应: {e}")
+            return False
+    
+    def recycle_level(self, kind: Optional[str]) -> str:
+        """按回收原因选择最轻的重启范围
         
-        # 关闭旧浏览器
-        if self.page:
-            try:
-                self.page.close()
-            except:
-                pass
+        - 页面崩溃 / 无响应：浏览器仍连接时只重建上下文，浏览器断开时重启浏览器
+        - 内存 / 渲染进程超限：先重建上下文（渲染进程随上下文关闭），内存仍高时在 recycle_browser 中升级
+        - 按页数定期重启（RECYCLE_MODE=pages）：重启浏览器
+        """
+        if kind == UNRESPONSIVE:
+            if self.browser is not None and self.browser.is_connected():
+                return RECYCLE_CONTEXT
+            return RECYCLE_BROWSER
         
-        if self.context:
-            try:
-                self.context.close()
-            except:
-                pass
+        if kind == PAGES:
+            return RECYCLE_BROWSER
         
-        if self.browser:
+        return RECYCLE_CONTEXT
+    
+    def recycle_browser(self, level: str = RECYCLE_BROWSER):
+        """回收浏览器
+        
+        重建上下文很快（不启动新进程），直接在当前浏览器中完成；
+        因内存回收时，重启后内存仍接近上限则逐级升级（上下文 → 浏览器 → Playwright driver）。
+        重启浏览器时若开启 WARM_STANDBY，先启动新浏览器并预热（打开帖子、通过挑战），
+        成功后再切换并关闭旧浏览器；预热失败时保留旧浏览器继续使用。
+        Playwright 同步 API 不能跨线程使用，备用浏览器只能在主线程中同步预热，
+        run() 把回收耗时从随后的轮询等待中扣除，预热隐藏在轮询间隔内而不是叠加在上面
+        """
+        if level != RECYCLE_BROWSER or not Config.WARM_STANDBY or not self.is_browser_alive():
+            self.restart_browser(level=level)
+        else:
+            self.swap_standby_browser()
+        
+        if self.watchdog.last_kind != MEMORY or not self.watchdog.enabled:
+            return
+        
+        # 检查重启是否解决了内存问题
+        while level != RECYCLE_FULL:
+            rss_mb = self.watchdog.sample()['rss_mb']
+            if rss_mb < self.watchdog.max_rss_mb * MEMORY_ESCALATE_RATIO:
+                break
+            
+            level = RECYCLE_LEVELS[RECYCLE_LEVELS.index(level) + 1]
+            logger.warning(f"⚠️  重启后内存仍有 {rss_mb:.0f} MB，升级为{RECYCLE_LEVEL_NAMES[level]}")
+            self.restart_browser(level=level)
+    
+    def swap_standby_browser(self):
+        """启动并预热新浏览器，成功后切换"""
+        logger.info("🔥 启动并预热备用浏览器...")
+        start_time = time.time()
+        
+        # 新浏览器导入当前 cookie，通常可以直接跳过挑战
+        self.export_cookies()
+        
+        slot = 1 - self.profile_slot
+        browser = context = None
+        try:
+            browser, context, page = self._launch_browser(slot)
+            page.goto(
+                self.get_page_url(self.current_page_num or Config.START_PAGE),
+                wait_until='domcontentloaded',
+                timeout=60000
+            )
+            # 评论列表出现说明已通过 Cloudflare 挑战
+            page.wait_for_selector('.MessageList', timeout=(Config.CLOUDFLARE_TIMEOUT + 20) * 1000)
+        except Exception as e:
+            logger.warning(f"⚠️  备用浏览器预热失败，继续使用当前浏览器: {e}")
+            if browser or context:
+                try:
+                    (browser or context).close()
+                except:
+                    pass
+            return
+        
+        old = self.browser or self.context
+        self.browser, self.context, self.page = browser, context, page
+        self.profile_slot = slot
+        self.pages_checked = 0
+        self.watchdog.reset()
+        
+        try:
+            old.close()
+        except:
+            pass
+        
+        logger.info(f"🔁 已切换到预热好的浏览器（耗时 {time.time() - start_time:.1f} 秒）")
+    
+    def _close_browser(self, level: str):
+        """按重启范围关闭页面、上下文、浏览器和 Playwright driver"""
+        targets = [('page', self.page), ('context', self.context)]
+        if level != RECYCLE_CONTEXT:
+            targets.append(('browser', self.browser))
+        if level == RECYCLE_FULL:
+            targets.append(('playwright', self.playwright))
+        
+        for name, target in targets:
+            if target is None:
+                continue
             try:
-                self.browser.close()
+                if name == 'playwright':
+                    target.stop()
+                else:
+                    target.close()
             except:
                 pass
+            setattr(self, name, None)
+    
+    def rotate_ipv6(self):
+        """轮换 IPv6 地址"""
+        # bind 模式：换一个源地址，本地代理断开旧连接，新连接立即使用新地址
+        if self.source_pool:
+            self.source_pool.rotate()
+            return
+        
+        logger.info("🌐 开始轮换 IPv6 地址...")
+        try:
+            result = subprocess.run(
+                ['python3', 'ipv6_rotate.py'],
+                capture_output=True,
+                text=True,
+                timeout=10
+            )
+            
+            if result.returncode == 0:
+                logger.info("✅ IPv6 轮换成功")
+                for line in result.stdout.split('\n'):
+                    if line.strip():
+                        logger.info(f"   {line}")
+            else:
+                logger.warning(f"⚠️  IPv6 轮换失败: {result.stderr}")
+            
+            route_changed()
+            time.sleep(3)
+            
+        except Exception as e:
+            logger.error(f"❌ IPv6 轮换出错: {e}")
+    
+    def restart_browser(self, rotate_ipv6=False, level: str = RECYCLE_BROWSER):
+        """重启浏览器
+        
+        level 决定重启范围：
+        - context：关闭上下文和页面，在同一个浏览器中新建（不启动新进程，约百毫秒）
+        - browser：关闭并重新启动浏览器进程，Playwright driver 保留
+        - full：连同 Playwright driver 一起重启
+        某一级失败时自动升级到下一级；使用持久化配置目录时上下文即浏览器，context 按 browser 处理
+        """
+        if level == RECYCLE_CONTEXT and (self.browser is None or not self.browser.is_connected()):
+            level = RECYCLE_BROWSER
+        
+        logger.info(f"🔄 {RECYCLE_LEVEL_NAMES[level]}...")
+        start_time = time.time()
         
-        time.sleep(2)
+        # 关闭前保存 cookie，新上下文 / 新浏览器和 curl_cffi 会话可以继续使用
+        self.export_cookies()
         
-        # IPv6 轮换
+        self._close_browser(level)
+        
+        if level == RECYCLE_FULL:
+            time.sleep(2)
+        
+        # IPv6 轮换（新上下文使用独立的网络连接，不会复用旧地址的连接）
         if rotate_ipv6:
-            logger.info("🌐 开始轮换 IPv6 地址...")
-            try:
-                result = subprocess.run(
-                    ['python3', 'ipv6_rotate.py'],
-                    capture_output=True,
-                    text=True,
-                    timeout=10
-                )
-                
-                if result.returncode == 0:
-                    logger.info("✅ IPv6 轮换成功")
-                    for line in result.stdout.split('\n'):
-                        if line.strip():
-                            logger.info(f"   {line}")
-                else:
-                    logger.warning(f"⚠️  IPv6 轮换失败: {result.stderr}")
-                
-                time.sleep(3)
-                
-            except Exception as e:
-                logger.error(f"❌ IPv6 轮换出错: {e}")
+            self.rotate_ipv6()
         
-        # 初始化新浏览器
-        self.init_browser()
+        try:
+            if level == RECYCLE_CONTEXT:
+                self.context, self.page = self._new_context(self.browser)
+            elif level == RECYCLE_BROWSER:
+                self.browser, self.context, self.page = self._launch_browser()
+            else:
+                self.init_browser()
+        except Exception as e:
+            if level == RECYCLE_FULL:
+                raise
+            next_level = RECYCLE_LEVELS[RECYCLE_LEVELS.index(level) + 1]
+            logger.warning(f"⚠️  {RECYCLE_LEVEL_NAMES[level]}失败: {e}，改为{RECYCLE_LEVEL_NAMES[next_level]}")
+            self.restart_browser(level=next_level)
+            return
         
         self.pages_checked = 0
-        logger.info("✅ Playwright 浏览器重启完成")
+        self.watchdog.reset()
+        logger.info(f"✅ {RECYCLE_LEVEL_NAMES[level]}完成（耗时 {time.time() - start_time:.1f} 秒）")
     
     def run(self, start_page: Optional[int] = None):
         """运行监控"""
         try:
             Config.validate()
             
-            if not self.browser:
+            if not self.context:
                 self.init_browser()
             
-            current_page = start_page or Config.START_PAGE
+            # 未指定起始页面时，从上次保存的进度继续
+            current_page = self.state_store.resume_page(start_page)
             
             logger.info(f"🎬 开始监控（Playwright 版本）")
             logger.info(f"🎯 起始页面: {current_page}")
@@ -476,16 +731,18 @@ class LETMonitorPlaywright:
                     
                     if result.get('not_found'):
                         logger.warning(f"⏸️  页面 {current_page} 尚不存在，等待...")
-                        time.sleep(Config.CHECK_INTERVAL)
+                        time.sleep(self.scheduler.next_wait())
                         continue
                     
                     comments = result.get('comments', [])
                     total_comments = result.get('total', 0)
+                    self.scheduler.observe(current_page, result)
                     
                     # 成功加载，重置计数
                     if self.cf_fail_count > 0:
                         logger.info(f"✅ CF 失败计数重置（之前 {self.cf_fail_count} 次）")
                         self.cf_fail_count = 0
+                    self.cf_restarts = 0
                     
                     self.pages_checked += 1
                     
@@ -498,16 +755,27 @@ class LETMonitorPlaywright:
                     # 判断是否切换页面
                     if total_comments >= 30:
                         logger.info(f"✅ 页面已满 ({total_comments} 条)，切换")
-                        current_page += 1
-                        
-                        if self.pages_checked >= Config.RESTART_INTERVAL:
-                            logger.info(f"📊 已检查 {self.pages_checked} 页，重启")
-                            self.restart_browser()
+                        current_page = self.page_jumper.next_page(current_page, result)
+                        self.state_store.save_checkpoint(current_page)
                     else:
                         logger.info(f"⏳ 仅 {total_comments} 条，继续等待...")
+                        self.state_store.save_checkpoint(current_page, total_comments)
+                        self.page_jumper.backfill(self.check_page, self.notify_new_comments)
                     
-                    logger.info(f"⏳ 等待 {Config.CHECK_INTERVAL} 秒...")
-                    time.sleep(Config.CHECK_INTERVAL)
+                    # 内存或渲染进程数超限、或浏览器无响应时才重启
+                    reason = self.watchdog.recycle_reason(self.pages_checked, total_comments >= 30, self.is_browser_alive)
+                    recycle_time = 0.0
+                    if reason:
+                        level = self.recycle_level(self.watchdog.last_kind)
+                        logger.info(f"📊 {reason}，{RECYCLE_LEVEL_NAMES[level]}")
+                        recycle_start = time.time()
+                        self.recycle_browser(level)
+                        recycle_time = time.time() - recycle_start
+                    
+                    # 回收（包括同步预热备用浏览器）已经用掉的时间计入本次等待，不推迟下一次检查
+                    wait_time = max(0.0, self.scheduler.next_wait(full=total_comments >= 30) - recycle_time)
+                    logger.info(f"⏳ 等待 {wait_time:.0f} 秒...")
+                    time.sleep(wait_time)
                     
                 except KeyboardInterrupt:
                     logger.info("\n⏹️  收到中断信号，停止监控...")
@@ -517,9 +785,12 @@ class LETMonitorPlaywright:
                     error_msg = str(e)
                     
                     if "Cloudflare" in error_msg or "需要重启" in error_msg:
-                        logger.error(f"🔄 CF 卡住，重启并切换 IPv6...")
+                        # 先换 IPv6 并重建上下文（新 cookie、新连接），连续卡住再重启浏览器
+                        level = RECYCLE_CONTEXT if self.cf_restarts == 0 else RECYCLE_BROWSER
+                        logger.error(f"🔄 CF 卡住，切换 IPv6 并{RECYCLE_LEVEL_NAMES[level]}...")
                         try:
-                            self.restart_browser(rotate_ipv6=True)
+                            self.restart_browser(rotate_ipv6=True, level=level)
+                            self.cf_restarts += 1
                             self.cf_fail_count = 0
                             time.sleep(5)
                             continue
@@ -539,6 +810,8 @@ class LETMonitorPlaywright:
         """清理资源"""
         logger.info("🧹 清理资源...")
         
+        self.export_cookies()
+        
         if self.page:
             try:
                 self.page.close()
@@ -563,6 +836,11 @@ class LETMonitorPlaywright:
             except:
                 pass
         
+        if self.owns_state:
+            if self.delivery:
+                self.delivery.close()
+            self.state_store.close()
+            self.address_health.close()
         logger.info("✅ 清理完成")
 
 
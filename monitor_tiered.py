@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+LowEndTalk Monitor - 分级抓取版本
+默认使用 curl_cffi 轻量请求，只有遇到 Cloudflare 挑战时才升级到浏览器，
+浏览器通过挑战后下一次轮询立即降回 curl_cffi
+"""
+
+import time
+import logging
+from typing import Dict, Optional, Union
+
+from config import Config
+from monitor_curlcffi import LETMonitorCurlCffi
+from session_pool import PooledSession
+
+logger = logging.getLogger(__name__)
+
+
+class LETMonitorTiered(LETMonitorCurlCffi):
+    """LowEndTalk 监控器 - 分级抓取版本
+
+    第一级：curl_cffi 会话（一次 HTTP 请求）
+    第二级：Playwright / undetected-chromedriver 浏览器（仅在 CF 挑战时使用）
+    """
+
+    def __init__(self, browser_type: Optional[str] = None):
+        super().__init__()
+        self.browser_type = (browser_type or Config.TIER_BROWSER).lower()
+        self.browser = None  # 按需创建的浏览器监控器
+        self.browser_last_used = 0.0
+        self.browser_cf_fails: Dict[int, int] = {}  # 浏览器在各页面的 CF 失败次数（补查的页面单独计数）
+        self.browser_only = False  # cf_clearance 无法交给 curl_cffi 时，在其有效期内直接使用浏览器
+
+        # 统计
+        self.http_fetches = 0
+        self.browser_fetches = 0
+
+    def init_browser(self):
+        """按需启动浏览器（第二级，与本实例共用状态存储、地址统计和发送队列）"""
+        if self.browser_type == 'uc':
+            from monitor import LETMonitor
+            browser = LETMonitor(parent=self)
+            browser.init_driver()
+        else:
+            from monitor_playwright import LETMonitorPlaywright
+            browser = LETMonitorPlaywright(parent=self)
+            browser.init_browser()
+
+        self.browser = browser
+        logger.info(f"⬆️  已启动 {self.browser_type} 浏览器作为第二级抓取")
+
+    def restart_browser(self, rotate_ipv6: bool = False):
+        """重启第二级浏览器"""
+        if self.browser_type == 'uc':
+            self.browser.restart_driver(rotate_ipv6=rotate_ipv6)
+        else:
+            self.browser.restart_browser(rotate_ipv6=rotate_ipv6)
+        self.browser.cf_fail_count = 0
+
+    def close_browser(self):
+        """关闭第二级浏览器"""
+        if self.browser:
+            try:
+                self.browser.cleanup()
+            except Exception as e:
+                logger.warning(f"关闭浏览器时出错: {e}")
+            self.browser = None
+            self.browser_cf_fails.clear()
+            self.browser_only = False
+
+    def close_idle_browser(self):
+        """浏览器长时间未使用时关闭，释放内存"""
+        timeout = Config.TIER_BROWSER_IDLE_TIMEOUT
+        if not self.browser or timeout <= 0:
+            return
+
+        idle = time.time() - self.browser_last_used
+        if idle >= timeout:
+            logger.info(f"💤 浏览器已空闲 {int(idle)} 秒，关闭以释放内存")
+            self.close_browser()
+
+    def get_browser_page_source(self) -> str:
+        """获取浏览器当前页面的 HTML"""
+        if self.browser_type == 'uc':
+            return self.browser.driver.page_source
+        return self.browser.page.content()
+
+    def browser_load_page(self, page_num: int) -> Optional[str]:
+        """使用浏览器加载页面（第二级）
+
+        Returns:
+            str: 页面 HTML（成功）
+            'cf_challenge': 浏览器也未能通过 Cloudflare 挑战
+        """
+        try:
+            if not self.browser:
+                self.init_browser()
+
+            # 浏览器的 cf_fail_count 按页面恢复，交替加载补查页面时不会互相清零
+            self.browser.cf_fail_count = self.browser_cf_fails.get(page_num, 0)
+
+            self.browser_last_used = time.time()
+            self.browser_fetches += 1
+
+            if not self.browser.load_page(page_num):
+                self.browser_cf_fails[page_num] = self.browser.cf_fail_count
+                # 同一页面浏览器多次失败，重启浏览器并轮换 IPv6
+                if self.browser.cf_fail_count >= Config.MAX_CF_FAILS:
+                    logger.error("🔄 浏览器 CF 卡住，重启并切换 IPv6...")
+                    self.restart_browser(rotate_ipv6=True)
+                    self.browser_cf_fails.pop(page_num, None)
+                return 'cf_challenge'
+
+            self.browser_cf_fails.pop(page_num, None)
+
+            html = self.get_browser_page_source()
+            self.browser_last_used = time.time()
+
+            # 把浏览器拿到的 cf_clearance 交给 curl_cffi 会话，应用成功才降回 curl_cffi
+            self.browser.export_cookies()
+            if self.load_shared_cookies(force=True):
+                self.browser_only = False
+                logger.info(f"⬇️  浏览器已通过挑战，下一次轮询降回 curl_cffi")
+            elif not self.browser_only:
+                self.browser_only = True
+                logger.info("🌐 cf_clearance 无法用于 curl_cffi 会话，在其有效期内继续使用浏览器")
+            return html
+
+        except Exception as e:
+            logger.error(f"❌ 浏览器加载页面 {page_num} 失败: {e}")
+            self.close_browser()
+            return 'cf_challenge'
+
+    def load_page(
+        self,
+        page_num: int,
+        pooled: Optional[PooledSession] = None,
+        conditional: bool = True
+    ) -> Optional[Union[bytes, str]]:
+        """分级加载页面：先 curl_cffi，遇到 CF 挑战再升级到浏览器
+
+        浏览器拿到的 cf_clearance 无法用于 curl_cffi 会话时（没有足够接近的模拟目标），
+        在 clearance 有效期内直接使用浏览器，不再每次先付出一次失败的 curl_cffi 请求
+
+        会话池并行追赶时不升级（浏览器不能跨线程共用），CF 挑战的页面留给正常轮询处理
+        """
+        if pooled:
+            return super().load_page(page_num, pooled, conditional)
+
+        self.close_idle_browser()
+
+        # 浏览器的 cf_clearance 交不出去时，curl_cffi 请求注定遇到挑战，直接使用浏览器
+        if self.browser_only and self.browser and self.browser.cookie_jar.has_clearance():
+            return self.browser_load_page(page_num)
+        self.browser_only = False
+
+        self.http_fetches += 1
+        result = super().load_page(page_num, conditional=conditional)
+
+        if result != 'cf_challenge':
+            return result
+
+        logger.info("⬆️  curl_cffi 遇到 CF 挑战，升级到浏览器...")
+        return self.browser_load_page(page_num)
+
+    def run(self, start_page: Optional[int] = None):
+        """运行监控"""
+        logger.info(f"🪜 分级抓取模式：curl_cffi → {self.browser_type}")
+        try:
+            super().run(start_page)
+        finally:
+            logger.info(f"📊 HTTP 抓取 {self.http_fetches} 次，浏览器抓取 {self.browser_fetches} 次")
+            self.cleanup()
+
+    def cleanup(self):
+        """清理资源"""
+        self.close_browser()
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='LowEndTalk Monitor - 分级抓取版本')
+    parser.add_argument('--start-page', type=int, help='起始页面')
+    parser.add_argument('--browser', choices=['playwright', 'uc'], help='遇到 CF 挑战时使用的浏览器')
+    parser.add_argument('--test', action='store_true', help='测试模式')
+
+    args = parser.parse_args()
+
+    monitor = LETMonitorTiered(browser_type=args.browser)
+
+    try:
+        if args.test:
+            logger.info("🧪 测试模式")
+            monitor.init_session()
+
+            start_page = args.start_page or Config.START_PAGE
+            result = monitor.check_page(start_page)
+
+            logger.info(f"\n测试结果:")
+            logger.info(f"  总评论数: {result.get('total', 0)}")
+            logger.info(f"  目标评论数: {len(result.get('comments', []))}")
+            logger.info(f"  浏览器抓取次数: {monitor.browser_fetches}")
+        else:
+            monitor.run(args.start_page)
+    except KeyboardInterrupt:
+        logger.info("\n👋 再见!")
+    except Exception as e:
+        logger.error(f"❌ 程序异常: {e}")
+    finally:
+        monitor.cleanup()
+
+
+if __name__ == '__main__':
+    main()
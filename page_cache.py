@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+页面变化检测缓存
+按页面 URL 记录 ETag / Last-Modified，并对 MessageList 区域计算摘要，
+页面未变化时直接复用上一次的解析结果，跳过 HTML 解析和筛选
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Union
+
+
+class PageValidatorCache:
+    """按页面 URL 缓存验证器、MessageList 摘要和解析结果（线程安全，会话池并行抓取时共用）"""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self.lock = threading.RLock()
+
+    @staticmethod
+    def message_list_digest(body: Union[bytes, str]) -> Optional[str]:
+        """计算评论区（MessageList 到 PagerAfter）的摘要
+
+        页面其他部分（广告、CSRF token、在线人数等）每次请求都可能变化，
+        只对评论区做摘要才能判断评论是否有更新
+        """
+        if isinstance(body, str):
+            body = body.encode('utf-8', 'replace')
+
+        start = body.find(b'MessageList')
+        if start < 0:
+            return None
+
+        end = body.find(b'PagerAfter', start)
+        if end < 0:
+            end = len(body)
+
+        return hashlib.blake2b(body[start:end], digest_size=16).hexdigest()
+
+    def _entry(self, url: str) -> Dict:
+        """调用方需持有 self.lock"""
+        entry = self.entries.get(url)
+        if entry is None:
+            entry = {'etag': None, 'last_modified': None, 'digest': None, 'result': None}
+            self.entries[url] = entry
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        else:
+            self.entries.move_to_end(url)
+        return entry
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """生成条件请求头（没有缓存结果时不发送，避免拿到 304 却无结果可用）"""
+        with self.lock:
+            entry = self.entries.get(url)
+            if not entry or entry['result'] is None:
+                return {}
+
+            headers = {}
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+            return headers
+
+    def is_unchanged(self, url: str, body: Union[bytes, str], headers: Optional[Dict] = None) -> bool:
+        """记录本次响应的验证器和摘要，判断评论区是否与上次相同
+
+        Returns:
+            bool: 评论区未变化且有可复用的解析结果
+        """
+        digest = self.message_list_digest(body)
+
+        with self.lock:
+            entry = self._entry(url)
+
+            if headers is not None:
+                entry['etag'] = headers.get('ETag') or headers.get('etag')
+                entry['last_modified'] = headers.get('Last-Modified') or headers.get('last-modified')
+
+            unchanged = digest is not None and digest == entry['digest'] and entry['result'] is not None
+
+            if not unchanged:
+                # 评论区变化，旧结果作废，等待重新解析后写入
+                entry['digest'] = digest
+                entry['result'] = None
+
+            return unchanged
+
+    def store_result(self, url: str, result: Dict):
+        """保存解析结果"""
+        with self.lock:
+            self._entry(url)['result'] = result
+
+    def get_result(self, url: str) -> Optional[Dict]:
+        """获取上一次的解析结果"""
+        with self.lock:
+            entry = self.entries.get(url)
+            return entry['result'] if entry else None
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+落后时直接跳到最后一页
+run() 原来只在当前页满 30 条后前进一页，停机几个小时后要轮询几十次（每次之间还要等待）才能追上。
+页面的分页（#PagerBefore / #PagerAfter）里有帖子当前的最后一页（见 comment_extractor.extract_last_page），
+当前页已满且落后 PAGE_JUMP_MIN_GAP 页以上时一次跳到最后一页：
+- 跳过的页面记录到 StateStore 的 backfill 表（BACKFILL_SKIPPED=false 时直接放弃）
+- 之后每个轮询周期补查 BACKFILL_PER_CYCLE 页，不增加请求频率；补查失败的页面留到下个周期
+"""
+
+import logging
+from typing import Callable, Dict, List, Optional
+
+from config import Config
+from state_store import StateStore
+
+logger = logging.getLogger(__name__)
+
+
+class PageJumper:
+    """跳页和补查
+
+    Args:
+        state_store: 状态存储（保存待补查的页面）
+        key: 进度的 key，默认 StateStore.checkpoint_key()
+        name: 日志前缀（多目标时区分目标）
+    """
+
+    def __init__(self, state_store: StateStore, key: Optional[str] = None, name: str = ''):
+        self.state_store = state_store
+        self.key = key
+        self.prefix = f"[{name}] " if name else ''
+
+        pending = self.state_store.count_backfill(self.key)
+        if pending:
+            logger.info(f"💾 {self.prefix}还有 {pending} 个跳过的页面待补查")
+
+    def next_page(self, page_num: int, result: Dict) -> int:
+        """当前页已满时的下一页：分页显示落后较多时直接跳到最后一页"""
+        last_page = result.get('last_page')
+        if not Config.PAGE_JUMP or not last_page or last_page - page_num < Config.PAGE_JUMP_MIN_GAP:
+            return page_num + 1
+
+        skipped = (page_num + 1, last_page - 1)
+        if Config.BACKFILL_SKIPPED:
+            self.state_store.add_backfill(*skipped, key=self.key)
+            logger.info(f"⏩ {self.prefix}分页显示最后一页是 {last_page}，跳过页面 {skipped[0]}-{skipped[1]}"
+                        f"（每个周期补查 {Config.BACKFILL_PER_CYCLE} 页）")
+        else:
+            logger.info(f"⏩ {self.prefix}分页显示最后一页是 {last_page}，跳过页面 {skipped[0]}-{skipped[1]}")
+        return last_page
+
+    def pending(self) -> List[int]:
+        """本周期需要补查的页面"""
+        if Config.BACKFILL_PER_CYCLE <= 0:
+            return []
+        return self.state_store.pending_backfill(Config.BACKFILL_PER_CYCLE, self.key)
+
+    def finish(self, page_num: int, result: Dict) -> bool:
+        """处理补查结果，返回页面是否已完成（失败的页面留到下个周期）"""
+        if result.get('skip_page'):
+            logger.warning(f"⏭️  {self.prefix}补查页面 {page_num} 多次 CF 挑战失败，放弃")
+        elif result.get('not_found') or not result.get('total'):
+            logger.warning(f"⚠️  {self.prefix}补查页面 {page_num} 失败，下个周期重试")
+            return False
+        else:
+            logger.info(f"🔙 {self.prefix}补查页面 {page_num}（{result['total']} 条评论，"
+                        f"{len(result.get('comments', []))} 条目标评论）")
+
+        self.state_store.complete_backfill(page_num, self.key)
+        return True
+
+    def backfill(self, check_page: Callable[[int], Dict], notify: Callable[[List[Dict]], None]):
+        """补查本周期的页面（同步后端在轮询间隙调用）"""
+        for page_num in self.pending():
+            result = check_page(page_num)
+            if result.get('comments'):
+                notify(result['comments'])
+            if not self.finish(page_num, result):
+                break
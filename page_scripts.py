@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+页面内执行的 JS 脚本
+在浏览器中完成检测，只把很小的结果对象传回 Python，
+避免为了判断页面状态反复序列化整个 page_source
+"""
+
+from typing import Dict, Optional
+
+# Cloudflare 挑战页标题关键字（支持中英文）
+CF_TITLE_KEYWORDS = [
+    'cloudflare',
+    'just a moment',
+    '请稍候',
+    '稍等片刻',
+    '正在检查',
+]
+
+# Cloudflare 挑战页正文关键字（只检查可见文字，不含脚本和属性）
+CF_TEXT_KEYWORDS = [
+    'checking your browser',
+    'verify you are human',
+    '正在验证您是否是真人',
+    '正在检查您的浏览器',
+    '这可能需要几秒钟',
+    '验证您的浏览器',
+    '人机验证',
+    '安全检查',
+]
+
+# Cloudflare 探测：返回 {title, challenge, verification, message_list, comments, keyword, ready_state}
+# 函数表达式，Selenium 通过 SELENIUM_CF_PROBE 调用，Playwright 可直接 page.evaluate(CF_PROBE_JS, keywords)
+CF_PROBE_JS = """
+(keywords) => {
+    const body = document.body ? (document.body.innerText || '').slice(0, 5000).toLowerCase() : '';
+    return {
+        title: document.title || '',
+        challenge: !!document.querySelector(
+            'iframe[src*="challenges.cloudflare.com"], #challenge-form, #challenge-stage, #cf-challenge-running'
+        ),
+        verification: !!document.querySelector(
+            '#cf-browser-verification, .cf-browser-verification, #challenge-running'
+        ),
+        message_list: !!document.querySelector('.MessageList'),
+        comments: document.querySelectorAll('li.ItemComment').length,
+        keyword: (keywords || []).find(k => body.includes(k)) || null,
+        ready_state: document.readyState
+    };
+}
+"""
+
+SELENIUM_CF_PROBE = f"return ({CF_PROBE_JS.strip()})(arguments[0]);"
+
+# 评论数量和文档状态：返回 [readyState, 评论数]
+COMMENT_COUNT_JS = "return [document.readyState, document.querySelectorAll('li.ItemComment').length]"
+
+
+def probe_cloudflare(driver) -> Dict:
+    """在 Selenium driver 中执行 Cloudflare 探测"""
+    return driver.execute_script(SELENIUM_CF_PROBE, CF_TEXT_KEYWORDS)
+
+
+def cf_challenge_reason(probe: Optional[Dict]) -> Optional[str]:
+    """根据探测结果判断是否是 Cloudflare 挑战页
+
+    Returns:
+        是挑战页时返回命中的特征，否则返回 None
+    """
+    if not probe:
+        return None
+
+    # 评论列表已出现，说明拿到的是正常页面
+    if probe.get('message_list'):
+        return None
+
+    title = (probe.get('title') or '').lower()
+    for keyword in CF_TITLE_KEYWORDS:
+        if keyword in title:
+            return f"标题包含 '{keyword}'"
+
+    if probe.get('challenge'):
+        return "挑战 iframe / 表单"
+
+    if probe.get('verification'):
+        return "cf-browser-verification"
+
+    if probe.get('keyword'):
+        return f"页面包含 '{probe['keyword']}'"
+
+    return None
+
+
+# 页面内评论提取：在浏览器中完成作者、图片、引用筛选，只返回评论数和命中的评论
+# 参数 {target_user, image_url, filter_blockquote}，与 comment_extractor.extract_comments 规则一致
+# 返回 {not_found: true} 或 {total, last_page, times, comments: [{comment_id, author, timestamp, content, links}]}
+# last_page 与 comment_extractor.extract_last_page 一致：分页链接中最大的页码，没有分页时为 null
+# times 为所有评论 <time> 的 datetime 属性
+EXTRACT_COMMENTS_JS = """
+(opts) => {
+    const text = (el, sep) => {
+        const parts = [];
+        const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT, {
+            acceptNode: (node) => node.parentElement && node.parentElement.closest('script, style')
+                ? NodeFilter.FILTER_REJECT : NodeFilter.FILTER_ACCEPT
+        });
+        for (let node = walker.nextNode(); node; node = walker.nextNode()) {
+            const value = node.nodeValue.trim();
+            if (value) parts.push(value);
+        }
+        return parts.join(sep);
+    };
+
+    const h1NotFound = Array.from(document.querySelectorAll('h1')).some(h => h.textContent === 'Page not found.');
+    const message = document.getElementById('Message');
+    if (h1NotFound || (message && text(message, '').includes('could not be found'))) {
+        return {not_found: true};
+    }
+
+    const items = document.querySelectorAll('li[class*="ItemComment"]');
+    const comments = [];
+
+    for (const item of items) {
+        const authorEl = item.querySelector('a.Username');
+        if (!authorEl) continue;
+
+        const author = text(authorEl, '');
+        if (author !== opts.target_user) continue;
+
+        const timeEl = item.querySelector('time');
+        const timestamp = timeEl ? (timeEl.getAttribute('title') || timeEl.getAttribute('datetime') || '') : '';
+
+        const messageEl = item.querySelector('div.Message.userContent');
+        let content = '';
+        const links = [];
+
+        if (messageEl) {
+            const hasImage = Array.from(messageEl.querySelectorAll('img'))
+                .some(img => img.getAttribute('src') === opts.image_url);
+            if (!hasImage) continue;
+            if (opts.filter_blockquote && messageEl.querySelector('blockquote')) continue;
+
+            content = text(messageEl, '\\n');
+            for (const a of messageEl.querySelectorAll('a[href]')) {
+                let href = a.getAttribute('href');
+                if (!href || href.startsWith('#') || href.startsWith('javascript:')) continue;
+                if (href.startsWith('/')) href = 'https://lowendtalk.com' + href;
+                links.push(href);
+            }
+        }
+
+        comments.push({comment_id: item.id || '', author, timestamp, content, links});
+    }
+
+    let lastPage = null;
+    for (const a of document.querySelectorAll('#PagerBefore a, #PagerAfter a')) {
+        const match = (a.getAttribute('href') || '').match(/\/p(\d+)(?:[?#].*)?$/);
+        const num = parseInt(match ? match[1] : a.textContent.trim(), 10);
+        if (num > (lastPage || 0)) lastPage = num;
+    }
+
+    const times = Array.from(items)
+        .map(item => item.querySelector('time'))
+        .filter(el => el && el.getAttribute('datetime'))
+        .map(el => el.getAttribute('datetime'));
+
+    return {total: items.length, last_page: lastPage, times, comments};
+}
+"""
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+自适应轮询间隔
+原来每次检查之间固定等待 CHECK_INTERVAL 或 random.randint(WAIT_MIN, WAIT_MAX)，
+不管帖子正处在闪购高峰还是凌晨没人发帖。这里根据观察到的发帖速度决定下一次检查的时间：
+- 发帖速度：最近 RATE_WINDOW 条评论的发布时间（跨页保留），没有时间信息时用相邻两次检查的评论数差，
+  做指数移动平均
+- 目标用户活跃度：历史发帖时间（archive 表和已通知评论）按小时统计，当前小时发帖多时轮询更快
+- 等待时间 = POLL_COMMENTS / (发帖速度 × 活跃度)，加 ±POLL_JITTER 抖动后限制在 [POLL_MIN, POLL_MAX]；
+  当前页已满（下一页已经有评论）时使用 POLL_MIN
+POLL_SCHEDULER=fixed 时保持原来的固定 / 随机等待
+"""
+
+import time
+import random
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from config import Config
+from comment_extractor import parse_comment_time
+from state_store import StateStore
+
+logger = logging.getLogger(__name__)
+
+# 参与估计发帖速度的最近评论数
+RATE_WINDOW = 10
+
+# 发帖速度的指数移动平均系数
+RATE_ALPHA = 0.3
+
+# 目标用户活跃度系数的范围
+MIN_ACTIVITY = 0.5
+MAX_ACTIVITY = 3.0
+
+# 历史发帖时间的重新统计间隔（秒）
+HISTORY_REFRESH = 3600
+
+# 归档评论的发布时间除了 ISO 8601，还可能是页面上显示的文本（如 November 28, 2025 12:34PM）
+TITLE_FORMATS = ('%B %d, %Y %I:%M%p', '%B %d, %Y %I:%M %p', '%b %d, %Y %I:%M%p')
+
+
+def parse_post_time(value: str) -> Optional[float]:
+    """归档评论的发布时间转为时间戳"""
+    timestamp = parse_comment_time(value)
+    if timestamp is not None:
+        return timestamp
+    for fmt in TITLE_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), fmt).timestamp()
+        except ValueError:
+            continue
+    return None
+
+
+class AdaptiveScheduler:
+    """根据发帖速度和目标用户活跃度计算下一次检查的等待时间
+
+    Args:
+        state_store: 状态存储（读取目标用户的历史发帖时间）
+        key: 进度的 key，默认 StateStore.checkpoint_key()
+        name: 日志前缀（多目标时区分目标）
+    """
+
+    def __init__(self, state_store: Optional[StateStore] = None, key: Optional[str] = None, name: str = ''):
+        self.state_store = state_store
+        self.key = key
+        self.prefix = f"[{name}] " if name else ''
+
+        self.rate: Optional[float] = None  # 评论/秒
+        self.times: List[float] = []  # 最近的评论发布时间
+        self.page: Optional[int] = None
+        self.last_total: Optional[int] = None
+        self.last_checked = 0.0
+
+        self.hourly: List[float] = [1.0] * 24
+        self.history_loaded = 0.0
+
+    @property
+    def adaptive(self) -> bool:
+        return Config.POLL_SCHEDULER == 'adaptive'
+
+    def _update_rate(self, sample: float):
+        self.rate = sample if self.rate is None else RATE_ALPHA * sample + (1 - RATE_ALPHA) * self.rate
+
+    def observe(self, page_num: int, result: Dict):
+        """记录一次成功的检查结果"""
+        now = time.time()
+        total = result.get('total', 0)
+        times = result.get('comment_times') or []
+
+        if times:
+            self.times = sorted(set(self.times) | set(times))[-RATE_WINDOW:]
+
+        if len(self.times) >= 2:
+            # 最近几条评论的时间跨度一直算到现在，长时间没人发帖时速度自然下降
+            span = max(now - self.times[0], 1.0)
+            self._update_rate((len(self.times) - 1) / span)
+        elif page_num == self.page and self.last_total is not None and now > self.last_checked:
+            self._update_rate(max(total - self.last_total, 0) / (now - self.last_checked))
+
+        self.page = page_num
+        self.last_total = total
+        self.last_checked = now
+
+    def _load_history(self):
+        """按小时统计目标用户的历史发帖时间"""
+        self.history_loaded = time.time()
+        if not self.state_store:
+            return
+
+        history = self.state_store.target_history(self.key)
+        posts = [t for t in map(parse_post_time, history['timestamps']) if t is not None]
+        posts += history['notified_at']
+
+        counts = [0] * 24
+        for timestamp in posts:
+            counts[datetime.fromtimestamp(timestamp).hour] += 1
+
+        # 加一平滑：没有历史记录时各小时都是 1
+        mean = (len(posts) + 24) / 24
+        self.hourly = [(count + 1) / mean for count in counts]
+
+    def activity(self) -> float:
+        """当前小时目标用户的活跃度系数"""
+        if time.time() - self.history_loaded >= HISTORY_REFRESH:
+            self._load_history()
+        weight = self.hourly[datetime.now().hour]
+        return min(max(weight, MIN_ACTIVITY), MAX_ACTIVITY)
+
+    def next_wait(self, full: bool = False, fallback: Optional[float] = None) -> float:
+        """下一次检查前的等待时间（秒）
+
+        Args:
+            full: 当前页是否已满（下一页已经有评论）
+            fallback: POLL_SCHEDULER=fixed 时使用的等待时间，默认 CHECK_INTERVAL
+        """
+        if not self.adaptive:
+            return fallback if fallback is not None else Config.CHECK_INTERVAL
+
+        activity = self.activity()
+        if full:
+            wait = Config.POLL_MIN
+        elif self.rate:
+            wait = Config.POLL_COMMENTS / (self.rate * activity)
+        else:
+            wait = Config.POLL_MAX
+
+        wait *= random.uniform(1 - Config.POLL_JITTER, 1 + Config.POLL_JITTER)
+        wait = min(max(wait, Config.POLL_MIN), Config.POLL_MAX)
+
+        speed = f"{self.rate * 60:.1f} 条/分钟" if self.rate else '未知'
+        logger.info(f"⏱️  {self.prefix}发帖速度 {speed}，目标用户活跃度 ×{activity:.1f}，等待 {wait:.0f} 秒")
+        return wait
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+请求限速工具
+按主机名做令牌桶限速，多个监控目标共用同一个站点时不会集中请求；
+同步版本的令牌桶用于会话池中每个会话（出口地址）的请求预算
+"""
+
+import time
+import asyncio
+import threading
+from typing import Dict
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """线程安全的令牌桶（同步版本）"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate  # 每秒补充的令牌数
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """获取一个令牌（不足时等待）"""
+        with self.lock:
+            self._refill()
+            if self.tokens < 1:
+                time.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class AsyncTokenBucket:
+    """异步令牌桶"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate  # 每秒补充的令牌数
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """获取一个令牌（不足时等待）"""
+        async with self.lock:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class HostRateLimiter:
+    """按主机名分配令牌桶"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.buckets: Dict[str, AsyncTokenBucket] = {}
+
+    async def acquire(self, url: str):
+        host = urlsplit(url).hostname or ''
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            bucket = self.buckets[host] = AsyncTokenBucket(self.rate, self.burst)
+        await bucket.acquire()
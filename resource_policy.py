@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+浏览器资源拦截策略（Playwright context.route）
+拦截图片、字体、媒体等非必要资源和第三方主机的请求，
+始终放行 Cloudflare 挑战脚本（challenges.cloudflare.com、/cdn-cgi/）和站点自身的 HTML / JS / XHR
+"""
+
+import logging
+from collections import Counter
+from typing import Iterable, Optional
+from urllib.parse import urlparse
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Cloudflare 挑战需要的主机（不拦截任何类型）
+CLOUDFLARE_HOSTS = ('challenges.cloudflare.com',)
+
+
+def _host_matches(host: str, domains: Iterable[str]) -> bool:
+    """host 是否是 domains 中某个域名或其子域名"""
+    return any(host == d or host.endswith('.' + d) for d in domains)
+
+
+class ResourcePolicy:
+    """请求拦截策略
+
+    Args:
+        first_party_host: 站点主机，默认取自 THREAD_BASE_URL
+    """
+
+    def __init__(self, first_party_host: Optional[str] = None):
+        self.first_party = first_party_host or urlparse(Config.THREAD_BASE_URL).hostname or ''
+        self.block_types = set(Config.BLOCK_RESOURCE_TYPES)
+        self.allow_hosts = tuple(Config.RESOURCE_ALLOW_HOSTS) + CLOUDFLARE_HOSTS
+
+        # 统计
+        self.allowed = 0
+        self.blocked: Counter = Counter()
+
+    def should_block(self, url: str, resource_type: str) -> bool:
+        """是否拦截该请求"""
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https'):
+            return False
+
+        host = (parsed.hostname or '').lower()
+
+        # Cloudflare 挑战相关请求全部放行
+        if parsed.path.startswith('/cdn-cgi/') or _host_matches(host, self.allow_hosts):
+            return False
+
+        # 非必要类型（图片、字体、媒体）一律拦截
+        if resource_type in self.block_types:
+            return True
+
+        # 站点自身的 HTML / JS / CSS / XHR 放行，其他第三方主机拦截
+        return not _host_matches(host, (self.first_party,))
+
+    def handle(self, route):
+        """context.route 回调"""
+        request = route.request
+        if self.should_block(request.url, request.resource_type):
+            self.blocked[request.resource_type] += 1
+            route.abort()
+        else:
+            self.allowed += 1
+            route.continue_()
+
+    def summary(self) -> str:
+        """统计摘要"""
+        total_blocked = sum(self.blocked.values())
+        detail = '，'.join(f"{t} {n}" for t, n in self.blocked.most_common())
+        return f"放行 {self.allowed} 个请求，拦截 {total_blocked} 个" + (f"（{detail}）" if detail else '')
+
+    def reset_stats(self):
+        """清空统计"""
+        self.allowed = 0
+        self.blocked.clear()
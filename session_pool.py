@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+多出口地址的 curl_cffi 会话池
+每个会话绑定 IPV6_POOL 中的一个源地址，有独立的 cookie 和请求预算（令牌桶），
+追赶积压页面时把请求分散到各个地址并行抓取，吞吐量随地址数增加，单个地址的请求频率不变：
+- least_challenged：优先使用最久没被挑战、最久没用的空闲会话（默认）
+- round_robin：按顺序轮流使用
+没有可绑定的地址时退化为一个不绑定地址的会话
+"""
+
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional
+
+from config import Config
+from rate_limit import TokenBucket
+from ipv6_health import AddressHealth, CHALLENGE
+from source_bind import is_local_address, load_pool
+
+logger = logging.getLogger(__name__)
+
+
+class PooledSession:
+    """会话池中的一个会话"""
+
+    def __init__(self, address: Optional[str], session: Any):
+        self.address = address
+        self.session = session
+        self.bucket = TokenBucket(Config.SESSION_RATE, Config.SESSION_BURST)
+        self.last_used = 0.0
+        self.last_challenge = 0.0
+        self.fetches = 0
+        self.challenges = 0
+
+    @property
+    def name(self) -> str:
+        return self.address or '默认出口'
+
+
+class SessionPool:
+    """按出口地址划分的会话池（线程安全，会话同一时间只借给一个线程）
+
+    Args:
+        session_factory: 创建会话的函数，参数为绑定的地址（None 表示不绑定）
+        addresses: 会话绑定的地址，默认取地址池中本机可绑定的前 SESSION_POOL_SIZE 个
+        health: 地址健康度统计，记录每个会话的请求结果
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[Optional[str]], Any],
+        addresses: Optional[List[str]] = None,
+        health: Optional[AddressHealth] = None
+    ):
+        if addresses is None:
+            addresses = [a for a in load_pool() if is_local_address(a)][:Config.SESSION_POOL_SIZE]
+
+        self.sessions = [PooledSession(a, session_factory(a)) for a in addresses]
+        if not self.sessions:
+            self.sessions = [PooledSession(None, session_factory(None))]
+
+        self.health = health
+        self.strategy = Config.SESSION_POOL_STRATEGY
+        self.idle = list(self.sessions)
+        self.cond = threading.Condition()
+        self._next = 0
+
+        logger.info(f"🧵 会话池：{len(self.sessions)} 个会话（{self.strategy}）")
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def _pick(self) -> PooledSession:
+        """从空闲会话中选择一个（调用方需持有 self.cond）"""
+        if self.strategy == 'round_robin':
+            for offset in range(len(self.sessions)):
+                pooled = self.sessions[(self._next + offset) % len(self.sessions)]
+                if pooled in self.idle:
+                    self._next = (self.sessions.index(pooled) + 1) % len(self.sessions)
+                    return pooled
+
+        return min(self.idle, key=lambda s: (s.last_challenge, s.last_used))
+
+    @contextmanager
+    def session(self) -> Iterator[PooledSession]:
+        """借出一个会话（等待空闲会话和该会话的请求令牌）"""
+        with self.cond:
+            while not self.idle:
+                self.cond.wait()
+            pooled = self._pick()
+            self.idle.remove(pooled)
+
+        try:
+            pooled.bucket.acquire()
+            pooled.last_used = time.time()
+            yield pooled
+        finally:
+            with self.cond:
+                self.idle.append(pooled)
+                self.cond.notify()
+
+    def record(self, pooled: PooledSession, outcome: str, latency: Optional[float] = None):
+        """记录会话的请求结果"""
+        pooled.fetches += 1
+        if outcome == CHALLENGE:
+            pooled.challenges += 1
+            pooled.last_challenge = time.time()
+        if self.health:
+            self.health.record(pooled.address, outcome, latency)
+
+    def summary(self) -> str:
+        """各会话的请求统计"""
+        return '，'.join(f"{s.name} {s.fetches} 次（挑战 {s.challenges}）" for s in self.sessions)
+
+    def close(self):
+        """关闭所有会话"""
+        for pooled in self.sessions:
+            try:
+                pooled.session.close()
+            except Exception:
+                pass
@@ -104,7 +104,8 @@ echo "]" >> /tmp/ipv6_pool.txt
 echo ""
 echo -e "${GREEN}已生成配置文件: /tmp/ipv6_pool.txt${NC}"
 echo ""
-echo "请将以下内容复制到 ipv6_rotate.py 的 IPV6_POOL 中:"
+echo "监控程序会自动发现这些地址（python3 ipv6_rotate.py --list 查看），无需手动填写"
+echo "自动发现不可用时，可将以下内容复制到 ipv6_rotate.py 的 IPV6_POOL 中:"
 echo -e "${YELLOW}================================${NC}"
 cat /tmp/ipv6_pool.txt
 echo -e "${YELLOW}================================${NC}"
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+按源地址绑定出口 IPv6（IPV6_BIND_MODE=bind）
+ipv6_rotate.py 通过 sudo ip -6 route 改写系统默认路由，切换瞬间整台机器的 IPv6 流量中断，
+每次还要启动子进程、sudo 并固定等待 3 秒。bind 模式在进程内选择源地址：
+- curl_cffi 每个请求通过 interface 参数（CURLOPT_INTERFACE）绑定当前地址
+- 浏览器通过本地转发代理（127.0.0.1 上的 HTTP CONNECT 代理）出站，代理建立连接时绑定当前地址
+轮换只是换一个地址，立即生效、不影响系统路由，多个进程可以各自使用不同的地址
+"""
+
+import select
+import socket
+import ipaddress
+import logging
+import threading
+import socketserver
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from config import Config
+from ipv6_health import AddressHealth
+from ipv6_inventory import default_source, inventory
+
+logger = logging.getLogger(__name__)
+
+# libcurl CURL_IPRESOLVE_V6（绑定 IPv6 源地址时只解析 AAAA）
+CURL_IPRESOLVE_V6 = 2
+
+# 代理连接参数
+CONNECT_TIMEOUT = 15
+IDLE_TIMEOUT = 300
+MAX_HEADER_BYTES = 64 * 1024
+
+# 转发普通 HTTP 请求时去掉的代理头
+_HOP_HEADERS = (b'proxy-connection', b'proxy-authorization')
+
+
+def load_pool() -> List[str]:
+    """读取地址池：IPV6_POOL 环境变量 > 自动发现的网卡地址 > ipv6_rotate.py 中的 IPV6_POOL（排除 SSH 主地址）"""
+    addresses = list(Config.IPV6_POOL)
+    main_ip = None
+    if not addresses:
+        addresses = inventory()['addresses']
+    if not addresses:
+        # 延迟导入：ipv6_rotate 导入时会调用 logging.basicConfig
+        import ipv6_rotate
+        addresses = list(ipv6_rotate.IPV6_POOL)
+        main_ip = ipv6_rotate.MAIN_IP
+
+    pool = []
+    for address in addresses:
+        try:
+            normalized = str(ipaddress.IPv6Address(address))
+        except ValueError:
+            logger.warning(f"⚠️  忽略无效的 IPv6 地址: {address}")
+            continue
+        if main_ip and normalized == str(ipaddress.IPv6Address(main_ip)):
+            continue
+        if normalized not in pool:
+            pool.append(normalized)
+    return pool
+
+
+def is_local_address(address: str) -> bool:
+    """地址是否已配置在本机网卡上（可以绑定）"""
+    try:
+        with socket.socket(socket.AF_INET6, socket.SOCK_STREAM) as sock:
+            sock.bind((address, 0))
+        return True
+    except OSError:
+        return False
+
+
+class SourceAddressPool:
+    """出口地址池（线程安全）
+
+    Args:
+        addresses: 候选地址，默认 load_pool()（网卡地址变化后轮换时自动更新）；未配置在本机上的地址会被跳过
+        health: 地址健康度统计，轮换时按挑战率、延迟和冷却时间选择
+    """
+
+    def __init__(self, addresses: Optional[List[str]] = None, health: Optional[AddressHealth] = None):
+        # 未指定地址时跟随 load_pool()，网卡上新增或删除地址后轮换时自动更新
+        self.follow = addresses is None
+        self.candidates: List[str] = []
+        self.addresses: List[str] = []
+        self._set_candidates(load_pool() if addresses is None else addresses)
+        if not self.addresses:
+            logger.warning("⚠️  没有可绑定的 IPv6 地址，使用系统默认出口")
+
+        self.health = health or AddressHealth()
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[Optional[str]], None]] = []
+        self.current: Optional[str] = self.health.choose(self.addresses)
+        if self.current:
+            logger.info(f"🌐 出口 IPv6: {self.current}（地址池 {len(self.addresses)} 个）")
+
+    def _set_candidates(self, candidates: List[str]):
+        self.candidates = list(candidates)
+        self.addresses = [a for a in candidates if is_local_address(a)]
+        skipped = len(candidates) - len(self.addresses)
+        if skipped:
+            logger.warning(f"⚠️  {skipped} 个 IPv6 地址未配置在本机网卡上，已跳过（运行 setup_ipv6_pool.sh 添加）")
+
+    def refresh(self):
+        """重新读取地址池（自动发现的结果有缓存，网卡地址不变时不会启动子进程）"""
+        if not self.follow:
+            return
+        candidates = load_pool()
+        if candidates != self.candidates:
+            before = len(self.addresses)
+            self._set_candidates(candidates)
+            logger.info(f"🌐 地址池更新：{before} → {len(self.addresses)} 个")
+
+    def on_rotate(self, callback: Callable[[Optional[str]], None]):
+        """注册轮换回调（参数为新地址）"""
+        self._listeners.append(callback)
+
+    def rotate(self) -> Optional[str]:
+        """切换到另一个地址"""
+        with self._lock:
+            self.refresh()
+            available = [a for a in self.addresses if a != self.current]
+            if not available:
+                logger.warning("⚠️  没有可用的备用 IPv6 地址")
+                return self.current
+            previous, self.current = self.current, self.health.choose(available)
+
+        logger.info(f"🌐 切换出口 IPv6: {previous} → {self.current}")
+        for callback in self._listeners:
+            try:
+                callback(self.current)
+            except Exception as e:
+                logger.warning(f"⚠️  IPv6 轮换回调出错: {e}")
+        return self.current
+
+    def curl_options(self) -> dict:
+        """curl_cffi 会话参数：只解析 IPv6（绑定的源地址是 IPv6）"""
+        if not self.current:
+            return {}
+        from curl_cffi import CurlOpt
+        return {'curl_options': {CurlOpt.IPRESOLVE: CURL_IPRESOLVE_V6}}
+
+
+def _split_host_port(target: str, default_port: int) -> Tuple[str, int]:
+    """解析 host:port / [v6]:port"""
+    if target.startswith('['):
+        host, _, rest = target[1:].partition(']')
+        port = rest[1:] if rest.startswith(':') else ''
+    else:
+        host, _, port = target.rpartition(':') if target.count(':') == 1 else (target, '', '')
+    return host, int(port) if port else default_port
+
+
+class _ProxyHandler(socketserver.BaseRequestHandler):
+    """单个浏览器连接：解析 CONNECT / 普通 HTTP 请求，建立绑定源地址的上游连接后双向转发"""
+
+    def handle(self):
+        client = self.request
+        client.settimeout(CONNECT_TIMEOUT)
+
+        data = b''
+        while b'\r\n\r\n' not in data:
+            chunk = client.recv(8192)
+            if not chunk or len(data) > MAX_HEADER_BYTES:
+                return
+            data += chunk
+
+        head, _, rest = data.partition(b'\r\n\r\n')
+        lines = head.split(b'\r\n')
+        try:
+            method, target, version = lines[0].decode('latin-1').split(' ', 2)
+        except ValueError:
+            return
+
+        proxy = self.server.proxy
+        if method == 'CONNECT':
+            host, port = _split_host_port(target, 443)
+            upstream = proxy.open_upstream(host, port)
+            if not upstream:
+                client.sendall(b'HTTP/1.1 502 Bad Gateway\r\n\r\n')
+                return
+            client.sendall(b'HTTP/1.1 200 Connection Established\r\n\r\n')
+        else:
+            url = urlsplit(target)
+            if not url.hostname:
+                client.sendall(b'HTTP/1.1 400 Bad Request\r\n\r\n')
+                return
+            upstream = proxy.open_upstream(url.hostname, url.port or 80)
+            if not upstream:
+                client.sendall(b'HTTP/1.1 502 Bad Gateway\r\n\r\n')
+                return
+            path = (url.path or '/') + (f'?{url.query}' if url.query else '')
+            headers = [h for h in lines[1:] if h.split(b':', 1)[0].strip().lower() not in _HOP_HEADERS]
+            rest = b'\r\n'.join([f'{method} {path} {version}'.encode('latin-1')] + headers) + b'\r\n\r\n' + rest
+
+        try:
+            if rest:
+                upstream.sendall(rest)
+            proxy.relay(client, upstream)
+        finally:
+            proxy.release(upstream)
+
+
+class _ProxyServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class BoundProxy:
+    """本地转发代理，浏览器的所有连接从地址池的当前地址出站
+
+    轮换地址时关闭已建立的隧道，浏览器重新连接后即使用新地址，无需重启浏览器
+
+    Args:
+        pool: 出口地址池
+    """
+
+    def __init__(self, pool: SourceAddressPool):
+        self.pool = pool
+        self._server: Optional[_ProxyServer] = None
+        self._lock = threading.Lock()
+        self._upstreams = set()
+        pool.on_rotate(lambda _address: self.drop_connections())
+
+    @property
+    def url(self) -> Optional[str]:
+        if not self._server:
+            return None
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self) -> str:
+        """启动代理（已启动时直接返回地址）"""
+        with self._lock:
+            if not self._server:
+                self._server = _ProxyServer(('127.0.0.1', 0), _ProxyHandler)
+                self._server.proxy = self
+                threading.Thread(target=self._server.serve_forever, name='bound-proxy', daemon=True).start()
+                logger.info(f"🔌 本地转发代理已启动: {self.url}（出口 {self.pool.current or '系统默认'}）")
+        return self.url
+
+    def open_upstream(self, host: str, port: int) -> Optional[socket.socket]:
+        """建立到目标主机的连接，源地址绑定为地址池当前地址"""
+        source = self.pool.current
+        try:
+            if source:
+                try:
+                    infos = socket.getaddrinfo(host, port, socket.AF_INET6, socket.SOCK_STREAM)
+                except socket.gaierror:
+                    infos = None  # 目标没有 AAAA 记录，走系统默认出口
+                if infos:
+                    sock = socket.socket(socket.AF_INET6, socket.SOCK_STREAM)
+                    sock.settimeout(CONNECT_TIMEOUT)
+                    sock.bind((source, 0))
+                    sock.connect(infos[0][4])
+                else:
+                    sock = socket.create_connection((host, port), timeout=CONNECT_TIMEOUT)
+            else:
+                sock = socket.create_connection((host, port), timeout=CONNECT_TIMEOUT)
+        except OSError as e:
+            logger.debug(f"代理连接 {host}:{port} 失败: {e}")
+            return None
+
+        with self._lock:
+            self._upstreams.add(sock)
+        return sock
+
+    @staticmethod
+    def relay(client: socket.socket, upstream: socket.socket):
+        """双向转发，任意一端关闭或空闲超时后结束"""
+        sockets = [client, upstream]
+        while True:
+            readable, _, errored = select.select(sockets, [], sockets, IDLE_TIMEOUT)
+            if errored or not readable:
+                return
+            for sock in readable:
+                try:
+                    data = sock.recv(65536)
+                    if not data:
+                        return
+                    (upstream if sock is client else client).sendall(data)
+                except OSError:
+                    return
+
+    def release(self, upstream: socket.socket):
+        with self._lock:
+            self._upstreams.discard(upstream)
+        try:
+            upstream.close()
+        except OSError:
+            pass
+
+    def drop_connections(self):
+        """关闭所有已建立的上游连接（轮换地址后让浏览器重新连接）"""
+        with self._lock:
+            upstreams = list(self._upstreams)
+        for sock in upstreams:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if upstreams:
+            logger.info(f"🔌 已断开 {len(upstreams)} 个代理连接，浏览器将通过新地址重新连接")
+
+    def close(self):
+        """停止代理"""
+        with self._lock:
+            server, self._server = self._server, None
+        if server:
+            server.shutdown()
+            server.server_close()
+        self.drop_connections()
+
+
+_shared_pool: Optional[SourceAddressPool] = None
+_shared_proxy: Optional[BoundProxy] = None
+_shared_lock = threading.Lock()
+
+
+def shared_pool() -> Optional[SourceAddressPool]:
+    """进程内共用的地址池（IPV6_BIND_MODE 不是 bind 时返回 None）
+
+    分级抓取时 curl_cffi 会话和浏览器共用同一个地址，浏览器导出的 cf_clearance 对 curl_cffi 仍然有效
+    """
+    global _shared_pool
+    if Config.IPV6_BIND_MODE != 'bind':
+        return None
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = SourceAddressPool()
+        return _shared_pool
+
+
+def shared_proxy() -> Optional[BoundProxy]:
+    """进程内共用的本地转发代理（已启动），IPV6_BIND_MODE 不是 bind 时返回 None"""
+    global _shared_proxy
+    pool = shared_pool()
+    if pool is None:
+        return None
+    with _shared_lock:
+        if _shared_proxy is None:
+            _shared_proxy = BoundProxy(pool)
+    _shared_proxy.start()
+    return _shared_proxy
+
+
+_route_address: Optional[str] = None
+_route_loaded = False
+
+
+def current_address() -> Optional[str]:
+    """当前出口地址：bind 模式为地址池的当前地址，route 模式为默认路由的源地址
+
+    route 模式的地址启动时取自地址发现的缓存，之后只在 route_changed() 中更新，
+    抓取路径上不启动子进程；查不到时记为 None，不反复重试
+    """
+    global _route_address, _route_loaded
+    pool = shared_pool()
+    if pool is not None:
+        return pool.current
+
+    if not _route_loaded:
+        _route_address = inventory().get('source')
+        _route_loaded = True
+    return _route_address
+
+
+def route_changed():
+    """ipv6_rotate.py 修改了默认路由，重新读取源地址（在轮换路径上调用）"""
+    global _route_address, _route_loaded
+    _route_address = default_source()
+    _route_loaded = True
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+监控状态持久化
+使用 SQLite（WAL 模式）保存已通知的评论和监控进度（当前页面、页面评论数），
+重启或崩溃后不会重复通知，run() 可以从上次停止的页面继续；
+跳页后尚未补查的页面范围也保存在这里，重启后继续补查；
+--backfill 扫描到的目标评论保存在 archive 表
+"""
+
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class SeenComments:
+    """已通知评论集合（与 set 接口兼容：in / add / len）"""
+
+    def __init__(self, store: 'StateStore'):
+        self.store = store
+
+    def __contains__(self, comment_id: str) -> bool:
+        return self.store.is_seen(comment_id)
+
+    def add(self, comment_id: str, page: Optional[int] = None, key: Optional[str] = None):
+        self.store.mark_seen(comment_id, page, key)
+
+    def __len__(self) -> int:
+        return self.store.count_seen()
+
+
+class StateStore:
+    """SQLite 状态存储
+
+    - WAL + synchronous=NORMAL：每次写入只追加 WAL，不做 fsync，崩溃也不会损坏数据库
+    - 按主键查询，不把历史记录载入内存，打开耗时与历史长度无关
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or Config.STATE_DB
+        self.lock = threading.Lock()
+        self._checkpoints: Dict[str, tuple] = {}  # 避免重复写入相同进度
+
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS seen_comments (
+                comment_id TEXT PRIMARY KEY,
+                page INTEGER,
+                notified_at REAL,
+                key TEXT
+            ) WITHOUT ROWID
+        ''')
+        # 旧数据库的 seen_comments 没有 key 列（这些评论不计入目标用户的历史发帖时间）
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(seen_comments)')]
+        if 'key' not in columns:
+            self.conn.execute('ALTER TABLE seen_comments ADD COLUMN key TEXT')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                key TEXT PRIMARY KEY,
+                current_page INTEGER NOT NULL,
+                page_total INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS backfill (
+                key TEXT NOT NULL,
+                start_page INTEGER NOT NULL,
+                end_page INTEGER NOT NULL,
+                added_at REAL,
+                PRIMARY KEY (key, start_page)
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS archive (
+                comment_id TEXT PRIMARY KEY,
+                key TEXT NOT NULL,
+                page INTEGER,
+                author TEXT,
+                timestamp TEXT,
+                content TEXT,
+                link TEXT,
+                archived_at REAL
+            ) WITHOUT ROWID
+        ''')
+
+        self.seen = SeenComments(self)
+
+    @staticmethod
+    def checkpoint_key(thread_base_url: Optional[str] = None, target_user: Optional[str] = None) -> str:
+        """进度按 帖子 + 目标用户 区分"""
+        return f"{thread_base_url or Config.THREAD_BASE_URL}#{target_user or Config.TARGET_USER}"
+
+    def is_seen(self, comment_id: str) -> bool:
+        """评论是否已通知"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT 1 FROM seen_comments WHERE comment_id = ?', (comment_id,)
+            ).fetchone()
+        return row is not None
+
+    def mark_seen(self, comment_id: str, page: Optional[int] = None, key: Optional[str] = None):
+        """记录已通知的评论（key 为评论所属的监控目标）"""
+        key = key or self.checkpoint_key()
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR IGNORE INTO seen_comments (comment_id, page, notified_at, key) VALUES (?, ?, ?, ?)',
+                (comment_id, page, time.time(), key)
+            )
+
+    def count_seen(self) -> int:
+        """已通知评论总数"""
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM seen_comments').fetchone()[0]
+
+    def load_checkpoint(self, key: Optional[str] = None) -> Optional[Dict]:
+        """读取监控进度
+
+        Returns:
+            {'current_page': 页码, 'page_total': 该页评论数, 'updated_at': 时间戳}，没有记录时返回 None
+        """
+        key = key or self.checkpoint_key()
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT current_page, page_total, updated_at FROM checkpoints WHERE key = ?', (key,)
+            ).fetchone()
+
+        if not row:
+            return None
+
+        self._checkpoints[key] = (row[0], row[1])
+        return {'current_page': row[0], 'page_total': row[1], 'updated_at': row[2]}
+
+    def save_checkpoint(self, current_page: int, page_total: int = 0, key: Optional[str] = None):
+        """保存监控进度（与上次相同时跳过）"""
+        key = key or self.checkpoint_key()
+        if self._checkpoints.get(key) == (current_page, page_total):
+            return
+
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO checkpoints (key, current_page, page_total, updated_at) VALUES (?, ?, ?, ?)',
+                (key, current_page, page_total, time.time())
+            )
+        self._checkpoints[key] = (current_page, page_total)
+
+    def resume_page(self, start_page: Optional[int] = None, key: Optional[str] = None) -> int:
+        """确定起始页面：命令行指定 > 上次进度 > START_PAGE"""
+        if start_page:
+            return start_page
+
+        checkpoint = self.load_checkpoint(key)
+        if checkpoint:
+            logger.info(f"💾 恢复进度：页面 {checkpoint['current_page']}（上次 {checkpoint['page_total']} 条评论）")
+            return checkpoint['current_page']
+
+        return Config.START_PAGE
+
+    def add_backfill(self, start_page: int, end_page: int, key: Optional[str] = None):
+        """记录需要补查的页面范围（包含两端）"""
+        if start_page > end_page:
+            return
+        key = key or self.checkpoint_key()
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO backfill (key, start_page, end_page, added_at) VALUES (?, ?, ?, ?)',
+                (key, start_page, end_page, time.time())
+            )
+
+    def pending_backfill(self, limit: int, key: Optional[str] = None) -> List[int]:
+        """按页码顺序取出最多 limit 个待补查的页面（补查完成前不会移除）"""
+        key = key or self.checkpoint_key()
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT start_page, end_page FROM backfill WHERE key = ? ORDER BY start_page', (key,)
+            ).fetchall()
+
+        pages: List[int] = []
+        for start_page, end_page in rows:
+            for page in range(start_page, end_page + 1):
+                if len(pages) >= limit:
+                    return pages
+                if page not in pages:
+                    pages.append(page)
+        return pages
+
+    def complete_backfill(self, page: int, key: Optional[str] = None):
+        """页面已补查，从待补查范围中移除"""
+        key = key or self.checkpoint_key()
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT start_page, end_page, added_at FROM backfill '
+                'WHERE key = ? AND start_page <= ? AND end_page >= ?', (key, page, page)
+            ).fetchall()
+            for start_page, end_page, added_at in rows:
+                self.conn.execute('DELETE FROM backfill WHERE key = ? AND start_page = ?', (key, start_page))
+                for new_start, new_end in ((start_page, page - 1), (page + 1, end_page)):
+                    if new_start <= new_end:
+                        self.conn.execute(
+                            'INSERT OR REPLACE INTO backfill (key, start_page, end_page, added_at) '
+                            'VALUES (?, ?, ?, ?)', (key, new_start, new_end, added_at)
+                        )
+
+    def count_backfill(self, key: Optional[str] = None) -> int:
+        """待补查的页面数"""
+        key = key or self.checkpoint_key()
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT COALESCE(SUM(end_page - start_page + 1), 0) FROM backfill WHERE key = ?', (key,)
+            ).fetchone()
+        return row[0]
+
+    def archive_comment(self, comment: Dict, key: Optional[str] = None):
+        """归档评论（已存在时更新内容）"""
+        key = key or self.checkpoint_key()
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO archive '
+                '(comment_id, key, page, author, timestamp, content, link, archived_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (comment['comment_id'], key, comment.get('page'), comment.get('author'),
+                 comment.get('timestamp'), comment.get('content'), comment.get('link'), time.time())
+            )
+
+    def count_archived(self, key: Optional[str] = None) -> int:
+        """已归档的评论数"""
+        key = key or self.checkpoint_key()
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM archive WHERE key = ?', (key,)).fetchone()[0]
+
+    def target_history(self, key: Optional[str] = None) -> Dict[str, List]:
+        """目标用户的历史发帖时间（用于估计各时段的活跃度）
+
+        Returns:
+            {'timestamps': 归档评论的发布时间文本, 'notified_at': 该目标未归档评论的通知时间戳}
+        """
+        key = key or self.checkpoint_key()
+        with self.lock:
+            timestamps = [row[0] for row in self.conn.execute(
+                'SELECT timestamp FROM archive WHERE key = ? AND timestamp IS NOT NULL', (key,)
+            )]
+            notified_at = [row[0] for row in self.conn.execute(
+                'SELECT notified_at FROM seen_comments WHERE key = ? AND notified_at IS NOT NULL '
+                'AND comment_id NOT IN (SELECT comment_id FROM archive)', (key,)
+            )]
+        return {'timestamps': timestamps, 'notified_at': notified_at}
+
+    def close(self):
+        """关闭数据库"""
+        with self.lock:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Telegram 后台发送队列
+抓取线程只负责把评论放入有界队列，由后台线程通过复用的 HTTP 连接发送：
+- 短时间内的多条评论合并成一条消息（不超过 Telegram 的 4096 字符限制）
+- 429 按 retry_after 等待，网络错误和 5xx 指数退避重试
+- 发送成功后回调 on_delivered（由监控器标记为已通知）
+"""
+
+import time
+import queue
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Set
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Telegram 单条消息最大长度
+MAX_MESSAGE_LENGTH = 4096
+
+# 合并多条评论时的分隔
+MESSAGE_SEPARATOR = '\n\n━━━━━━━━━━\n\n'
+
+_STOP = object()
+
+
+class TelegramDeliveryQueue:
+    """Telegram 后台发送队列
+
+    Args:
+        notifier: 各版本的 TelegramNotifier（提供 bot_token / chat_id / format_comment）
+        on_delivered: 评论发送成功后的回调（在发送线程中调用）
+        disable_web_page_preview: 是否关闭链接预览
+    """
+
+    def __init__(
+        self,
+        notifier,
+        on_delivered: Optional[Callable[[Dict], None]] = None,
+        disable_web_page_preview: bool = True
+    ):
+        self.notifier = notifier
+        self.on_delivered = on_delivered
+        self.disable_web_page_preview = disable_web_page_preview
+        self.api_url = f"https://api.telegram.org/bot{notifier.bot_token}/sendMessage"
+
+        self.queue: "queue.Queue" = queue.Queue(maxsize=Config.TELEGRAM_QUEUE_SIZE)
+        self.pending: Set[str] = set()  # 已入队、尚未发送成功的评论 ID
+        self.lock = threading.Lock()
+        self.worker: Optional[threading.Thread] = None
+
+        # 复用连接（Keep-Alive），避免每条消息重新握手
+        self.http = requests.Session()
+        self.http.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+
+        # 统计
+        self.sent_messages = 0
+        self.sent_comments = 0
+        self.dropped_comments = 0
+
+    def start(self):
+        """启动发送线程"""
+        if self.worker and self.worker.is_alive():
+            return
+        self.worker = threading.Thread(target=self._run, name='telegram-delivery', daemon=True)
+        self.worker.start()
+
+    def is_pending(self, comment_id: str) -> bool:
+        """评论是否已在队列中等待发送"""
+        with self.lock:
+            return comment_id in self.pending
+
+    def submit(self, comment: Dict) -> bool:
+        """把评论放入发送队列（不阻塞）
+
+        Returns:
+            是否已入队（已在队列中也返回 True；队列已满返回 False）
+        """
+        comment_id = comment['comment_id']
+
+        with self.lock:
+            if comment_id in self.pending:
+                return True
+            try:
+                self.queue.put_nowait(comment)
+            except queue.Full:
+                logger.warning(f"⚠️  Telegram 发送队列已满，评论 {comment_id} 稍后重试")
+                return False
+            self.pending.add(comment_id)
+
+        self.start()
+        return True
+
+    def close(self, timeout: float = 30):
+        """发送队列中剩余的消息后停止"""
+        if self.worker and self.worker.is_alive():
+            remaining = self.queue.qsize()
+            if remaining:
+                logger.info(f"📨 等待发送队列中剩余的 {remaining} 条评论...")
+            self.queue.put(_STOP)
+            self.worker.join(timeout)
+
+        self.http.close()
+        logger.info(f"📨 Telegram 队列：发送 {self.sent_messages} 条消息（{self.sent_comments} 条评论），"
+                    f"放弃 {self.dropped_comments} 条")
+
+    def _run(self):
+        """发送线程主循环"""
+        while True:
+            item = self.queue.get()
+            if item is _STOP:
+                return
+
+            # 等待一个合并窗口，把同一批次的评论一起发送
+            batch = [item]
+            stop = False
+            deadline = time.time() + Config.TELEGRAM_BATCH_WINDOW
+            while True:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            for chunk in self._pack(batch):
+                self._deliver(chunk)
+
+            if stop:
+                return
+
+    def _pack(self, comments: List[Dict]) -> List[List[Dict]]:
+        """把评论分组，每组合并后的消息不超过 MAX_MESSAGE_LENGTH"""
+        chunks: List[List[Dict]] = []
+        current: List[Dict] = []
+        length = 0
+
+        for comment in comments:
+            size = len(self._format(comment))
+            extra = size if not current else size + len(MESSAGE_SEPARATOR)
+
+            if current and length + extra > MAX_MESSAGE_LENGTH:
+                chunks.append(current)
+                current, length = [], 0
+                extra = size
+
+            current.append(comment)
+            length += extra
+
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def _format(self, comment: Dict) -> str:
+        """单条评论的消息文本（超长时截断）
+
+        只截断转义前的评论内容（必要时去掉链接列表）再重新生成，
+        不在已生成的 HTML 上截断，避免切断标签或实体导致 Telegram 400
+        """
+        text = self.notifier.format_comment(comment)
+        content = comment['content']
+
+        while len(text) > MAX_MESSAGE_LENGTH:
+            if content:
+                content = content[:max(0, len(content) - (len(text) - MAX_MESSAGE_LENGTH) - 3)]
+                comment = dict(comment, content=content + '...')
+            elif comment.get('links'):
+                comment = dict(comment, links=[])
+            else:
+                break
+            text = self.notifier.format_comment(comment)
+
+        return text
+
+    def _deliver(self, comments: List[Dict]):
+        """发送一组评论，失败时重试"""
+        text = MESSAGE_SEPARATOR.join(self._format(c) for c in comments)
+        ids = [c['comment_id'] for c in comments]
+
+        if self._send(text):
+            self.sent_messages += 1
+            self.sent_comments += len(comments)
+            logger.info(f"📤 已发送 {len(comments)} 条评论的通知: {', '.join(ids)}")
+            for comment in comments:
+                if self.on_delivered:
+                    try:
+                        self.on_delivered(comment)
+                    except Exception as e:
+                        logger.error(f"❌ 标记评论 {comment['comment_id']} 已通知失败: {e}")
+        else:
+            self.dropped_comments += len(comments)
+            logger.error(f"❌ 评论通知发送失败，等待下次检查重新入队: {', '.join(ids)}")
+
+        with self.lock:
+            self.pending.difference_update(ids)
+
+    def _send(self, text: str) -> bool:
+        """调用 sendMessage，处理 429 和临时错误"""
+        payload = {
+            'chat_id': self.notifier.chat_id,
+            'text': text,
+            'parse_mode': 'HTML',
+            'disable_web_page_preview': self.disable_web_page_preview
+        }
+
+        backoff = 1.0
+        for attempt in range(1, Config.TELEGRAM_MAX_RETRIES + 1):
+            try:
+                response = self.http.post(self.api_url, json=payload, timeout=10)
+
+                if response.status_code == 200:
+                    return True
+
+                if response.status_code == 429:
+                    # Telegram 返回需要等待的秒数
+                    try:
+                        retry_after = response.json().get('parameters', {}).get('retry_after', backoff)
+                    except ValueError:
+                        retry_after = backoff
+                    logger.warning(f"⏳ Telegram 限流，{retry_after} 秒后重试 ({attempt}/{Config.TELEGRAM_MAX_RETRIES})")
+                    time.sleep(float(retry_after))
+                    continue
+
+                if response.status_code < 500:
+                    # 4xx（消息格式错误等）重试也不会成功
+                    logger.error(f"❌ Telegram 消息发送失败: {response.text}")
+                    return False
+
+                logger.warning(f"⚠️  Telegram 返回 {response.status_code}，{backoff:.0f} 秒后重试 "
+                               f"({attempt}/{Config.TELEGRAM_MAX_RETRIES})")
+
+            except requests.RequestException as e:
+                logger.warning(f"⚠️  发送 Telegram 消息时出错: {e}，{backoff:.0f} 秒后重试 "
+                               f"({attempt}/{Config.TELEGRAM_MAX_RETRIES})")
+
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+        return False
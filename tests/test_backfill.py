@@ -0,0 +1,38 @@
+"""批量补查：页面范围解析"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+pytest.importorskip('dotenv')
+pytest.importorskip('lxml')
+
+from backfill import parse_range
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('1:1000', (1, 1000)),
+    ('5:5', (5, 5)),
+    (' 10 : 20 ', (10, 20)),
+])
+def test_parse_range(value, expected):
+    assert parse_range(value) == expected
+
+
+@pytest.mark.parametrize('value', [
+    '1000',
+    '1-1000',
+    ':10',
+    '10:',
+    'a:b',
+    '-1:5',
+    '0:5',
+    '20:10',
+    '1:2:3',
+])
+def test_parse_range_invalid(value):
+    with pytest.raises(ValueError):
+        parse_range(value)
@@ -0,0 +1,113 @@
+"""持久化浏览器配置目录"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+pytest.importorskip('dotenv')
+
+import browser_profile
+from browser_profile import BrowserProfile, dir_size_mb
+
+NAME = 'playwright'
+
+
+def write(path, size=0, text=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text if text is not None else 'x' * size)
+
+
+@pytest.fixture
+def profile(tmp_path):
+    return BrowserProfile(str(tmp_path), max_mb=1)
+
+
+def test_disabled():
+    profile = BrowserProfile('')
+    assert not profile.enabled
+    assert profile.prepare(NAME) is None
+
+
+def test_prepare_creates_directory(profile, tmp_path):
+    path = profile.prepare(NAME)
+    assert path == str(tmp_path / NAME)
+    assert os.path.isdir(path)
+
+
+def test_remove_locks(profile, tmp_path):
+    path = tmp_path / NAME
+    write(str(path / 'SingletonCookie'), text='1')
+    write(str(path / 'lockfile'), text='')
+    # 崩溃残留的 SingletonLock 是指向 hostname-pid 的悬空符号链接
+    os.symlink('host-12345', path / 'SingletonLock')
+    write(str(path / 'Default' / 'Cookies'), text='keep')
+
+    profile.prepare(NAME)
+    assert sorted(os.listdir(path)) == ['Default']
+    assert (path / 'Default' / 'Cookies').read_text() == 'keep'
+
+
+def test_corrupt_profile_is_quarantined(profile, tmp_path):
+    path = tmp_path / NAME
+    write(str(path / 'Local State'), text='{"ok": true}')
+    write(str(path / 'Default' / 'Preferences'), text='{"truncated": ')
+    assert not BrowserProfile.is_valid(str(path))
+
+    assert profile.prepare(NAME) == str(path)
+    assert os.listdir(path) == []
+    quarantined = [d for d in os.listdir(tmp_path) if d.startswith(f'{NAME}.corrupt-')]
+    assert len(quarantined) == 1
+    assert (tmp_path / quarantined[0] / 'Default' / 'Preferences').exists()
+
+
+def test_valid_profile_is_kept(profile, tmp_path):
+    path = tmp_path / NAME
+    write(str(path / 'Local State'), text='{}')
+    write(str(path / 'Default' / 'Preferences'), text='{"profile": {}}')
+    assert BrowserProfile.is_valid(str(path))
+    profile.prepare(NAME)
+    assert (path / 'Default' / 'Preferences').exists()
+
+
+def test_quarantine_keeps_latest(profile, tmp_path, monkeypatch):
+    now = [1_700_000_000]
+    monkeypatch.setattr(browser_profile.time, 'time', lambda: now[0])
+    for _ in range(4):
+        write(str(tmp_path / NAME / 'Local State'), text='{')
+        profile.prepare(NAME)
+        now[0] += 1
+
+    quarantined = sorted(d for d in os.listdir(tmp_path) if d.startswith(f'{NAME}.corrupt-'))
+    assert quarantined == [f'{NAME}.corrupt-1700000002', f'{NAME}.corrupt-1700000003']
+
+
+def test_oversized_profile_prunes_caches(profile, tmp_path):
+    path = tmp_path / NAME
+    write(str(path / 'Default' / 'Cache' / 'data_1'), size=2 * 1024 * 1024)
+    write(str(path / 'ShaderCache' / 'data_0'), size=1024)
+    write(str(path / 'Default' / 'Cookies'), text='keep')
+    assert dir_size_mb(str(path)) > 1
+
+    profile.prepare(NAME)
+    assert not (path / 'Default' / 'Cache').exists()
+    assert not (path / 'ShaderCache').exists()
+    assert (path / 'Default' / 'Cookies').read_text() == 'keep'
+
+
+def test_oversized_profile_is_rebuilt(profile, tmp_path):
+    path = tmp_path / NAME
+    write(str(path / 'Default' / 'History'), size=2 * 1024 * 1024)
+
+    assert profile.prepare(NAME) == str(path)
+    assert os.listdir(path) == []
+
+
+def test_dir_size_mb(tmp_path):
+    write(str(tmp_path / 'a' / 'b'), size=512 * 1024)
+    write(str(tmp_path / 'c'), size=512 * 1024)
+    assert dir_size_mb(str(tmp_path)) == pytest.approx(1.0)
+    assert dir_size_mb(str(tmp_path / 'missing')) == 0
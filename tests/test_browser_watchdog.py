@@ -0,0 +1,118 @@
+"""浏览器内存看门狗"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+pytest.importorskip('dotenv')
+
+import browser_watchdog
+from browser_watchdog import MEMORY, PAGES, RENDERERS, UNRESPONSIVE, BrowserWatchdog, descendant_pids
+from config import Config
+
+
+def fake_proc(root, processes):
+    """processes: {pid: (ppid, 进程名, RSS 页数, cmdline)}"""
+    for pid, (ppid, name, pages, cmdline) in processes.items():
+        path = root / str(pid)
+        path.mkdir()
+        (path / 'stat').write_text(f'{pid} ({name}) S {ppid} 1 1 0 -1')
+        (path / 'statm').write_text(f'{pages * 2} {pages} 0 0 0 0 0')
+        (path / 'cmdline').write_bytes(cmdline.replace(' ', '\0').encode())
+    (root / 'self').mkdir()
+
+
+@pytest.fixture
+def proc(tmp_path, monkeypatch):
+    fake_proc(tmp_path, {
+        100: (1, 'python', 10, 'python monitor.py'),
+        200: (100, 'chromedriver', 10, 'chromedriver'),
+        300: (200, 'chrome', 256, 'chrome --headless'),
+        301: (300, 'chrome (renderer) x', 256, 'chrome --type=renderer'),
+        302: (300, 'chrome', 256, 'chrome --type=renderer'),
+        303: (300, 'chrome', 256, 'chrome --type=gpu-process'),
+        999: (1, 'other', 1024, 'other'),
+    })
+    monkeypatch.setattr(browser_watchdog, 'PROC', str(tmp_path))
+    monkeypatch.setattr(browser_watchdog, 'PAGE_SIZE', 4096)
+    return tmp_path
+
+
+@pytest.fixture
+def watchdog(proc, monkeypatch):
+    monkeypatch.setattr(Config, 'RECYCLE_MODE', 'memory')
+    monkeypatch.setattr(Config, 'BROWSER_MAX_RSS_MB', 100)
+    monkeypatch.setattr(Config, 'BROWSER_MAX_RENDERERS', 2)
+    return BrowserWatchdog(100)
+
+
+def test_descendant_pids(proc):
+    assert sorted(descendant_pids(100)) == [200, 300, 301, 302, 303]
+    assert sorted(descendant_pids(300)) == [301, 302, 303]
+    assert descendant_pids(999) == []
+
+
+def test_sample(watchdog):
+    # 10 + 256 * 4 页，每页 4 KiB
+    stats = watchdog.sample()
+    assert stats['processes'] == 5
+    assert stats['renderers'] == 2
+    assert stats['rss_mb'] == pytest.approx((10 + 256 * 4) * 4096 / 1024 / 1024)
+
+
+def test_within_limits(watchdog):
+    assert watchdog.check(lambda: True) is None
+    assert watchdog.last_kind is None
+    assert watchdog.peak_rss_mb == pytest.approx(watchdog.last_rss_mb)
+
+
+def test_unresponsive(watchdog):
+    assert watchdog.check(lambda: False) == "浏览器无响应"
+    assert watchdog.last_kind == UNRESPONSIVE
+
+
+def test_memory_limit(watchdog):
+    watchdog.max_rss_mb = 4
+    assert '超过上限 4 MB' in watchdog.check()
+    assert watchdog.last_kind == MEMORY
+
+
+def test_renderer_limit(watchdog):
+    watchdog.max_renderers = 1
+    assert '渲染进程 2 个' in watchdog.check()
+    assert watchdog.last_kind == RENDERERS
+
+
+def test_reset(watchdog):
+    watchdog.check()
+    watchdog.reset()
+    assert watchdog.last_rss_mb is None
+    assert watchdog.peak_rss_mb == 0
+
+
+def test_memory_mode_ignores_page_count(watchdog):
+    assert watchdog.recycle_reason(10_000, True) is None
+
+
+def test_pages_mode(proc, monkeypatch):
+    monkeypatch.setattr(Config, 'RECYCLE_MODE', 'pages')
+    monkeypatch.setattr(Config, 'RESTART_INTERVAL', 5)
+    watchdog = BrowserWatchdog(100)
+    assert not watchdog.enabled
+
+    assert watchdog.recycle_reason(4, True) is None
+    # 只在切换页面时重启
+    assert watchdog.recycle_reason(5, False) is None
+    assert watchdog.recycle_reason(5, True) == "已检查 5 页，定期重启"
+    assert watchdog.last_kind == PAGES
+    # 不检查存活
+    assert watchdog.recycle_reason(1, True, lambda: False) is None
+
+
+def test_missing_proc_falls_back_to_pages(tmp_path, monkeypatch):
+    monkeypatch.setattr(browser_watchdog, 'PROC', str(tmp_path / 'missing'))
+    monkeypatch.setattr(Config, 'RECYCLE_MODE', 'memory')
+    assert not BrowserWatchdog(100).enabled
@@ -0,0 +1,72 @@
+"""Cloudflare 响应分类"""
+
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from cf_classifier import (BLOCK, ERROR, INTERSTITIAL, NOT_FOUND, OK,
+                           classify_response)
+
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures', 'cf')
+
+with open(os.path.join(FIXTURES, 'manifest.json'), encoding='utf-8') as f:
+    MANIFEST = json.load(f)
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('case', MANIFEST, ids=[case['file'] for case in MANIFEST])
+def test_fixtures(case):
+    result = classify_response(case['status'], case['headers'], fixture(case['file']))
+    assert result.kind == case['expected'], result.reason
+
+
+def test_large_page_mentioning_cloudflare_is_ok():
+    # 评论区讨论 "Just a moment..." 的大页面，挑战标记出现在页面后部
+    comment = ('<li class="Item ItemComment"><div class="Message">'
+               'Stuck on Cloudflare "Just a moment..." with _cf_chl_opt in the source</div></li>')
+    body = '<html><body><ul class="MessageList">' + comment * 2000 + '</ul></body></html>'
+    result = classify_response(200, {'server': 'cloudflare'}, body)
+    assert result.kind == OK
+    assert not result.is_challenge
+
+
+def test_challenge_flags():
+    managed = classify_response(403, {'cf-mitigated': 'challenge'}, fixture('interstitial_managed.html'))
+    assert managed.kind == INTERSTITIAL and managed.is_challenge
+    assert classify_response(403, {'cf-mitigated': 'challenge'}, fixture('turnstile.html')).is_challenge
+    assert not classify_response(403, {'server': 'cloudflare'}, fixture('block_1020.html')).is_challenge
+
+
+def test_headers_are_case_insensitive():
+    result = classify_response(403, {'Cf-Mitigated': 'challenge'}, b'<html></html>')
+    assert result.kind == INTERSTITIAL
+
+
+def test_block_reports_error_code():
+    result = classify_response(403, {'server': 'cloudflare'}, fixture('block_1020.html'))
+    assert result.kind == BLOCK
+    assert '1020' in result.reason
+
+
+def test_origin_error_is_not_block():
+    # 5xx 的 Cloudflare 错误页是源站故障
+    assert classify_response(502, {'server': 'cloudflare'}, fixture('origin_error_502.html')).kind == ERROR
+
+
+def test_plain_403_without_cloudflare_is_error():
+    assert classify_response(403, {}, b'Forbidden').kind == ERROR
+
+
+def test_str_body_and_empty_body():
+    assert classify_response(200, None, '<div class="MessageList"></div>').kind == OK
+    assert classify_response(404, None, None).kind == NOT_FOUND
+    assert classify_response(200, None, b'').kind == OK
@@ -0,0 +1,131 @@
+"""评论提取"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+pytest.importorskip('dotenv')
+pytest.importorskip('lxml')
+
+from comment_extractor import (extract_comment_times, extract_comments, extract_last_page,
+                               parse_comment_time, prescan)
+
+USER = 'FAT32'
+IMAGE = 'https://lowendtalk.com/uploads/editor/jm/2b3rylu483wr.png'
+URL = 'https://lowendtalk.com/discussion/1/x/p2'
+
+
+def item(comment_id, author, message, time='2025-11-29T21:30:00+00:00'):
+    return (f'<li class="Item ItemComment" id="Comment_{comment_id}">'
+            f'<a class="Username" href="/profile/{author}">{author}</a>'
+            f'<time datetime="{time}" title="November 29, 2025">Nov 29</time>'
+            f'<div class="Message userContent">{message}</div></li>')
+
+
+def page(*items, extra=''):
+    return (f'<html><body><ul class="MessageList DataList Comments">{"".join(items)}</ul>'
+            f'{extra}</body></html>')
+
+
+def extract(html, **kwargs):
+    return extract_comments(html, 2, URL, target_user=USER, required_image_url=IMAGE,
+                            filter_blockquote=True, **kwargs)
+
+
+def test_prescan_counts_items():
+    html = page(item(1, 'alice', 'hi'), item(2, USER, f'<img src="{IMAGE}">'),
+                '<li class="Item">not a comment</li>')
+    assert prescan(html, USER, IMAGE) == {'total': 2, 'has_user': True, 'has_image': True}
+    assert prescan(html.encode(), USER, IMAGE) == {'total': 2, 'has_user': True, 'has_image': True}
+
+
+def test_prescan_matches_escaped_values():
+    image = 'https://example.com/a.png?x=1&y=2'
+    html = page(item(1, USER, '<img src="https://example.com/a.png?x=1&amp;y=2">'))
+    assert prescan(html, USER, image)['has_image']
+    assert prescan(html.encode(), USER, image)['has_image']
+
+
+def test_prescan_skips_parse_without_candidates():
+    html = page(item(1, 'alice', f'<img src="{IMAGE}">'), item(2, USER, 'no image'))
+    result = extract(html.encode())
+    assert result['comments'] == []
+    assert result['total'] == 2
+    assert len(result['comment_times']) == 2
+
+
+@pytest.mark.parametrize('html', [
+    page(item(1, 'alice', 'hi'), item(2, USER, f'<p>offer</p><img src="{IMAGE}">'),
+         item(3, USER, f'<blockquote>q</blockquote><img src="{IMAGE}">'),
+         item(4, USER, 'no image')),
+    page(item(1, USER, 'no image'), item(2, 'alice', f'<img src="{IMAGE}">')),
+    page(),
+], ids=['candidates', 'user-and-image-in-different-comments', 'empty'])
+def test_prescan_does_not_change_result(html):
+    for data in (html, html.encode()):
+        assert extract(data) == extract(data, use_prescan=False)
+
+
+def test_extract_filters_comments():
+    html = page(item(1, 'alice', 'hi'),
+                item(2, USER, f'<p>offer</p><img src="{IMAGE}"><a href="/discussion/2">link</a>'),
+                item(3, USER, f'<blockquote>q</blockquote><img src="{IMAGE}">'),
+                item(4, USER, 'no image'))
+    result = extract(html.encode())
+    assert [c['comment_id'] for c in result['comments']] == ['Comment_2']
+    comment = result['comments'][0]
+    assert comment['links'] == ['https://lowendtalk.com/discussion/2']
+    assert comment['link'] == f'{URL}#Comment_2'
+    assert comment['page'] == 2
+    assert result['total'] == 4
+
+
+def test_page_not_found():
+    html = '<html><body><h1>Page not found.</h1></body></html>'
+    assert extract(html) is None
+    assert extract(html, use_prescan=False) is None
+
+
+PAGER = ('<div id="PagerAfter" class="Pager">'
+         '<a href="/discussion/1/x/p1" class="Previous">«</a>'
+         '<a href="/discussion/1/x/p1">1</a><span class="Ellipsis"><span>…</span></span>'
+         '<a href="/discussion/1/x/p41">41</a><a href="/discussion/1/x/p42" class="LastPage">42</a>'
+         '<a href="/discussion/1/x/p3" class="Next">»</a></div>')
+
+
+@pytest.mark.parametrize('html, expected', [
+    (page(extra=PAGER), 42),
+    (page(extra=PAGER.replace('div', 'span')), 42),
+    # 最后一页链接只有文字时也能读取
+    (page(extra='<div id="PagerBefore"><a href="#">1</a> <a href="#">7</a></div>'), 7),
+    # 分页之外的链接不计入
+    (page(item(1, 'alice', '<a href="/discussion/9/y/p99">p99</a>'), extra=PAGER), 42),
+    # 没有分页时按评论总数推算
+    (page(extra='<script>gdn.meta = {"CountComments":"61"};</script>'), 3),
+    (page(extra='<script>gdn.meta = {"CountComments":0};</script>'), 1),
+    (page(), None),
+], ids=['div', 'span', 'text-only', 'outside-pager', 'count', 'count-zero', 'none'])
+def test_extract_last_page(html, expected):
+    assert extract_last_page(html) == expected
+    assert extract_last_page(html.encode()) == expected
+
+
+def test_extract_result_includes_last_page():
+    html = page(item(1, 'alice', 'hi'), extra=PAGER)
+    assert extract(html.encode())['last_page'] == 42
+    assert extract(html.encode(), use_prescan=False)['last_page'] == 42
+
+
+def test_extract_comment_times():
+    html = page(item(1, 'alice', 'hi', time='2025-11-29T21:31:00+00:00'),
+                item(2, USER, 'quoted <time datetime="2020-01-01T00:00:00Z">old</time>',
+                     time='2025-11-29T21:30:00Z'),
+                item(3, 'bob', 'bad', time='not a time'),
+                extra='<div class="InThisDiscussion"><time datetime="2019-01-01T00:00:00Z"></time></div>')
+    expected = [parse_comment_time('2025-11-29T21:30:00+00:00'), parse_comment_time('2025-11-29T21:31:00+00:00')]
+    assert extract_comment_times(html) == expected
+    assert extract_comment_times(html.encode()) == expected
+    assert parse_comment_time(None) is None
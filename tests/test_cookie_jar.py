@@ -0,0 +1,118 @@
+"""SharedCookieJar 模拟目标对齐"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+pytest.importorskip('dotenv')
+
+import cookie_jar
+from config import Config
+from cookie_jar import SharedCookieJar, impersonate_for, major_version
+
+TARGETS = [110, 116, 119, 120, 123, 124, 131]
+
+
+class FakeCookies:
+    def __init__(self):
+        self.values = {}
+
+    def set(self, name, value, **kwargs):
+        self.values[name] = value
+
+
+class FakeSession:
+    def __init__(self):
+        self.cookies = FakeCookies()
+        self.headers = {}
+
+
+def ua(major):
+    return f'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{major}.0.0.0 Safari/537.36'
+
+
+@pytest.fixture
+def jar(tmp_path, monkeypatch):
+    monkeypatch.setattr(cookie_jar, 'impersonate_targets', lambda: TARGETS)
+    monkeypatch.setattr(Config, 'IMPERSONATE_MAX_DRIFT', 4)
+    return SharedCookieJar(str(tmp_path / 'cookies.json'))
+
+
+def save(jar, user_agent, browser_version=None):
+    cookies = [{'name': 'cf_clearance', 'value': 'token', 'domain': '.lowendtalk.com',
+                'path': '/', 'secure': True, 'expires': time.time() + 3600}]
+    jar.save(cookies, user_agent, browser_version)
+
+
+@pytest.mark.parametrize('value, expected', [
+    (ua(131), 131),
+    ('HeadlessChrome/131.0.6778.33', 131),
+    ('120.0.6099.109', 120),
+    ('chrome120', 120),
+    ('Mozilla/5.0 (X11; Linux x86_64; rv:128.0) Gecko/20100101 Firefox/128.0', None),
+    (None, None),
+])
+def test_major_version(value, expected):
+    assert major_version(value) == expected
+
+
+@pytest.mark.parametrize('browser_major, expected', [
+    (120, 'chrome120'),  # 完全一致
+    (131, 'chrome131'),
+    (121, 'chrome120'),  # 取最接近的目标
+    (122, 'chrome123'),
+    (135, 'chrome131'),  # 比最新目标新，但在允许范围内
+    (136, None),         # 比最新目标新太多
+    (90, None),
+    (None, None),
+])
+def test_impersonate_for(monkeypatch, browser_major, expected):
+    monkeypatch.setattr(Config, 'IMPERSONATE_MAX_DRIFT', 4)
+    assert impersonate_for(browser_major, TARGETS) == expected
+
+
+def test_matching_browser_applies_cookies_and_ua(jar):
+    save(jar, ua(120), '120.0.6099.109')
+    session = FakeSession()
+
+    assert jar.impersonate() == 'chrome120'
+    assert jar.apply_to_session(session, 'chrome120')
+    assert session.cookies.values == {'cf_clearance': 'token'}
+    assert session.headers['User-Agent'] == ua(120)
+
+
+def test_mismatched_session_is_refused_until_realigned(jar):
+    # Playwright 改写了 UA，实际版本以 browser_version 为准
+    save(jar, ua(120), 'HeadlessChrome/131.0.6778.33')
+    session = FakeSession()
+
+    assert jar.browser_major == 131
+    assert not jar.apply_to_session(session, 'chrome120')
+    assert session.cookies.values == {}
+    assert 'User-Agent' not in session.headers
+
+    assert jar.impersonate() == 'chrome131'
+    assert jar.apply_to_session(session, 'chrome131')
+
+
+def test_newer_browser_uses_nearest_target_or_is_refused(jar):
+    save(jar, ua(134))
+    assert jar.impersonate() == 'chrome131'
+    assert jar.apply_to_session(FakeSession(), 'chrome131')
+
+    save(jar, ua(140))
+    assert jar.impersonate() is None
+    assert not jar.apply_to_session(FakeSession(), 'chrome131')
+
+
+def test_browser_major_survives_reload(jar):
+    save(jar, ua(120), '124.0.6367.60')
+
+    reloaded = SharedCookieJar(jar.path)
+    assert reloaded.load()
+    assert reloaded.browser_major == 124
+    assert reloaded.impersonate() == 'chrome124'
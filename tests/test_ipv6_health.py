@@ -0,0 +1,158 @@
+"""出口地址健康度：冷却、衰减和选择"""
+
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+pytest.importorskip('dotenv')
+
+import ipv6_health
+from config import Config
+from ipv6_health import CHALLENGE, ERROR, OK, AddressHealth
+
+A, B, C = 'fd00::a', 'fd00::b', 'fd00::c'
+
+
+class Clock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ipv6_health.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def health(tmp_path, monkeypatch, clock):
+    monkeypatch.setattr(Config, 'IPV6_COOLDOWN', 600)
+    monkeypatch.setattr(Config, 'IPV6_STATS_HALF_LIFE', 1)
+    monkeypatch.setattr(Config, 'IPV6_SELECTION', 'health')
+    health = AddressHealth(str(tmp_path / 'state.db'))
+    yield health
+    health.close()
+
+
+def test_record_and_stats(health):
+    health.record(A, OK, latency=2.0)
+    health.record(A, OK, latency=4.0)
+    health.record(A, CHALLENGE)
+    health.record(A, ERROR)
+    health.record(None, OK)
+
+    stats = health.stats([A, B])
+    assert stats[A]['successes'] == pytest.approx(2)
+    assert stats[A]['challenges'] == pytest.approx(1)
+    assert stats[A]['errors'] == pytest.approx(1)
+    # 指数移动平均：0.3 * 4 + 0.7 * 2
+    assert stats[A]['latency'] == pytest.approx(2.6)
+    assert stats[B] == {'successes': 0.0, 'challenges': 0.0, 'errors': 0.0, 'latency': None,
+                        'last_used': None, 'last_challenge': None}
+
+
+def test_decay_halves_per_half_life(health, clock):
+    assert health._decay(None, clock.now) == 1.0
+    assert health._decay(clock.now - 3600, clock.now) == pytest.approx(0.5)
+    assert health._decay(clock.now - 7200, clock.now) == pytest.approx(0.25)
+    # 时钟回拨不放大计数
+    assert health._decay(clock.now + 60, clock.now) == 1.0
+
+
+def test_counts_decay_over_time(health, clock):
+    for _ in range(4):
+        health.record(A, CHALLENGE)
+
+    clock.now += 3600
+    assert health.stats([A])[A]['challenges'] == pytest.approx(2)
+
+    # 新记录在衰减后的计数上累加
+    health.record(A, CHALLENGE)
+    assert health.stats([A])[A]['challenges'] == pytest.approx(3)
+
+
+def test_decay_disabled(tmp_path, monkeypatch, clock):
+    monkeypatch.setattr(Config, 'IPV6_STATS_HALF_LIFE', 0)
+    health = AddressHealth(str(tmp_path / 'state.db'))
+    health.record(A, CHALLENGE)
+    clock.now += 86400 * 30
+    assert health.stats([A])[A]['challenges'] == pytest.approx(1)
+    health.close()
+
+
+def test_choose_skips_addresses_in_cooldown(health, clock):
+    health.record(A, CHALLENGE)
+    health.record(B, OK, latency=1.0)
+
+    clock.now += 300
+    for _ in range(20):
+        assert health.choose([A, B]) == B
+
+
+def test_choose_all_cooling_picks_earliest_release(health, clock):
+    health.record(B, CHALLENGE)
+    clock.now += 10
+    health.record(A, CHALLENGE)
+    clock.now += 10
+    health.record(C, CHALLENGE)
+
+    assert health.choose([A, B, C]) == B
+
+
+def test_cooldown_expires(health, clock):
+    health.record(A, CHALLENGE)
+    clock.now += 600
+    chosen = {health.choose([A]) for _ in range(5)}
+    assert chosen == {A}
+    assert health.choose([A, B]) in (A, B)
+
+
+def test_choose_prefers_healthy_address(health):
+    random.seed(1)
+    for _ in range(30):
+        health.record(A, OK, latency=0.5)
+        health.record(B, OK, latency=0.5)
+    for _ in range(30):
+        health.record(B, CHALLENGE)
+
+    # B 的挑战还在冷却中；把冷却关掉后只比较 Thompson 采样的得分
+    health.cooldown = 0
+    picks = [health.choose([A, B]) for _ in range(200)]
+    assert picks.count(A) > 190
+
+
+def test_choose_penalises_latency(health):
+    random.seed(2)
+    for _ in range(50):
+        health.record(A, OK, latency=0.2)
+        health.record(B, OK, latency=60.0)
+
+    picks = [health.choose([A, B]) for _ in range(200)]
+    assert picks.count(A) > 180
+
+
+def test_choose_random_mode(health, monkeypatch):
+    monkeypatch.setattr(Config, 'IPV6_SELECTION', 'random')
+    health.record(A, CHALLENGE)
+    # random 模式不看统计，冷却中的地址也可能被选中
+    random.seed(3)
+    assert {health.choose([A, B]) for _ in range(50)} == {A, B}
+
+
+def test_choose_empty(health):
+    assert health.choose([]) is None
+
+
+def test_stats_shared_between_connections(health):
+    health.record(A, OK, latency=1.0)
+    other = AddressHealth(health.path)
+    assert other.stats([A])[A]['successes'] == pytest.approx(1)
+    other.close()
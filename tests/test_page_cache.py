@@ -0,0 +1,85 @@
+"""页面变化检测缓存"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from page_cache import PageValidatorCache
+
+URL = 'https://lowendtalk.com/discussion/1/x/p2'
+
+
+def page(comments, token='a'):
+    return (f'<html><input name="TransientKey" value="{token}">'
+            f'<ul class="MessageList">{comments}</ul><div class="PagerAfter">{token}</div></html>')
+
+
+def test_digest_covers_only_message_list():
+    digest = PageValidatorCache.message_list_digest
+    assert digest(page('one', token='a')) == digest(page('one', token='b'))
+    assert digest(page('one')) != digest(page('two'))
+    assert digest(page('one')) == digest(page('one').encode())
+    assert digest('<html>Page not found.</html>') is None
+    # 没有 PagerAfter 时摘要到页面末尾
+    assert digest('<ul class="MessageList">x') != digest('<ul class="MessageList">y')
+
+
+def test_unchanged_needs_stored_result():
+    cache = PageValidatorCache()
+    assert not cache.is_unchanged(URL, page('one'))
+    # 同样的内容但还没有解析结果
+    assert not cache.is_unchanged(URL, page('one'))
+
+    cache.store_result(URL, {'comments': [1]})
+    assert cache.is_unchanged(URL, page('one', token='b'))
+    assert cache.get_result(URL) == {'comments': [1]}
+
+
+def test_changed_page_drops_result():
+    cache = PageValidatorCache()
+    cache.is_unchanged(URL, page('one'))
+    cache.store_result(URL, {'comments': [1]})
+
+    assert not cache.is_unchanged(URL, page('two'))
+    assert cache.get_result(URL) is None
+
+
+def test_page_without_message_list_is_never_unchanged():
+    cache = PageValidatorCache()
+    cache.is_unchanged(URL, 'challenge')
+    cache.store_result(URL, {'comments': []})
+    assert not cache.is_unchanged(URL, 'challenge')
+
+
+def test_conditional_headers():
+    cache = PageValidatorCache()
+    headers = {'ETag': '"v1"', 'Last-Modified': 'Sat, 29 Nov 2025 21:30:00 GMT'}
+    cache.is_unchanged(URL, page('one'), headers)
+    # 没有解析结果时不发送条件请求
+    assert cache.conditional_headers(URL) == {}
+
+    cache.store_result(URL, {'comments': []})
+    assert cache.conditional_headers(URL) == {
+        'If-None-Match': '"v1"',
+        'If-Modified-Since': 'Sat, 29 Nov 2025 21:30:00 GMT',
+    }
+
+    cache.is_unchanged(URL, page('one'), {'etag': '"v2"'})
+    assert cache.conditional_headers(URL) == {'If-None-Match': '"v2"'}
+    assert cache.conditional_headers('https://lowendtalk.com/other') == {}
+
+
+def test_lru_eviction():
+    cache = PageValidatorCache(max_entries=2)
+    for n in (1, 2):
+        cache.is_unchanged(f'{URL}{n}', page('x'))
+        cache.store_result(f'{URL}{n}', {'page': n})
+
+    # 访问 1 之后，插入 3 淘汰的是 2
+    cache.is_unchanged(f'{URL}1', page('x'))
+    cache.is_unchanged(f'{URL}3', page('x'))
+
+    assert cache.get_result(f'{URL}1') == {'page': 1}
+    assert cache.get_result(f'{URL}2') is None
+    assert len(cache.entries) == 2
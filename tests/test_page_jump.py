@@ -0,0 +1,108 @@
+"""跳页和补查"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+pytest.importorskip('dotenv')
+
+from config import Config
+from page_jump import PageJumper
+from state_store import StateStore
+
+KEY = 'https://lowendtalk.com/discussion/1/x#FAT32'
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = StateStore(str(tmp_path / 'state.db'))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def jumper(store, monkeypatch):
+    monkeypatch.setattr(Config, 'PAGE_JUMP', True)
+    monkeypatch.setattr(Config, 'PAGE_JUMP_MIN_GAP', 2)
+    monkeypatch.setattr(Config, 'BACKFILL_SKIPPED', True)
+    monkeypatch.setattr(Config, 'BACKFILL_PER_CYCLE', 2)
+    return PageJumper(store, KEY)
+
+
+@pytest.mark.parametrize('last_page, expected', [
+    (None, 11),  # 没有分页信息
+    (10, 11),    # 已在最后一页
+    (11, 11),    # 只落后一页，正常前进
+    (12, 12),    # 落后 PAGE_JUMP_MIN_GAP 页，跳到最后一页
+    (50, 50),
+])
+def test_next_page(jumper, last_page, expected):
+    assert jumper.next_page(10, {'total': 30, 'last_page': last_page}) == expected
+
+
+def test_jump_records_skipped_range(jumper, store):
+    assert jumper.next_page(10, {'last_page': 15}) == 15
+    assert store.count_backfill(KEY) == 4
+    assert jumper.pending() == [11, 12]
+
+
+def test_jump_disabled(jumper, store, monkeypatch):
+    monkeypatch.setattr(Config, 'PAGE_JUMP', False)
+    assert jumper.next_page(10, {'last_page': 50}) == 11
+    assert store.count_backfill(KEY) == 0
+
+
+def test_jump_without_backfill(jumper, store, monkeypatch):
+    monkeypatch.setattr(Config, 'BACKFILL_SKIPPED', False)
+    assert jumper.next_page(10, {'last_page': 50}) == 50
+    assert store.count_backfill(KEY) == 0
+
+
+def test_finish(jumper, store):
+    jumper.next_page(10, {'last_page': 15})
+
+    # 失败的页面保留到下个周期
+    assert not jumper.finish(11, {'comments': [], 'total': 0})
+    assert not jumper.finish(11, {'not_found': True})
+    assert store.count_backfill(KEY) == 4
+
+    # 放弃的页面和成功的页面都移出待补查范围
+    assert jumper.finish(12, {'skip_page': True})
+    assert jumper.finish(11, {'comments': [], 'total': 30})
+    assert jumper.pending() == [13, 14]
+
+
+def test_backfill_cycle(jumper, store):
+    jumper.next_page(10, {'last_page': 16})
+    checked, notified = [], []
+
+    def check_page(page_num):
+        checked.append(page_num)
+        if page_num == 13:
+            return {'comments': [], 'total': 0}
+        return {'comments': [{'comment_id': f'Comment_{page_num}'}], 'total': 30}
+
+    jumper.backfill(check_page, notified.extend)
+    assert checked == [11, 12]
+    assert [c['comment_id'] for c in notified] == ['Comment_11', 'Comment_12']
+
+    # 补查失败时停止本周期，下个周期从失败的页面继续
+    jumper.backfill(check_page, notified.extend)
+    assert checked == [11, 12, 13]
+    assert jumper.pending() == [13, 14]
+
+
+def test_backfill_per_cycle_zero(jumper, monkeypatch):
+    jumper.next_page(10, {'last_page': 15})
+    monkeypatch.setattr(Config, 'BACKFILL_PER_CYCLE', 0)
+    assert jumper.pending() == []
+
+
+def test_backfill_is_scoped_by_key(jumper, store):
+    jumper.next_page(10, {'last_page': 15})
+    other = PageJumper(store, 'https://lowendtalk.com/discussion/2/y#FAT32')
+    assert other.pending() == []
+    assert jumper.pending() == [11, 12]
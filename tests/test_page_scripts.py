@@ -0,0 +1,54 @@
+"""页面内 Cloudflare 探测结果的判断"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from page_scripts import CF_PROBE_JS, SELENIUM_CF_PROBE, cf_challenge_reason, probe_cloudflare
+
+
+def probe(**kwargs):
+    result = {'title': 'Flash Sale Megathread — LowEndTalk', 'challenge': False, 'verification': False,
+              'message_list': False, 'comments': 0, 'keyword': None, 'ready_state': 'complete'}
+    result.update(kwargs)
+    return result
+
+
+@pytest.mark.parametrize('result', [None, {}, probe()], ids=['none', 'empty', 'plain'])
+def test_not_challenge(result):
+    assert cf_challenge_reason(result) is None
+
+
+@pytest.mark.parametrize('result, reason', [
+    (probe(title='Just a moment...'), "标题包含 'just a moment'"),
+    (probe(title='请稍候…'), "标题包含 '请稍候'"),
+    (probe(challenge=True), "挑战 iframe / 表单"),
+    (probe(verification=True), "cf-browser-verification"),
+    (probe(keyword='verify you are human'), "页面包含 'verify you are human'"),
+], ids=['title', 'title-zh', 'challenge', 'verification', 'keyword'])
+def test_challenge(result, reason):
+    assert cf_challenge_reason(result) == reason
+
+
+def test_message_list_wins():
+    # 评论中提到 Cloudflare、页面注入了 challenge-platform 脚本时仍是正常页面
+    result = probe(title='Cloudflare issues — LowEndTalk', challenge=True,
+                   keyword='checking your browser', message_list=True, comments=30)
+    assert cf_challenge_reason(result) is None
+
+
+def test_selenium_probe_wraps_function():
+    class Driver:
+        def execute_script(self, script, *args):
+            self.call = (script, args)
+            return probe(challenge=True)
+
+    driver = Driver()
+    assert cf_challenge_reason(probe_cloudflare(driver)) == "挑战 iframe / 表单"
+    script, args = driver.call
+    assert script == SELENIUM_CF_PROBE
+    assert CF_PROBE_JS.strip() in script and script.startswith('return (')
+    assert 'checking your browser' in args[0]
@@ -0,0 +1,153 @@
+"""自适应轮询间隔"""
+
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+pytest.importorskip('dotenv')
+pytest.importorskip('lxml')
+
+import poll_scheduler
+from config import Config
+from poll_scheduler import MAX_ACTIVITY, MIN_ACTIVITY, AdaptiveScheduler, parse_post_time
+from state_store import StateStore
+
+KEY = 'https://lowendtalk.com/discussion/1/x#FAT32'
+
+
+class Clock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(poll_scheduler.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def scheduler(monkeypatch, clock):
+    monkeypatch.setattr(Config, 'POLL_SCHEDULER', 'adaptive')
+    monkeypatch.setattr(Config, 'POLL_MIN', 20)
+    monkeypatch.setattr(Config, 'POLL_MAX', 300)
+    monkeypatch.setattr(Config, 'POLL_COMMENTS', 2)
+    monkeypatch.setattr(Config, 'POLL_JITTER', 0)
+    scheduler = AdaptiveScheduler()
+    # 不读取历史记录，活跃度固定为 1
+    scheduler.history_loaded = clock.now
+    return scheduler
+
+
+def test_parse_post_time():
+    iso = parse_post_time('2025-11-29T21:30:00+00:00')
+    assert iso == datetime.fromisoformat('2025-11-29T21:30:00+00:00').timestamp()
+    assert parse_post_time('2025-11-29T21:30:00Z') == iso
+
+    local = datetime(2025, 11, 28, 12, 34).timestamp()
+    assert parse_post_time('November 28, 2025 12:34PM') == local
+    assert parse_post_time('November 28, 2025 12:34 PM') == local
+    assert parse_post_time('Nov 28, 2025 12:34PM') == local
+    assert parse_post_time('yesterday') is None
+
+
+def test_fixed_mode(scheduler, monkeypatch):
+    monkeypatch.setattr(Config, 'POLL_SCHEDULER', 'fixed')
+    monkeypatch.setattr(Config, 'CHECK_INTERVAL', 60)
+    assert scheduler.next_wait() == 60
+    assert scheduler.next_wait(full=True, fallback=45) == 45
+
+
+def test_unknown_rate_waits_max(scheduler):
+    assert scheduler.next_wait() == 300
+
+
+def test_full_page_waits_min(scheduler):
+    scheduler.rate = 1 / 1000
+    assert scheduler.next_wait(full=True) == 20
+
+
+def test_rate_from_comment_times(scheduler, clock):
+    # 6 条评论分布在最近 100 秒：5 / 100 条每秒，期望 2 条需要 40 秒
+    times = [clock.now - 100 + 20 * i for i in range(6)]
+    scheduler.observe(5, {'total': 6, 'comment_times': times})
+    assert scheduler.rate == pytest.approx(0.05)
+    assert scheduler.next_wait() == pytest.approx(40)
+
+
+def test_comment_times_are_kept_across_pages(scheduler, clock):
+    scheduler.observe(5, {'total': 30, 'comment_times': [clock.now - 200 + i for i in range(15)]})
+    scheduler.observe(6, {'total': 1, 'comment_times': [clock.now - 10]})
+    assert len(scheduler.times) == poll_scheduler.RATE_WINDOW
+    assert scheduler.times[-1] == clock.now - 10
+
+
+def test_rate_from_total_difference(scheduler, clock):
+    scheduler.observe(5, {'total': 10})
+    clock.now += 100
+    scheduler.observe(5, {'total': 20})
+    assert scheduler.rate == pytest.approx(0.1)
+
+    # 换页后不比较评论数
+    clock.now += 100
+    scheduler.observe(6, {'total': 0})
+    assert scheduler.rate == pytest.approx(0.1)
+
+
+def test_wait_is_clamped(scheduler):
+    scheduler.rate = 10.0
+    assert scheduler.next_wait() == 20
+    scheduler.rate = 1e-6
+    assert scheduler.next_wait() == 300
+
+
+def test_jitter_stays_within_bounds(scheduler, monkeypatch):
+    monkeypatch.setattr(Config, 'POLL_JITTER', 0.2)
+    scheduler.rate = 0.02  # 100 秒
+    waits = [scheduler.next_wait() for _ in range(100)]
+    assert all(80 <= w <= 120 for w in waits)
+
+    # 抖动后不超过 POLL_MAX
+    scheduler.rate = None
+    assert all(240 <= scheduler.next_wait() <= 300 for _ in range(20))
+
+
+def test_activity_is_clamped(scheduler):
+    scheduler.hourly = [10.0] * 24
+    assert scheduler.activity() == MAX_ACTIVITY
+    scheduler.hourly = [0.01] * 24
+    assert scheduler.activity() == MIN_ACTIVITY
+
+
+def test_activity_from_history(tmp_path, monkeypatch, clock):
+    store = StateStore(str(tmp_path / 'state.db'))
+    hour = datetime.now().hour
+    post = datetime.now().replace(minute=0, second=0, microsecond=0)
+    for i in range(24):
+        store.archive_comment({'comment_id': f'Comment_{i}', 'timestamp': post.isoformat()}, key=KEY)
+
+    scheduler = AdaptiveScheduler(store, KEY)
+    # 24 条都在当前小时：(24 + 1) / ((24 + 24) / 24) = 12.5，限制为 MAX_ACTIVITY
+    assert scheduler.activity() == MAX_ACTIVITY
+    assert scheduler.hourly[hour] == pytest.approx(12.5)
+    assert scheduler.hourly[(hour + 1) % 24] == pytest.approx(0.5)
+
+    # HISTORY_REFRESH 内不重新读取
+    scheduler.hourly = [1.0] * 24
+    clock.now += poll_scheduler.HISTORY_REFRESH - 1
+    assert scheduler.activity() == 1.0
+    store.close()
+
+
+def test_activity_speeds_up_polling(scheduler):
+    scheduler.rate = 0.01  # 200 秒
+    scheduler.hourly = [2.0] * 24
+    assert scheduler.next_wait() == pytest.approx(100)
@@ -0,0 +1,156 @@
+"""多出口地址的会话池"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+pytest.importorskip('dotenv')
+
+import session_pool
+from config import Config
+from ipv6_health import CHALLENGE, OK, AddressHealth
+from session_pool import SessionPool
+
+A, B, C = 'fd00::a', 'fd00::b', 'fd00::c'
+
+
+class FakeSession:
+    def __init__(self, address):
+        self.address = address
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class Clock:
+    """每次读取前进 1 秒，保证 last_used 各不相同"""
+
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        self.now += 1
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def config(monkeypatch):
+    monkeypatch.setattr(Config, 'SESSION_RATE', 1000.0)
+    monkeypatch.setattr(Config, 'SESSION_BURST', 100)
+    monkeypatch.setattr(session_pool.time, 'time', Clock())
+
+
+@pytest.fixture
+def strategy(monkeypatch):
+    def set_strategy(value):
+        monkeypatch.setattr(Config, 'SESSION_POOL_STRATEGY', value)
+    return set_strategy
+
+
+def borrow(pool):
+    with pool.session() as pooled:
+        return pooled.address
+
+
+def test_sessions_are_bound_to_addresses(strategy):
+    strategy('least_challenged')
+    pool = SessionPool(FakeSession, [A, B])
+    assert len(pool) == 2
+    assert [s.session.address for s in pool.sessions] == [A, B]
+
+
+def test_no_addresses_falls_back_to_default_session(strategy):
+    strategy('least_challenged')
+    pool = SessionPool(FakeSession, [])
+    assert len(pool) == 1
+    assert pool.sessions[0].address is None
+    assert pool.sessions[0].name == '默认出口'
+
+
+def test_round_robin(strategy):
+    strategy('round_robin')
+    pool = SessionPool(FakeSession, [A, B, C])
+    assert [borrow(pool) for _ in range(5)] == [A, B, C, A, B]
+
+
+def test_round_robin_skips_busy_sessions(strategy):
+    strategy('round_robin')
+    pool = SessionPool(FakeSession, [A, B, C])
+    with pool.session() as first:
+        assert first.address == A
+        assert borrow(pool) == B
+        assert borrow(pool) == C
+        # A 仍被借用，下一轮从 B 开始
+        assert borrow(pool) == B
+    assert borrow(pool) == C
+    assert borrow(pool) == A
+
+
+def test_least_challenged_prefers_least_recently_used(strategy):
+    strategy('least_challenged')
+    pool = SessionPool(FakeSession, [A, B, C])
+    assert [borrow(pool) for _ in range(4)] == [A, B, C, A]
+
+
+def test_least_challenged_avoids_recent_challenges(strategy):
+    strategy('least_challenged')
+    pool = SessionPool(FakeSession, [A, B, C])
+    sessions = {s.address: s for s in pool.sessions}
+
+    pool.record(sessions[A], CHALLENGE)
+    pool.record(sessions[B], CHALLENGE)
+    # C 没被挑战过，A 比 B 更早被挑战
+    assert [borrow(pool) for _ in range(3)] == [C, C, C]
+    with pool.session() as first:
+        assert first.address == C
+        assert borrow(pool) == A
+
+
+def test_record_updates_counters_and_health(strategy, tmp_path):
+    strategy('least_challenged')
+    health = AddressHealth(str(tmp_path / 'state.db'))
+    pool = SessionPool(FakeSession, [A, B], health)
+    pooled = pool.sessions[0]
+
+    pool.record(pooled, OK, latency=1.0)
+    pool.record(pooled, CHALLENGE)
+    assert (pooled.fetches, pooled.challenges) == (2, 1)
+    assert pooled.last_challenge > 0
+
+    # 测试时钟每次读取前进 1 秒，计数有少量衰减
+    stats = health.stats([A])[A]
+    assert stats['successes'] == pytest.approx(1, rel=1e-3)
+    assert stats['challenges'] == pytest.approx(1, rel=1e-3)
+    assert f"{A} 2 次（挑战 1）" in pool.summary()
+    health.close()
+
+
+def test_session_is_lent_to_one_thread_at_a_time(strategy):
+    strategy('round_robin')
+    pool = SessionPool(FakeSession, [A])
+    borrowed = []
+
+    def worker():
+        with pool.session() as pooled:
+            borrowed.append(pooled.address)
+
+    with pool.session():
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join(0.2)
+        # 唯一的会话被借出时，其他线程等待
+        assert borrowed == []
+    thread.join(5)
+    assert borrowed == [A]
+
+
+def test_close(strategy):
+    strategy('round_robin')
+    pool = SessionPool(FakeSession, [A, B])
+    pool.close()
+    assert all(s.session.closed for s in pool.sessions)
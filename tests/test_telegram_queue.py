@@ -0,0 +1,105 @@
+"""TelegramDeliveryQueue 消息截断"""
+
+import os
+import sys
+import html
+from html.parser import HTMLParser
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+pytest.importorskip('requests')
+pytest.importorskip('dotenv')
+
+from telegram_queue import MAX_MESSAGE_LENGTH, TelegramDeliveryQueue
+
+
+class MarkupNotifier:
+    """与 monitor.py 相同的 HTML 结构，但不限制内容长度"""
+
+    bot_token = 'token'
+    chat_id = 'chat'
+
+    def format_comment(self, comment):
+        message = (f"🔔 <b>新评论</b>\n\n{html.escape(comment['content'])}\n\n"
+                   f"🔗 <a href=\"{comment['link']}\">查看评论</a>\n")
+        for i, link in enumerate(comment.get('links', []), 1):
+            message += f"{i}. {html.escape(link)}\n"
+        return message
+
+
+class TagChecker(HTMLParser):
+    """检查标签是否成对、实体是否完整（Telegram 只接受合法的 HTML）"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.stack = []
+        self.errors = []
+
+    def handle_starttag(self, tag, attrs):
+        self.stack.append(tag)
+
+    def handle_endtag(self, tag):
+        if not self.stack or self.stack.pop() != tag:
+            self.errors.append(f'unexpected </{tag}>')
+
+    def handle_data(self, data):
+        if '<' in data or '>' in data:
+            self.errors.append(f'raw bracket in {data[:20]!r}')
+
+    def handle_entityref(self, name):
+        if name not in ('amp', 'lt', 'gt', 'quot'):
+            self.errors.append(f'broken entity &{name}')
+
+    def handle_charref(self, name):
+        pass
+
+
+def assert_valid_html(text):
+    checker = TagChecker()
+    checker.feed(text)
+    checker.close()
+    assert not checker.errors
+    assert not checker.stack
+    # 行尾不能残留半个实体（HTMLParser 会把它当作普通文本）
+    assert '&' not in text.replace('&amp;', '').replace('&lt;', '').replace('&gt;', '').replace('&quot;', '')
+
+
+def make_comment(content, links=()):
+    return {'comment_id': 'Comment_1', 'content': content, 'links': list(links),
+            'link': 'https://lowendtalk.com/discussion/comment/1/#Comment_1'}
+
+
+@pytest.fixture
+def delivery():
+    queue = TelegramDeliveryQueue(MarkupNotifier())
+    yield queue
+    queue.http.close()
+
+
+@pytest.mark.parametrize('content', [
+    'a&b<c>' * 2000,
+    '<' * 5000,
+    'x' * 3000 + '&' * 3000,
+])
+def test_long_comment_keeps_markup_whole(delivery, content):
+    text = delivery._format(make_comment(content))
+
+    assert len(text) <= MAX_MESSAGE_LENGTH
+    assert text.endswith('查看评论</a>\n')
+    assert '...' in text
+    assert_valid_html(text)
+
+
+def test_links_dropped_when_content_alone_cannot_fit(delivery):
+    links = ['https://example.com/?a=1&b=2' + 'x' * 500] * 20
+    text = delivery._format(make_comment('x&y' * 100, links))
+
+    assert len(text) <= MAX_MESSAGE_LENGTH
+    assert_valid_html(text)
+
+
+def test_short_comment_unchanged(delivery):
+    comment = make_comment('hello & <world>')
+    assert delivery._format(comment) == MarkupNotifier().format_comment(comment)